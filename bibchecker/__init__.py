@@ -5,12 +5,38 @@ Supports:
   - Stuttgart (Stadtbibliothek Stuttgart): IDs starting with SAK or AK
   - Remseck (Mediathek Remseck): Numeric IDs
 """
-from bibchecker.cli import main, parse_all_ids
-from bibchecker.parsers import parse_id, PARSERS
-from bibchecker.output import plain_print, html_print
-from bibchecker.database import save_database, load_database
-from bibchecker.filters import filter_ids
-from bibchecker.input import load_ids, update_input_file
+import importlib
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bibchecker.cli import main, parse_all_ids
+    from bibchecker.parsers import parse_id, PARSERS
+    from bibchecker.output import plain_print, html_print
+    from bibchecker.database import save_database, load_database
+    from bibchecker.filters import filter_ids
+    from bibchecker.input import load_ids, update_input_file
+
+# Exports are imported on first access, so the thin socket client starts
+# without loading the parsers and their dependencies.
+_EXPORTS = {
+    "main": "bibchecker.cli",
+    "parse_all_ids": "bibchecker.cli",
+    "parse_id": "bibchecker.parsers",
+    "load_ids": "bibchecker.input",
+    "filter_ids": "bibchecker.filters",
+    "plain_print": "bibchecker.output",
+    "html_print": "bibchecker.output",
+    "save_database": "bibchecker.database",
+    "load_database": "bibchecker.database",
+    "update_input_file": "bibchecker.input",
+    "PARSERS": "bibchecker.parsers",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module 'bibchecker' has no attribute '{name}'")
 
 
 __all__ = [
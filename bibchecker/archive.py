@@ -0,0 +1,166 @@
+"""Single-file archive of raw catalog pages for offline re-parsing.
+
+Layout: a magic header, one zlib-compressed page per ID, a JSON index mapping
+each ID to ``[offset, length, fetched_at]`` and a fixed-size footer pointing at
+the index.
+Readers memory-map the file and only decompress the pages they need.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from types import TracebackType
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+from bibchecker.parsers import get_parser_for_id
+
+MAGIC = b"BIBARC1\n"
+FOOTER = struct.Struct(">QQ8s")
+
+
+class ArchiveWriter:
+    """Write raw pages to a new archive.
+
+    The archive is built next to the target and moved into place on close, so
+    readers never see a partial file. Leaving the context with an exception
+    discards the new archive.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self._tmp = f"{filename}.tmp"
+        self._fd = open(self._tmp, "wb")
+        self._fd.write(MAGIC)
+        self._index: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, ident: str, html: str, fetched_at: Optional[str] = None) -> None:
+        """Store the page for an ID (the last one wins for duplicate IDs).
+
+        ``fetched_at`` defaults to now.
+        """
+        fetched_at = fetched_at or datetime.now().isoformat(timespec="seconds")
+        blob = zlib.compress(html.encode("utf-8"), 6)
+        with self._lock:
+            self._index[ident] = (self._fd.tell(), len(blob), fetched_at)
+            self._fd.write(blob)
+
+    def close(self) -> None:
+        """Write index and footer and move the archive into place."""
+        if self._fd.closed:
+            return
+        index = json.dumps(self._index, separators=(",", ":")).encode("utf-8")
+        offset = self._fd.tell()
+        self._fd.write(index)
+        self._fd.write(FOOTER.pack(offset, len(index), MAGIC))
+        self._fd.close()
+        os.replace(self._tmp, self.filename)
+
+    def abort(self) -> None:
+        """Drop the partial archive and keep the previous one."""
+        if self._fd.closed:
+            return
+        self._fd.close()
+        os.unlink(self._tmp)
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ArchiveReader:
+    """Memory-mapped read access to an archive."""
+
+    def __init__(self, filename: str) -> None:
+        self._fd = open(filename, "rb")
+        self._mm = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+        offset, length, magic = FOOTER.unpack(self._mm[-FOOTER.size:])
+        if magic != MAGIC or self._mm[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{filename} is not a bibchecker page archive")
+        index: Dict[str, List[Any]] = json.loads(self._mm[offset : offset + length])
+        self.index = index
+
+    def ids(self) -> List[str]:
+        """IDs in the order they were archived."""
+        return list(self.index)
+
+    def get(self, ident: str) -> str:
+        """Return the raw page of an ID."""
+        offset, length = self.index[ident][:2]
+        return zlib.decompress(self._mm[offset : offset + length]).decode("utf-8")
+
+    def fetched_at(self, ident: str) -> Optional[str]:
+        """Return when the page of an ID was downloaded (None for older archives)."""
+        record = self.index[ident]
+        return record[2] if len(record) > 2 else None
+
+    def close(self) -> None:
+        """Unmap and close the archive file."""
+        self._mm.close()
+        self._fd.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+_reader: Optional[ArchiveReader] = None
+_full_page = False
+
+
+def _init_worker(filename: str, full_page: bool) -> None:
+    global _reader, _full_page
+    _reader = ArchiveReader(filename)
+    _full_page = full_page
+
+
+def _reparse_one(ident: str) -> Optional[Dict[str, Any]]:
+    assert _reader is not None
+    try:
+        parser = get_parser_for_id(ident)
+        html = _reader.get(ident)
+        entry = parser.parse_html(ident, html if _full_page else parser.cut_sections(html))
+    except Exception as exc:
+        # one broken page must not stop the other workers
+        print(f"Skipping {ident}: {exc}")
+        return None
+    fetched_at = _reader.fetched_at(ident)
+    if fetched_at:
+        entry["fetched_at"] = fetched_at
+    return entry
+
+
+def reparse_archive(filename: str, workers: Optional[int] = None, full_page: bool = False) -> List[Dict[str, Any]]:
+    """Run the current parsers over every archived page, without network access.
+
+    Only the sections the parsers need are parsed unless ``full_page`` is set.
+    Entries keep the time their page was downloaded.
+    """
+    with ArchiveReader(filename) as reader:
+        ids = reader.ids()
+    chunksize = max(1, len(ids) // ((workers or os.cpu_count() or 1) * 4))
+    initargs = (filename, full_page)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        results = pool.map(_reparse_one, ids, chunksize=chunksize)
+        return [entry for entry in results if entry is not None]
@@ -1,8 +1,97 @@
 """Base classes and common utilities for library parsers."""
+import codecs
+from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
-import requests  # type: ignore[import-untyped]
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+
+from bibchecker.profiling import phase
+
+# requests and bs4 are imported on first use; together they take about
+# 100 ms to import, which every daemon client and --load-db run would pay
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# A page section is identified by (tag, attribute, value), e.g. ("table", "id", "holdingst")
+Section = Tuple[str, str, str]
+# Downloaded text as received and the part of it to parse
+Page = Tuple[str, str]
+
+
+class FetchError(ValueError):
+    """Raised when a catalog page cannot be downloaded."""
+
+
+class SectionScanner(HTMLParser):
+    """Incremental HTML scanner that notices when all wanted sections have been closed."""
+
+    def __init__(self, sections: List[Section]) -> None:
+        super().__init__(convert_charrefs=True)
+        self.pending: List[Section] = list(sections)
+        # (start of the start tag, start of the end tag) of every complete section
+        self.spans: List[Tuple[int, int]] = []
+        self._current: Optional[Section] = None
+        self._start = 0
+        self._depth = 0
+        self._line_starts: List[int] = [0]
+        self._fed = 0
+
+    @property
+    def complete(self) -> bool:
+        """True once every wanted section has been seen in full."""
+        return not self.pending
+
+    def feed(self, data: str) -> None:
+        # remember where lines start, getpos() only reports (line, column)
+        pos = data.find("\n")
+        while pos != -1:
+            self._line_starts.append(self._fed + pos + 1)
+            pos = data.find("\n", pos + 1)
+        self._fed += len(data)
+        super().feed(data)
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def fragments(self, text: str) -> str:
+        """The complete sections cut out of the scanned ``text``, in page order."""
+        parts = []
+        for start, end in sorted(self.spans):
+            close = text.find(">", end)
+            parts.append(text[start:close + 1 if close != -1 else len(text)])
+        return "\n".join(parts)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self._current is not None:
+            if tag == self._current[0]:
+                self._depth += 1
+            return
+        for section in self.pending:
+            if tag == section[0] and self._has_attr(attrs, section[1], section[2]):
+                self._current = section
+                self._start = self._offset()
+                self._depth = 1
+                return
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._current is None or tag != self._current[0]:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self.spans.append((self._start, self._offset()))
+            self.pending.remove(self._current)
+            self._current = None
+
+    @staticmethod
+    def _has_attr(attrs: List[Tuple[str, Optional[str]]], name: str, value: str) -> bool:
+        for key, val in attrs:
+            if key != name or val is None:
+                continue
+            # class attributes may carry several space separated values
+            if val == value or (name == "class" and value in val.split()):
+                return True
+        return False
 
 
 class LibraryParser(ABC):
@@ -11,11 +100,14 @@ class LibraryParser(ABC):
     name: str = "unknown"
     url_template: str = ""
 
-    @classmethod
-    @abstractmethod
-    def matches(cls, ident: str) -> bool:
-        """Check if this parser can handle the given ID."""
-        pass
+    # Sections the parser needs; unless the full page is requested the download
+    # stops after all were seen and only these sections are parsed
+    required_sections: List[Section] = []
+    # Subset needed when metadata comes from the metadata cache
+    holdings_sections: List[Section] = []
+    # Parsers that need more than their sections set this to False
+    streaming: bool = True
+    chunk_size: int = 16 * 1024
 
     @classmethod
     @abstractmethod
@@ -24,16 +116,89 @@ class LibraryParser(ABC):
         pass
 
     @classmethod
-    def fetch_page(cls, ident: str) -> BeautifulSoup:
-        """Fetch and parse the library page for the given ID."""
+    def fetch_html(cls, ident: str, with_metadata: bool = True, full_page: bool = False) -> Page:
+        """Download the HTML of the library page for the given ID.
+
+        Returns the text as received and the HTML to parse. Unless
+        ``full_page`` is set, the download stops once the sections the parser
+        needs were seen and only these sections are parsed.
+        """
+        import requests  # type: ignore[import-untyped]
+
         url = cls.url_template.format(id=ident)
-        ret = requests.get(url)
-        return BeautifulSoup(ret.text, features="html.parser")
+        sections = cls.required_sections if with_metadata else cls.holdings_sections
+        with phase("fetch", ident):
+            try:
+                if cls.streaming and sections and not full_page:
+                    return cls._fetch_sections(url, sections)
+                text = str(requests.get(url).text)
+                return text, text
+            except requests.RequestException as exc:
+                raise FetchError(f"Cannot fetch {url}: {exc}") from exc
+
+    @classmethod
+    def cut_sections(cls, html: str, with_metadata: bool = True) -> str:
+        """Return the needed sections of an already downloaded page.
+
+        Pages without one of the sections, and parsers that do not stream,
+        keep the whole page.
+        """
+        sections = cls.required_sections if with_metadata else cls.holdings_sections
+        if not cls.streaming or not sections:
+            return html
+        scanner = SectionScanner(sections)
+        scanner.feed(html)
+        return scanner.fragments(html) if scanner.complete else html
+
+    @classmethod
+    def make_soup(cls, html: str, ident: Optional[str] = None) -> "BeautifulSoup":
+        """Build the parse tree for downloaded HTML."""
+        from bs4 import BeautifulSoup
+
+        with phase("soup", ident):
+            return BeautifulSoup(html, features="html.parser")
+
+    @classmethod
+    def fetch_page(cls, ident: str) -> "BeautifulSoup":
+        """Fetch and parse the library page for the given ID."""
+        return cls.make_soup(cls.fetch_html(ident)[1], ident)
+
+    @classmethod
+    def _fetch_sections(cls, url: str, sections: List[Section]) -> Page:
+        """Download the page in chunks and stop once all given sections are complete.
+
+        The received text comes with the sections found by the scanner, so
+        the parse tree is only built for them.
+        """
+        import requests
+
+        scanner = SectionScanner(sections)
+        chunks: List[str] = []
+        with requests.get(url, stream=True) as ret:
+            decoder = codecs.getincrementaldecoder(ret.encoding or "utf-8")(errors="replace")
+            for raw in ret.iter_content(chunk_size=cls.chunk_size):
+                chunk = decoder.decode(raw)
+                chunks.append(chunk)
+                scanner.feed(chunk)
+                if scanner.complete:
+                    # leaving the context closes the connection without reading the rest
+                    break
+        text = "".join(chunks)
+        # a page without one of the sections is parsed as it is
+        return text, scanner.fragments(text) if scanner.complete else text
 
     @classmethod
-    @abstractmethod
     def parse(cls, ident: str) -> Dict[str, Any]:
-        """Parse the library entry for the given ID."""
+        """Fetch and parse the library entry for the given ID."""
+        return cls.parse_html(ident, cls.fetch_html(ident)[1])
+
+    @classmethod
+    @abstractmethod
+    def parse_html(cls, ident: str, html: str, with_metadata: bool = True) -> Dict[str, Any]:
+        """Parse the library entry for the given ID from already downloaded HTML.
+
+        Without ``with_metadata`` only the holdings are extracted.
+        """
         pass
 
     @classmethod
@@ -43,6 +208,7 @@ class LibraryParser(ABC):
             "id": ident,
             "library": cls.name,
             "status": [],
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
         }
 
 
@@ -11,84 +11,476 @@ Options:
   --only-available     Only show items that are available in at least one location
   -h --help            Show this help
   --bib=BIB            Filter for a list of libraries (comma-separated)
-  --format=FORMAT      Output format: plain, html [default: plain]
+  --format=FORMAT      Output format: plain, html, json [default: plain]
   --sort-by=SORT       Sort by item or bib [default: item]
   --update             Update input file with fetched titles
   --save-db=FILE       Save fetched data to JSON file
   --load-db=FILE       Load data from JSON file instead of fetching
+  --full-page          Download complete pages instead of stopping after the needed sections
+  --profiles=FILE      Refresh all profiles from a JSON profile file with one shared fetch
+  --history=FILE       Record holding status transitions in this history file
+  --changes-since=N    Print transitions from --history after cursor N and exit
+  --rank               Rank libraries by the number of listed items available there
+  --plan=N             Suggest up to N libraries to visit that cover most available items
+  --prefer=BIB         Preferred libraries (comma-separated) used as tie-breaker for --plan
+  --archive=FILE       Store the raw pages of this run in a compressed page archive
+  --reparse-archive=FILE  Parse the pages of an archive again instead of fetching
+  --metadata-cache=FILE  Reuse cached titles and metadata, only extract holdings
+  --metadata-max-age=DAYS  Refetch metadata older than this [default: 30]
+  --jobs=N             Parser processes for --fetchers and --reparse-archive (default: all cores)
+  --fetchers=N         Download with N threads and parse the pages in parallel processes
+  --profile            Time each phase per ID and print the slowest ones to stderr
+  --profile-top=N      Number of rows in the profile tables [default: 10]
+  --profile-dump=FILE  Also write a cProfile/pstats dump to FILE (implies --profile)
+  --profile-log=FILE   Append the profile summary as a JSON line to FILE (implies --profile)
+  --daemon=SOCKET      Stay resident and answer bibchecker-client requests on a Unix socket
+  --where=EXPR         Only show holdings matching EXPR, e.g. "standort ~ kinder and due <= 7"
+  --split-by=FIELD     Write one report per bib, standort or library into --output-dir and list them
+  --output-dir=DIR     Directory for the --split-by reports [default: .]
+  --export=DIR         Append the entries as a Parquet file partitioned by refresh date to DIR
+  --shards=N           Split the IDs into N shards and fetch them with worker processes
+  --workers=N          Local worker processes for --shards (default: one per shard, 0 with --listen)
+  --listen=ADDRESS     Coordinator address (socket path or host:port) for remote --worker processes
+  --lease-timeout=SECONDS  Hand a shard out again when its worker was silent this long [default: 600]
+  --worker=ADDRESS     Work on shards handed out by the coordinator at ADDRESS
 
 Examples:
   bibchecker -f mybooks.txt
   bibchecker --format html -f mybooks.txt > report.html
   bibchecker -f mybooks.txt --save-db=cache.json
   bibchecker --load-db=cache.json --format html
+  bibchecker --profiles=profiles.json --update
+  bibchecker --history=history.jsonl --changes-since=0
+  bibchecker --reparse-archive=pages.bin --save-db=cache.json
+  bibchecker -f mybooks.txt --fetchers=8 --save-db=cache.json
+  bibchecker --daemon=/tmp/bibchecker.sock &
+  bibchecker-client --socket=/tmp/bibchecker.sock --load-db=cache.json --bib=Ost
+  bibchecker --load-db=cache.json --export=parquet/
+  bibchecker --load-db=cache.json --where='sig ^= "Kin" and due <= 7' --all
+  bibchecker --load-db=cache.json --only-available --format=html --split-by=bib --output-dir=out/
+  bibchecker -f mybooks.txt --shards=8 --workers=4 --save-db=cache.json
+  bibchecker -f mybooks.txt --shards=16 --listen=0.0.0.0:7045 --save-db=cache.json
+  bibchecker --worker=coordinator.lan:7045
 
 Supported libraries:
   - Stuttgart (Stadtbibliothek Stuttgart): IDs starting with SAK or AK
   - Remseck (Mediathek Remseck): Numeric IDs
 """
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
 from docopt import docopt  # type: ignore[import-untyped]
-from typing import Dict, Any, List, Generator
+from typing import Dict, Any, Callable, Iterable, List, Generator, Optional, Set, Tuple
 
-from bibchecker.parsers import parse_id, PARSERS
+from bibchecker.archive import ArchiveWriter, reparse_archive
+from bibchecker.parsers import parse_id
 from bibchecker.output import plain_print, html_print
-from bibchecker.database import save_database, load_database
+from bibchecker.daemon import serve
+from bibchecker.database import DatabaseReader, save_database, load_database
+from bibchecker.export import check_export, export_parquet
 from bibchecker.filters import filter_ids
+from bibchecker.metadata import MetadataCache
+from bibchecker.matrix import AvailabilityMatrix
+from bibchecker.pipeline import parse_pipelined
+from bibchecker.planner import TripPlan, plan_trip
+from bibchecker.profiling import Profiler, excluded, phase
+from bibchecker.query import Predicate, QueryError, compile_query, select
+from bibchecker.reports import build_payload
 from bibchecker.input import load_ids, update_input_file
+from bibchecker.history import HistoryStore
+from bibchecker.profiles import load_profiles, refresh_profiles
+from bibchecker.shard import Coordinator, authkey, parse_address, run_worker
 
+# --split-by values and the holding field they group by (None: the entry's library)
+SPLIT_FIELDS: Dict[str, Optional[str]] = {"bib": "bib", "standort": "standort", "library": None}
 
-def parse_all_ids(ids: List[str]) -> Generator[Dict[str, Any], None, None]:
-    """Parse all IDs and yield entry dicts."""
+# Options that need all entries at once, so results cannot be streamed
+COLLECTING = ("--save-db", "--update", "--rank", "--plan", "--archive", "--export", "--shards")
+
+
+def parse_all_ids(
+    ids: List[str],
+    archive: Optional[ArchiveWriter] = None,
+    metadata: Optional[MetadataCache] = None,
+    fetchers: int = 0,
+    workers: Optional[int] = None,
+    full_page: bool = False,
+) -> Generator[Dict[str, Any], None, None]:
+    """Parse all IDs and yield entry dicts.
+
+    With ``fetchers`` the pages are downloaded by that many threads and
+    parsed by ``workers`` processes.
+    """
+    if fetchers:
+        yield from parse_pipelined(ids, fetchers, workers, archive, metadata, full_page=full_page)
+        return
     for ident in ids:
         try:
-            yield parse_id(ident)
+            yield parse_id(ident, archive, metadata, full_page)
         except ValueError as e:
             print(f"Error: {e}")
             continue
 
 
+def _pipeline(args: Dict[str, Any]) -> Tuple[int, Optional[int]]:
+    """Download threads and parser processes from --fetchers and --jobs."""
+    return int(args["--fetchers"] or 0), int(args["--jobs"]) if args["--jobs"] else None
+
+
+def _metadata_cache(args: Dict[str, Any]) -> Optional[MetadataCache]:
+    """Open the metadata cache if one was requested."""
+    if not args["--metadata-cache"]:
+        return None
+    return MetadataCache(args["--metadata-cache"], timedelta(days=float(args["--metadata-max-age"])))
+
+
+def _refresh_profiles(
+    filename: str,
+    update: bool,
+    history: Optional[HistoryStore],
+    metadata: Optional[MetadataCache],
+    pipeline: Tuple[int, Optional[int]] = (0, None),
+    full_page: bool = False,
+) -> None:
+    """Fetch the IDs of all profiles once and write every profile's reports."""
+    for refreshed in refresh_profiles(
+        load_profiles(filename), datetime.now(), history, metadata=metadata, pipeline=pipeline, full_page=full_page
+    ):
+        profile = refreshed.profile
+        if update:
+            update_input_file(str(profile.input_file), refreshed.entries)
+        print(f"{profile.name}: {len(refreshed.entries)} entries, {len(refreshed.rendered_files)} reports in {profile.output_dir}")
+
+
+def _print_plan(plan: TripPlan) -> None:
+    """Print a trip plan with the items to pick up at each stop."""
+    print(f"{plan.covered} of {plan.available} available items in {len(plan.stops)} libraries")
+    for stop in plan.stops:
+        print()
+        print(f"{stop.bib} ({len(stop.entries)})")
+        for entry in stop.entries:
+            status = entry["status"][0] if entry["status"] else {}
+            print(f"  {entry.get('Titel', entry['id'])} - {status.get('standort') or '-'} - {status.get('sig') or '-'}")
+
+
 def main() -> None:
     """Main entry point."""
     args = docopt(__doc__)
+    if args["--daemon"]:
+        serve(args["--daemon"])
+        return
+    if args["--worker"]:
+        try:
+            run_worker(parse_address(args["--worker"]), authkey())
+        except ValueError as exc:
+            sys.exit(f"Error: {exc}")
+        return
+    _execute(args)
+
+
+def execute(
+    argv: List[str],
+    database: Callable[[str], List[Dict[str, Any]]] = load_database,
+    matrix: Callable[[List[Dict[str, Any]]], AvailabilityMatrix] = AvailabilityMatrix,
+) -> None:
+    """Run one CLI invocation, e.g. on behalf of a daemon client.
+
+    ``database`` and ``matrix`` let a resident process reuse parsed data.
+    """
+    args = docopt(__doc__, argv=argv)
+    if args["--daemon"] or args["--worker"]:
+        sys.exit("Error: --daemon and --worker cannot run on behalf of a client")
+    _execute(args, database, matrix)
+
+
+def _execute(
+    args: Dict[str, Any],
+    database: Callable[[str], List[Dict[str, Any]]] = load_database,
+    matrix: Callable[[List[Dict[str, Any]]], AvailabilityMatrix] = AvailabilityMatrix,
+) -> None:
+    """Run the CLI with parsed docopt arguments, profiled if requested."""
+    profiler = None
+    if args["--profile"] or args["--profile-dump"] or args["--profile-log"]:
+        profiler = Profiler(args["--profile-dump"])
+        profiler.start()
+    started = datetime.now()
+    try:
+        _run(args, database, matrix)
+    finally:
+        if profiler:
+            profiler.stop()
+            print(profiler.report(int(args["--profile-top"])), file=sys.stderr)
+            if args["--profile-log"]:
+                profiler.append_log(Path(args["--profile-log"]), started)
+
+
+def _run(
+    args: Dict[str, Any],
+    database: Callable[[str], List[Dict[str, Any]]],
+    build_matrix: Callable[[List[Dict[str, Any]]], AvailabilityMatrix],
+) -> None:
+    """Run the CLI with parsed docopt arguments."""
+    full_page = bool(args["--full-page"])
+
+    try:
+        where = compile_query(args["--where"]) if args["--where"] else None
+    except QueryError as exc:
+        print(f"Error: --where: {exc}")
+        return
+    if args["--split-by"] and args["--split-by"] not in SPLIT_FIELDS:
+        print(f"Error: --split-by must be one of {', '.join(SPLIT_FIELDS)}")
+        return
+    if args["--export"]:
+        try:
+            check_export()
+        except ImportError as exc:
+            print(f"Error: --export: {exc}")
+            return
+    if args["--shards"]:
+        try:
+            lease_timeout = float(args["--lease-timeout"])
+        except ValueError:
+            lease_timeout = 0
+        if lease_timeout <= 0:
+            print("Error: --lease-timeout must be a positive number of seconds")
+            return
+        if not args["--listen"] and (args["--workers"] or "").isdigit() and int(args["--workers"]) == 0:
+            print("Error: --workers=0 needs --listen, otherwise no worker can connect")
+            return
+
+    history = HistoryStore(args["--history"]) if args["--history"] else None
+
+    if args["--changes-since"] is not None:
+        if history is None:
+            print("Error: --changes-since requires --history")
+            return
+        if not args["--changes-since"].isdigit():
+            print("Error: --changes-since must be a non-negative integer")
+            return
+        for change in history.changes_since(int(args["--changes-since"])):
+            print(
+                f"{change['seq']} {change['time']} {change['id']} {change['bib']} "
+                f"{change['sig']}: {change['old']} -> {change['new']}"
+            )
+        return
+
+    if args["--profiles"]:
+        _refresh_profiles(
+            args["--profiles"], args["--update"], history, _metadata_cache(args), _pipeline(args), full_page
+        )
+        return
 
     # Load entries from database or fetch from web
+    if args["--load-db"] and database is load_database and not any(args[option] for option in COLLECTING):
+        # Filter while reading: only matching entries are decoded and kept
+        reader = DatabaseReader(args["--load-db"], args["--all"], args["--only-available"], _bibfilter(args))
+        _emit(args, reader, None, where)
+        return
     if args["--load-db"]:
-        entries = load_database(args["--load-db"])
+        entries = database(args["--load-db"])
         all_ids: List[str] = [e["id"] for e in entries]
+    elif args["--reparse-archive"]:
+        entries = reparse_archive(args["--reparse-archive"], _pipeline(args)[1], full_page)
+        all_ids = [e["id"] for e in entries]
     else:
         input_file = args["-f"]
         if input_file:
             all_ids = list(load_ids(input_file))
         else:
             all_ids = args["IDS"]
-        entries = list(parse_all_ids(all_ids))
+        metadata = _metadata_cache(args)
+        if _can_stream(args, history):
+            # Nothing needs the complete list: fetch, filter and print entry by entry
+            entries_iter = parse_all_ids(all_ids, None, metadata, *_pipeline(args), full_page)
+            _emit(args, filter_ids(entries_iter, args["--all"], args["--only-available"], _bibfilter(args)), all_ids, where)
+            if metadata:
+                metadata.save()
+            return
+        if args["--shards"]:
+            entries = _fetch_sharded(args, all_ids)
+        elif args["--archive"]:
+            with ArchiveWriter(args["--archive"]) as archive:
+                entries = list(parse_all_ids(all_ids, archive, metadata, *_pipeline(args), full_page))
+        else:
+            entries = list(parse_all_ids(all_ids, None, metadata, *_pipeline(args), full_page))
+        if metadata:
+            metadata.save()
+
+    # Record transitions against the previous database contents
+    if history and args["--save-db"] and not args["--load-db"] and os.path.exists(args["--save-db"]):
+        history.record(load_database(args["--save-db"]), entries)
+    elif history:
+        print("Warning: nothing recorded, --history compares fetched entries with an existing --save-db file",
+              file=sys.stderr)
 
     # Save to database if requested
     if args["--save-db"]:
         save_database(args["--save-db"], entries)
 
+    if args["--export"]:
+        print(f"Exported to {export_parquet(entries, Path(args['--export']))}", file=sys.stderr)
+
     # Update input file if requested
     if args["--update"] and args["-f"]:
         update_input_file(args["-f"], entries)
 
-    # Parse filter options
-    bibfilter: List[str] = []
-    if args["--bib"]:
-        bibfilter = [b.strip() for b in args["--bib"].split(",")]
+    bibfilter = _bibfilter(args)
+    if where is not None and (args["--rank"] or args["--plan"]):
+        matrix = build_matrix(list(select(entries, where)))
+    else:
+        matrix = build_matrix(entries)
+
+    if args["--rank"]:
+        for bib, count in matrix.rank(bibs=bibfilter):
+            print(f"{count:5d}  {bib}")
+        return
+
+    if args["--plan"]:
+        preferred = [b.strip() for b in (args["--prefer"] or "").split(",") if b.strip()]
+        _print_plan(plan_trip(matrix, int(args["--plan"]), preferred=preferred, candidates=bibfilter))
+        return
 
     # Apply filters
-    filtered_entries = filter_ids(
-        entries,
+    filtered_entries = matrix.filter(
         all_data=args["--all"],
         only_available=args["--only-available"],
         bibfilter=bibfilter,
     )
 
-    # Output
-    if args["--format"] == "html":
-        html_print(filtered_entries, all_ids, args["--sort-by"])
+    _emit(args, filtered_entries, all_ids, where)
+
+
+def _fetch_sharded(args: Dict[str, Any], all_ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch the IDs through a shard coordinator and local or remote workers."""
+    address = parse_address(args["--listen"]) if args["--listen"] else None
+    shards = int(args["--shards"])
+    if args["--workers"] is not None:
+        workers = int(args["--workers"])
+    else:
+        workers = 0 if address else shards
+    try:
+        coordinator = Coordinator(
+            all_ids, shards, address, float(args["--lease-timeout"]), full_page=bool(args["--full-page"])
+        )
+    except ValueError as exc:
+        sys.exit(f"Error: {exc}")
+    if address and workers == 0:
+        print(f"Waiting for workers on {args['--listen']}", file=sys.stderr)
+    entries = coordinator.run(workers)
+    missing = coordinator.abandoned_ids()
+    if missing:
+        print(f"Could not fetch {len(missing)} IDs of abandoned shards: {', '.join(missing)}", file=sys.stderr)
+    return entries
+
+
+def _bibfilter(args: Dict[str, Any]) -> List[str]:
+    """Parse the --bib option."""
+    if not args["--bib"]:
+        return []
+    return [b.strip() for b in args["--bib"].split(",")]
+
+
+def _can_stream(args: Dict[str, Any], history: Optional[HistoryStore]) -> bool:
+    """Whether fetched entries can go straight to the output without being collected."""
+    return (
+        args["--format"] in ("plain", "html")
+        and args["--sort-by"] == "item"
+        and history is None
+        and not any(args[option] for option in COLLECTING)
+    )
+
+
+def _emit(
+    args: Dict[str, Any],
+    entries: Iterable[Dict[str, Any]],
+    all_ids: Optional[List[str]],
+    where: Optional[Predicate],
+) -> None:
+    """Apply --where, then print one report or write one per --split-by group."""
+    # a reader knows the number of IDs once it has been read, even behind --where
+    reader = entries if isinstance(entries, DatabaseReader) else None
+    if where is not None:
+        entries = select(entries, where)
+    if args["--split-by"]:
+        _write_split(args, entries, all_ids, reader)
     else:
-        plain_print(filtered_entries, all_ids, args["--sort-by"])
+        _output(args, entries, all_ids, reader)
+
+
+def _split_name(value: str, used: Set[str]) -> str:
+    """File name stem for a group; names that clash after replacing "/" get a number."""
+    stem = value.replace("/", "_")
+    candidate, number = stem, 1
+    while candidate in used:
+        number += 1
+        candidate = f"{stem}-{number}"
+    used.add(candidate)
+    return candidate
+
+
+def _write_split(
+    args: Dict[str, Any],
+    entries: Iterable[Dict[str, Any]],
+    all_ids: Optional[List[str]],
+    reader: Optional[DatabaseReader] = None,
+) -> None:
+    """Group the entries by --split-by in one pass and write a report per group.
+
+    Prints one line per report with its file name and group, separated by a tab.
+    """
+    field = SPLIT_FIELDS[args["--split-by"]]
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        if field is None:
+            groups.setdefault(entry["library"], []).append(entry)
+            continue
+        holdings: Dict[str, List[Dict[str, Any]]] = {}
+        for holding in entry["status"]:
+            holdings.setdefault(holding.get(field) or "Unbekannt", []).append(holding)
+        for value, matching in holdings.items():
+            groups.setdefault(value, []).append({**entry, "status": matching})
+
+    output_dir = Path(args["--output-dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = {"html": "html", "json": "json"}.get(args["--format"], "txt")
+    used: Set[str] = set()
+    for value, group in sorted(groups.items()):
+        target = output_dir / f"{_split_name(value, used)}.{suffix}"
+        with target.open("w", encoding="utf-8") as fd, redirect_stdout(fd):
+            _output(args, group, all_ids, reader)
+        print(f"{target.name}\t{value}")
+    print(f"Wrote {len(groups)} reports to {output_dir}", file=sys.stderr)
+
+
+def _output(
+    args: Dict[str, Any],
+    entries: Iterable[Dict[str, Any]],
+    all_ids: Optional[List[str]],
+    reader: Optional[DatabaseReader] = None,
+) -> None:
+    """Print the entries in the requested format.
+
+    ``all_ids`` is None for a ``DatabaseReader``, which only knows the number
+    of IDs once it has been read completely; pass it as ``reader``.
+    """
+    # entries may still be fetched, parsed and filtered while the output is written
+    entries = excluded(entries)
+    with phase("render"):
+        if args["--format"] == "html":
+            html_print(entries, all_ids, args["--sort-by"])
+        elif args["--format"] == "json":
+            bibfilter = _bibfilter(args)
+            payload = build_payload(entries, 0, bibfilter, datetime.now())
+            if all_ids is not None:
+                payload["ids"] = len(all_ids)
+            elif reader is not None:
+                payload["ids"] = reader.scanned
+            print(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+        else:
+            plain_print(entries, all_ids, args["--sort-by"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+"""Thin client for a running ``bibchecker --daemon``.
+
+Usage:
+  bibchecker-client [--socket=PATH] [bibchecker options...]
+
+Sends the bibchecker options over the daemon's Unix socket and streams the
+output back to stdout and stderr. Exits with the status of the bibchecker
+run. Only the standard library is imported, so startup is cheap.
+The socket defaults to $BIBCHECKER_SOCKET.
+"""
+import json
+import os
+import socket
+import struct
+import sys
+from typing import BinaryIO, Dict, List, Optional
+
+# channel byte and payload length; see bibchecker.daemon
+FRAME = struct.Struct(">cI")
+
+
+def request(path: str, argv: List[str]) -> int:
+    """Run one bibchecker invocation on the daemon, copy its output and return its exit status."""
+    streams: Dict[bytes, BinaryIO] = {b"o": sys.stdout.buffer, b"e": sys.stderr.buffer}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n").encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as response:
+            while True:
+                header = response.read(FRAME.size)
+                if len(header) < FRAME.size:
+                    break
+                channel, length = FRAME.unpack(header)
+                payload = response.read(length)
+                if channel == b"x":
+                    sys.stdout.flush()
+                    return int(payload)
+                streams[channel].write(payload)
+    sys.stdout.flush()
+    print("Error: the daemon closed the connection without an exit status", file=sys.stderr)
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of bibchecker-client."""
+    args = list(sys.argv[1:] if argv is None else argv)
+    path = os.environ.get("BIBCHECKER_SOCKET", "")
+    if args and args[0].startswith("--socket="):
+        path = args.pop(0).split("=", 1)[1]
+    elif len(args) > 1 and args[0] == "--socket":
+        args.pop(0)
+        path = args.pop(0)
+    if not path:
+        sys.exit("Error: no socket given (--socket=PATH or BIBCHECKER_SOCKET)")
+    sys.exit(request(path, args))
+
+
+if __name__ == "__main__":
+    main()
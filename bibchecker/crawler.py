@@ -0,0 +1,186 @@
+"""Continuous crawl that spreads fetches over the day within a per-host budget."""
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests  # type: ignore[import-untyped]
+
+from bibchecker.archive import ArchiveWriter
+from bibchecker.history import HistoryStore
+from bibchecker.metadata import MetadataCache
+from bibchecker.parsers import get_parser_for_id, parse_id
+from bibchecker.pipeline import ParserPool
+from bibchecker.profiles import (
+    Profile,
+    ProfileRefresh,
+    fetch_shared,
+    load_previous,
+    load_profile_ids,
+    render_profiles,
+    union_ids,
+)
+
+DAY = 24 * 60 * 60
+
+
+def host_for_id(ident: str) -> str:
+    """Host name of the catalog that serves an ID."""
+    return urlparse(get_parser_for_id(ident).url_template).netloc
+
+
+class ContinuousCrawler:
+    """Fetch one ID at a time, most urgent first, and re-render reports incrementally.
+
+    Every host gets ``budget`` requests per day (by default as many as it has
+    IDs, i.e. the volume of one daily refresh). The next ID of a host is the
+    one with the highest ``age * weight``; the weight grows for items held by
+    preferred libraries and for items whose status changed often.
+
+    All state is guarded by ``lock``, which :meth:`tick` only releases for
+    its downloads; a full :meth:`refresh` goes through the crawler as well,
+    so its results become the crawler's entries.
+    """
+
+    def __init__(
+        self,
+        profiles: List[Profile],
+        tick_seconds: float,
+        budget: Optional[int] = None,
+        render_interval: float = 300,
+        history: Optional[HistoryStore] = None,
+        metadata: Optional[MetadataCache] = None,
+    ) -> None:
+        self.profiles = profiles
+        self.tick_seconds = tick_seconds
+        self.budget = budget
+        self.render_interval = render_interval
+        self.history = history
+        self.metadata = metadata
+        self.my_bibs = {bib for profile in profiles for bib in profile.my_bibs}
+        self.lock = threading.RLock()
+
+        self.entries: Dict[str, Dict[str, Any]] = load_previous(profiles)
+        self.last_fetch: Dict[str, float] = {}
+        for profile in profiles:
+            if profile.cache_file.exists():
+                mtime = profile.cache_file.stat().st_mtime
+                for ident in self.entries:
+                    self.last_fetch.setdefault(ident, mtime)
+        # number of recorded holding transitions per ID
+        self.changes: Dict[str, int] = {}
+        if history:
+            for change in history.changes_since(0):
+                self.changes[change["id"]] = self.changes.get(change["id"], 0) + 1
+
+        self.tokens: Dict[str, float] = {}
+        self.last_refill = time.monotonic()
+        self.last_render = 0.0
+        self.dirty = False
+        self._reload_ids()
+
+    def _reload_ids(self) -> None:
+        self.ids_by_profile = load_profile_ids(self.profiles)
+        self.ids_by_host: Dict[str, List[str]] = {}
+        for ident in union_ids(self.ids_by_profile.values()):
+            try:
+                self.ids_by_host.setdefault(host_for_id(ident), []).append(ident)
+            except ValueError as exc:
+                print(f"Skipping {ident}: {exc}")
+
+    def weight(self, ident: str) -> float:
+        """Urgency multiplier of an ID."""
+        weight = 1.0
+        entry = self.entries.get(ident)
+        if entry and any(status.get("bib") in self.my_bibs for status in entry.get("status", [])):
+            weight += 1.0
+        return weight + min(self.changes.get(ident, 0), 10) / 2
+
+    def priority(self, ident: str, now: float) -> float:
+        """Age of the data weighted by urgency; never fetched IDs come first."""
+        last = self.last_fetch.get(ident)
+        if last is None:
+            return float("inf")
+        return (now - last) * self.weight(ident)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        for host, ids in self.ids_by_host.items():
+            rate = (self.budget or len(ids)) / DAY
+            capacity = max(1.0, rate * self.tick_seconds)
+            self.tokens[host] = min(capacity, self.tokens.get(host, 1.0) + elapsed * rate)
+
+    def tick(self) -> Optional[List[ProfileRefresh]]:
+        """Spend the available budget; returns the rendered profiles when reports were updated."""
+        with self.lock:
+            self._refill(time.monotonic())
+            now = time.time()
+            picked: List[str] = []
+            for host, ids in self.ids_by_host.items():
+                while self.tokens.get(host, 0.0) >= 1.0 and ids:
+                    ident = max(ids, key=lambda i: self.priority(i, now))
+                    self.tokens[host] -= 1.0
+                    # marked as fetched right away, so the next pick is another ID
+                    self.last_fetch[ident] = now
+                    picked.append(ident)
+
+        # downloads run without the lock, so refreshes and renders do not wait for them
+        for ident in picked:
+            entry = self._fetch(ident)
+            if entry is not None:
+                with self.lock:
+                    self._update(ident, entry, now)
+
+        with self.lock:
+            if self.dirty and now - self.last_render >= self.render_interval:
+                return self.render()
+            return None
+
+    def refresh(
+        self,
+        archive_file: Optional[Path] = None,
+        pipeline: Tuple[int, Optional[int]] = (0, None),
+        parsers: Optional[ParserPool] = None,
+    ) -> List[ProfileRefresh]:
+        """Fetch every ID now, like a daily refresh, and render all reports."""
+        with self.lock:
+            self._reload_ids()
+            ids = union_ids(self.ids_by_profile.values())
+            if archive_file:
+                with ArchiveWriter(str(archive_file)) as archive:
+                    shared = fetch_shared(ids, archive, self.metadata, pipeline, parsers=parsers)
+            else:
+                shared = fetch_shared(ids, None, self.metadata, pipeline, parsers=parsers)
+            now = time.time()
+            for ident, entry in shared.items():
+                self._update(ident, entry, now)
+            return self.render()
+
+    def _fetch(self, ident: str) -> Optional[Dict[str, Any]]:
+        try:
+            return parse_id(ident, metadata=self.metadata)
+        except (ValueError, requests.RequestException) as exc:
+            print(f"Skipping {ident}: {exc}")
+            return None
+
+    def _update(self, ident: str, entry: Dict[str, Any], now: float) -> None:
+        old = self.entries.get(ident)
+        if self.history and old is not None:
+            changes = self.history.record([old], [entry])
+            self.changes[ident] = self.changes.get(ident, 0) + len(changes)
+        self.entries[ident] = entry
+        self.last_fetch[ident] = now
+        self.dirty = True
+
+    def render(self) -> List[ProfileRefresh]:
+        """Write caches and reports of all profiles from the current entries."""
+        with self.lock:
+            if self.metadata:
+                self.metadata.save()
+            self._reload_ids()
+            self.last_render = time.time()
+            self.dirty = False
+            return render_profiles(self.profiles, self.ids_by_profile, self.entries, datetime.now())
@@ -0,0 +1,160 @@
+"""Resident bibchecker process answering CLI invocations over a Unix socket.
+
+A request is one JSON line with ``argv`` and ``cwd``; an empty line is a
+probe and gets no reply. The reply is a sequence of frames: a channel byte, a
+4-byte big-endian length and the payload. Channel ``o`` carries stdout, ``e``
+stderr and the final ``x`` frame the exit status as ASCII digits.
+"""
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Dict, Any, BinaryIO, List, Optional, TextIO, Tuple
+
+from bibchecker.database import load_database
+from bibchecker.matrix import AvailabilityMatrix
+
+
+class WarmCache:
+    """Parsed databases and their availability matrices, reloaded when the file changes."""
+
+    def __init__(self) -> None:
+        self._databases: Dict[str, Tuple[int, List[Dict[str, Any]], Optional[AvailabilityMatrix]]] = {}
+
+    def load(self, filename: str) -> List[Dict[str, Any]]:
+        """Return the entries of a database, parsing it only when it changed."""
+        path = os.path.abspath(filename)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._databases.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        entries = load_database(path)
+        self._databases[path] = (mtime, entries, None)
+        return entries
+
+    def matrix(self, entries: List[Dict[str, Any]]) -> AvailabilityMatrix:
+        """Return the matrix for entries; kept only for entries of a cached database."""
+        for path, (mtime, cached, matrix) in self._databases.items():
+            if cached is entries:
+                if matrix is None:
+                    matrix = AvailabilityMatrix(entries)
+                    self._databases[path] = (mtime, cached, matrix)
+                return matrix
+        return AvailabilityMatrix(entries)
+
+
+FRAME = struct.Struct(">cI")
+
+
+class _FrameWriter(io.RawIOBase):
+    """Writes everything it gets as frames of one channel."""
+
+    def __init__(self, stream: BinaryIO, channel: bytes) -> None:
+        super().__init__()
+        self._stream = stream
+        self._channel = channel
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._stream.write(FRAME.pack(self._channel, len(data)) + bytes(data))
+        return len(data)
+
+
+def _channel(stream: BinaryIO, channel: bytes) -> TextIO:
+    return io.TextIOWrapper(io.BufferedWriter(_FrameWriter(stream, channel)), encoding="utf-8")
+
+
+def exit_status(code: Any) -> Tuple[int, str]:
+    """Exit status and message for a ``SystemExit`` code, as the interpreter maps them."""
+    if code is None:
+        return 0, ""
+    if isinstance(code, int):
+        return code, ""
+    return 1, f"{code}\n"
+
+
+def parse_request(line: bytes) -> Tuple[List[str], Optional[str]]:
+    """Return argv and working directory of a request line."""
+    try:
+        req = json.loads(line)
+    except ValueError as exc:
+        raise ValueError(f"malformed request: {exc}") from exc
+    argv = req.get("argv") if isinstance(req, dict) else None
+    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+        raise ValueError("malformed request: argv must be a list of strings")
+    cwd = req.get("cwd")
+    return argv, cwd if isinstance(cwd, str) else None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        from bibchecker.cli import execute
+
+        line = self.rfile.readline()
+        if not line.strip():
+            # daemon_running() connects and closes without a request
+            return
+        wfile: BinaryIO = self.wfile  # type: ignore[assignment]
+        out, err = _channel(wfile, b"o"), _channel(wfile, b"e")
+        status = 0
+        cwd = os.getcwd()
+        try:
+            argv, req_cwd = parse_request(line)
+            os.chdir(req_cwd or cwd)
+            with redirect_stdout(out), redirect_stderr(err):
+                execute(argv, self.server.cache.load, self.server.cache.matrix)
+        except SystemExit as exc:
+            # docopt reports usage errors and --help this way
+            status, message = exit_status(exc.code)
+            err.write(message)
+        except Exception as exc:
+            status = 1
+            err.write(f"Error: {exc}\n")
+        finally:
+            os.chdir(cwd)
+            out.flush()
+            err.flush()
+            wfile.write(FRAME.pack(b"x", len(str(status))) + str(status).encode("ascii"))
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Handles one request at a time, so stdout can be redirected safely."""
+
+    def __init__(self, path: str) -> None:
+        self.cache = WarmCache()
+        super().__init__(path, _Handler)
+
+
+def daemon_running(path: str) -> bool:
+    """Check if a process accepts connections on the socket path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(path: str) -> None:
+    """Listen on the given socket path until interrupted.
+
+    A socket left behind by a stopped daemon is replaced; a live one is not.
+    """
+    if os.path.exists(path):
+        if daemon_running(path):
+            sys.exit(f"Error: a bibchecker daemon is already listening on {path}")
+        os.unlink(path)
+    with DaemonServer(path) as server:
+        print(f"bibchecker daemon listening on {path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
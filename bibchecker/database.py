@@ -1,16 +1,139 @@
 """Database operations for bibchecker."""
 import json
-from typing import Dict, Any, List
+import os
+import re
+import tempfile
+from typing import Dict, Any, IO, Iterator, List, Optional
+
+from bibchecker.filters import filter_ids
+
+_BORROWABLE = re.compile(r'"can_be_borrowed"\s*:\s*true')
+
+
+def _is_jsonl(filename: str) -> bool:
+    return filename.endswith(".jsonl")
+
+
+def _encodings(text: str) -> List[str]:
+    """Ways a JSON encoder may write a string, without the surrounding quotes."""
+    forms = {json.dumps(text, ensure_ascii=False)[1:-1], json.dumps(text)[1:-1]}
+    return sorted(forms | {form.replace("/", "\\/") for form in forms})
 
 
 def save_database(filename: str, entries: List[Dict[str, Any]]) -> None:
-    """Save entries to JSON database file."""
-    with open(filename, "w", encoding="utf-8") as fd:
-        json.dump(entries, fd, ensure_ascii=False, indent=2)
+    """Save entries to JSON database file (atomically, readers never see a partial file).
+
+    Files ending in ``.jsonl`` get one entry per line instead of a JSON array.
+    Every writer uses its own temporary file, so concurrent saves cannot mix.
+    """
+    directory, name = os.path.split(filename)
+    handle, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as fd:
+            if _is_jsonl(filename):
+                for entry in entries:
+                    fd.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            else:
+                json.dump(entries, fd, ensure_ascii=False, indent=2)
+        # mkstemp creates the file private; keep the mode of the file it replaces
+        os.chmod(tmp, os.stat(filename).st_mode & 0o777 if os.path.exists(filename) else 0o644)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
 
 
 def load_database(filename: str) -> List[Dict[str, Any]]:
     """Load entries from JSON database file."""
+    if _is_jsonl(filename):
+        return list(DatabaseReader(filename))
     with open(filename, "r", encoding="utf-8") as fd:
         data: List[Dict[str, Any]] = json.load(fd)
     return data
+
+
+class DatabaseReader:
+    """Lazily yield the entries of a database that pass the ``filter_ids`` criteria.
+
+    The file is decoded incrementally (JSON array or JSON Lines), so memory
+    use does not depend on the database size. For JSON Lines, lines that
+    cannot match the library or availability filter are skipped without
+    decoding them. ``scanned`` counts all entries seen so far.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        all_data: bool = True,
+        only_available: bool = False,
+        bibfilter: Optional[List[str]] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> None:
+        self.filename = filename
+        self.all_data = all_data
+        self.only_available = only_available
+        self.bibfilter = bibfilter or []
+        self.chunk_size = chunk_size
+        self.scanned = 0
+        self._decoder = json.JSONDecoder()
+        self._needles = sorted({needle for bib in self.bibfilter for needle in _encodings(bib)})
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self.all_data or self.only_available or self.bibfilter:
+            return filter_ids(self._entries(), self.all_data, self.only_available, self.bibfilter)
+        return self._entries()
+
+    def _entries(self) -> Iterator[Dict[str, Any]]:
+        with open(self.filename, "r", encoding="utf-8") as fd:
+            first = ""
+            while not first:
+                chunk = fd.read(1)
+                if not chunk:
+                    return
+                first = chunk.strip()
+            if first == "[":
+                yield from self._array(fd)
+            else:
+                yield from self._lines(fd, first)
+
+    def _may_match(self, line: str) -> bool:
+        """Cheap test on the raw text; False only if the entry cannot pass the filters."""
+        if self.only_available and not self.all_data and not _BORROWABLE.search(line):
+            return False
+        if self.only_available and self.bibfilter:
+            return any(needle in line for needle in self._needles)
+        return True
+
+    def _lines(self, fd: IO[str], first: str) -> Iterator[Dict[str, Any]]:
+        pending = first + fd.readline()
+        while pending:
+            if pending.strip():
+                self.scanned += 1
+                if self._may_match(pending):
+                    yield json.loads(pending)
+            pending = fd.readline()
+
+    def _array(self, fd: IO[str]) -> Iterator[Dict[str, Any]]:
+        buffer = ""
+        pos = 0
+        eof = False
+        while True:
+            # skip whitespace and separators between the array elements
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                if pos >= len(buffer):
+                    raise ValueError("need more data")
+                entry, pos = self._decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError(f"Truncated database file: {self.filename}")
+                chunk = fd.read(self.chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            self.scanned += 1
+            yield entry
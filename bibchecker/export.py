@@ -0,0 +1,81 @@
+"""Columnar export of entries and holdings to Parquet, partitioned by refresh date."""
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+# Flattened columns, one row per holding (entries without holdings get one row with empty holding columns)
+COLUMNS = ("id", "library", "bib", "standort", "sig", "available", "can_be_borrowed", "fetched_at")
+DICTIONARY_COLUMNS = ["id", "library", "bib", "standort", "sig", "available"]
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow  # type: ignore[import-not-found]
+        import pyarrow.parquet  # type: ignore[import-not-found]  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Parquet export needs pyarrow: pip install 'bibchecker[export]'") from exc
+    return pyarrow
+
+
+def check_export() -> None:
+    """Raise ImportError now if pyarrow is missing, instead of after a refresh."""
+    _pyarrow()
+
+
+def flatten(entries: Iterable[Dict[str, Any]], refreshed_at: datetime) -> Dict[str, List[Any]]:
+    """Turn entries into column lists."""
+    columns: Dict[str, List[Any]] = {name: [] for name in COLUMNS}
+    for entry in entries:
+        fetched = entry.get("fetched_at")
+        fetched_at = datetime.fromisoformat(fetched) if fetched else refreshed_at
+        for status in entry["status"] or [{}]:
+            columns["id"].append(entry["id"])
+            columns["library"].append(entry.get("library"))
+            columns["bib"].append(status.get("bib"))
+            columns["standort"].append(status.get("standort"))
+            columns["sig"].append(status.get("sig"))
+            columns["available"].append(status.get("available"))
+            columns["can_be_borrowed"].append(status.get("can_be_borrowed"))
+            columns["fetched_at"].append(fetched_at)
+    return columns
+
+
+def last_fetched(entries: Iterable[Dict[str, Any]]) -> Optional[datetime]:
+    """Newest ``fetched_at`` of the entries, None if none has one."""
+    times = [datetime.fromisoformat(entry["fetched_at"]) for entry in entries if entry.get("fetched_at")]
+    return max(times) if times else None
+
+
+def export_parquet(
+    entries: Iterable[Dict[str, Any]],
+    output_dir: Path,
+    refreshed_at: Optional[datetime] = None,
+) -> Path:
+    """Write one Parquet file below ``output_dir/refresh_date=YYYY-MM-DD/`` and return its path.
+
+    ``refreshed_at`` defaults to the newest ``fetched_at`` of the entries, so
+    an exported old database lands in the partition of its refresh. File
+    names carry the time with microseconds plus a random suffix, so exports
+    never overwrite each other.
+    """
+    pa = _pyarrow()
+    entries = list(entries)
+    refreshed_at = refreshed_at or last_fetched(entries) or datetime.now()
+    columns = flatten(entries, refreshed_at)
+    arrays = []
+    for name in COLUMNS:
+        if name == "can_be_borrowed":
+            arrays.append(pa.array(columns[name], type=pa.bool_()))
+        elif name == "fetched_at":
+            arrays.append(pa.array(columns[name], type=pa.timestamp("s")))
+        else:
+            arrays.append(pa.array(columns[name], type=pa.string()).dictionary_encode())
+    table = pa.Table.from_arrays(arrays, names=list(COLUMNS))
+    partition = Path(output_dir) / f"refresh_date={refreshed_at.date().isoformat()}"
+    partition.mkdir(parents=True, exist_ok=True)
+    target = partition / f"part-{refreshed_at.strftime('%H%M%S-%f')}-{uuid.uuid4().hex[:8]}.parquet"
+    tmp = target.with_suffix(".parquet.tmp")
+    pa.parquet.write_table(table, str(tmp), use_dictionary=DICTIONARY_COLUMNS, compression="zstd")
+    tmp.replace(target)
+    return target
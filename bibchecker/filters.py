@@ -1,6 +1,8 @@
 """Filtering utilities for bibchecker."""
 from typing import Dict, Any, List, Optional, Iterable, Generator
 
+from bibchecker.profiling import phase
+
 
 def filter_ids(
     iddata: Iterable[Dict[str, Any]],
@@ -13,13 +15,14 @@ def filter_ids(
         bibfilter = []
 
     for entry in iddata:
-        # Filter out entries from status if unwanted
-        entry["status"] = [
-            av
-            for av in entry["status"]
-            if (av.get("can_be_borrowed") or all_data)
-            and ((av.get("bib") in bibfilter) or (not bibfilter))
-        ]
+        with phase("filter", entry.get("id")):
+            # Filter out entries from status if unwanted
+            entry["status"] = [
+                av
+                for av in entry["status"]
+                if (av.get("can_be_borrowed") or all_data)
+                and ((av.get("bib") in bibfilter) or (not bibfilter))
+            ]
         # Skip entries with no libraries where the book can be borrowed or only_available is unset
         if not only_available or entry["status"]:
             yield entry
@@ -0,0 +1,95 @@
+"""Generation directories: render into a fresh directory, then switch ``current`` atomically.
+
+Layout below an output directory::
+
+    generations/20260101T040000.123456-4711/   complete, immutable renders
+    generations/.building-*/                   renders in progress
+    current -> generations/<newest>            what readers should serve
+"""
+import filecmp
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from types import TracebackType
+from typing import List, Optional, Type
+
+CURRENT = "current"
+GENERATIONS = "generations"
+
+
+def current_dir(output_dir: Path) -> Path:
+    """Directory with the latest complete render (the output directory itself before the first generation)."""
+    current = output_dir / CURRENT
+    return current if current.is_dir() else output_dir
+
+
+def _link_unchanged(new: Path, previous: Path) -> int:
+    """Replace files identical to the previous generation by hardlinks; return their number."""
+    linked = 0
+    for path in new.rglob("*"):
+        if not path.is_file() or path.is_symlink():
+            continue
+        old = previous / path.relative_to(new)
+        if not old.is_file() or old.stat().st_size != path.stat().st_size:
+            continue
+        if not filecmp.cmp(old, path, shallow=False):
+            continue
+        tmp = path.with_name(f".{path.name}.link")
+        os.link(old, tmp)
+        os.replace(tmp, path)
+        linked += 1
+    return linked
+
+
+class Generation:
+    """Context manager that publishes the rendered directory only if rendering succeeds."""
+
+    def __init__(self, output_dir: Path, keep: int = 3) -> None:
+        self.output_dir = output_dir
+        self.keep = max(1, keep)
+        self.root = output_dir / GENERATIONS
+        self.path = Path()
+        self.linked = 0
+
+    def __enter__(self) -> "Generation":
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix=".building-", dir=self.root))
+        os.chmod(self.path, 0o755)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+        self.publish()
+
+    def publish(self) -> Path:
+        """Hardlink unchanged files, then make this generation ``current`` and prune old ones."""
+        current = self.output_dir / CURRENT
+        if current.is_dir():
+            self.linked = _link_unchanged(self.path, current.resolve())
+        final = self.root / f"{datetime.now():%Y%m%dT%H%M%S.%f}-{os.getpid()}"
+        os.rename(self.path, final)
+        self.path = final
+        tmp_link = self.output_dir / f".{CURRENT}-{os.getpid()}-{threading.get_ident()}"
+        os.symlink(os.path.join(GENERATIONS, final.name), tmp_link)
+        os.replace(tmp_link, current)
+        self.prune()
+        return final
+
+    def prune(self) -> List[Path]:
+        """Remove all but the newest ``keep`` complete generations, never the current one."""
+        active = (self.output_dir / CURRENT).resolve()
+        complete = sorted(p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith("."))
+        removed = [p for p in complete[: -self.keep] if p.resolve() != active]
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+        return removed
@@ -0,0 +1,176 @@
+"""Append-only history of holding status transitions."""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+
+HoldingKey = Tuple[str, str, str, int]
+
+# bytes read at a time when looking for the newest record
+TAIL_BLOCK = 64 * 1024
+
+
+def _holding_states(entry: Dict[str, Any]) -> Dict[HoldingKey, str]:
+    """Map every holding of an entry to its availability text.
+
+    Several copies can share bib and signature, so the occurrence index is part
+    of the key.
+    """
+    states: Dict[HoldingKey, str] = {}
+    seen: Dict[Tuple[str, str], int] = {}
+    for status in entry.get("status", []):
+        bib = status.get("bib", "")
+        sig = status.get("sig", "")
+        idx = seen.get((bib, sig), 0)
+        seen[(bib, sig)] = idx + 1
+        states[(entry["id"], bib, sig, idx)] = status.get("available", "")
+    return states
+
+
+def diff_entries(
+    old_entries: Iterable[Dict[str, Any]],
+    new_entries: Iterable[Dict[str, Any]],
+    when: datetime,
+) -> List[Dict[str, Any]]:
+    """Return the holding transitions between two refreshes.
+
+    Only IDs present in both runs are compared; a missing ID usually means the
+    fetch failed, which is not a status change.
+    """
+    old_by_id = {entry["id"]: entry for entry in old_entries}
+    timestamp = when.isoformat(timespec="seconds")
+    changes: List[Dict[str, Any]] = []
+    for entry in new_entries:
+        old_entry = old_by_id.get(entry["id"])
+        if old_entry is None:
+            continue
+        old_states = _holding_states(old_entry)
+        new_states = _holding_states(entry)
+        for key in list(new_states) + [k for k in old_states if k not in new_states]:
+            old = old_states.get(key)
+            new = new_states.get(key)
+            if old != new:
+                changes.append(
+                    {"id": key[0], "bib": key[1], "sig": key[2], "old": old, "new": new, "time": timestamp}
+                )
+    return changes
+
+
+class HistoryStore:
+    """JSON Lines file with one transition per line.
+
+    Every record carries an increasing ``seq`` number, which serves as cursor
+    for :meth:`changes_since`. Lines that cannot be decoded (e.g. torn by a
+    crash during a write) are skipped.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self._lock = threading.Lock()
+        # size of the file when _last was read, to notice appends by other processes
+        self._size = -1
+        self._last = 0
+        self._torn = False
+
+    def _read_tail(self) -> None:
+        """Find the newest seq by reading the file backwards."""
+        self._last = 0
+        self._torn = False
+        try:
+            fd = open(self.filename, "rb")
+        except FileNotFoundError:
+            self._size = 0
+            return
+        with fd:
+            end = fd.seek(0, os.SEEK_END)
+            self._size = end
+            if end:
+                fd.seek(end - 1)
+                self._torn = fd.read(1) != b"\n"
+            tail = b""
+            pos = end
+            while pos > 0:
+                step = min(TAIL_BLOCK, pos)
+                pos -= step
+                fd.seek(pos)
+                tail = fd.read(step) + tail
+                lines = tail.split(b"\n")
+                # the first piece may be cut off unless the start of the file was reached
+                complete = lines if pos == 0 else lines[1:]
+                for line in reversed(complete):
+                    seq = _seq(line)
+                    if seq is not None:
+                        self._last = seq
+                        return
+                tail = lines[0]
+
+    def last_cursor(self) -> int:
+        """Return the sequence number of the newest record (0 for an empty history)."""
+        with self._lock:
+            if self._size != _size(self.filename):
+                self._read_tail()
+            return self._last
+
+    def record(
+        self,
+        old_entries: Iterable[Dict[str, Any]],
+        new_entries: Iterable[Dict[str, Any]],
+        when: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Append the transitions between two refreshes and return them."""
+        changes = diff_entries(old_entries, new_entries, when or datetime.now())
+        if not changes:
+            return changes
+        with self._lock:
+            if self._size != _size(self.filename):
+                self._read_tail()
+            lines = []
+            for change in changes:
+                self._last += 1
+                change["seq"] = self._last
+                lines.append(json.dumps(change, ensure_ascii=False, separators=(",", ":")) + "\n")
+            with open(self.filename, "a", encoding="utf-8") as fd:
+                if self._torn:
+                    # do not glue the first record onto a torn last line
+                    fd.write("\n")
+                    self._torn = False
+                fd.writelines(lines)
+            self._size = _size(self.filename)
+        return changes
+
+    def changes_since(self, cursor: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` records with a sequence number greater than ``cursor``."""
+        if not os.path.exists(self.filename):
+            return []
+        changes: List[Dict[str, Any]] = []
+        with open(self.filename, "r", encoding="utf-8", errors="replace") as fd:
+            for line in fd:
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(change, dict) or not isinstance(change.get("seq"), int):
+                    continue
+                if change["seq"] > cursor:
+                    changes.append(change)
+                    if limit is not None and len(changes) >= limit:
+                        break
+        return changes
+
+
+def _size(filename: str) -> int:
+    try:
+        return os.path.getsize(filename)
+    except FileNotFoundError:
+        return 0
+
+
+def _seq(line: bytes) -> Optional[int]:
+    """Return the seq of a history line, or None if it is torn or empty."""
+    try:
+        change = json.loads(line)
+    except ValueError:
+        return None
+    seq = change.get("seq") if isinstance(change, dict) else None
+    return seq if isinstance(seq, int) else None
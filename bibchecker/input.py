@@ -20,8 +20,11 @@ def load_ids(f: str) -> Generator[str, None, None]:
                 print(f"cannot parse line '{raw_line}' - unknown ID format")
 
 
-def update_input_file(filename: str, entries: List[Dict[str, Any]]) -> None:
-    """Update the input file with titles from parsed entries."""
+def update_input_file(filename: str, entries: List[Dict[str, Any]]) -> bool:
+    """Update the input file with titles from parsed entries.
+
+    The file is only rewritten when a title changed; returns whether it was.
+    """
     # Build a mapping from ID to title
     id_to_title: Dict[str, str] = {}
     for entry in entries:
@@ -60,6 +63,10 @@ def update_input_file(filename: str, entries: List[Dict[str, Any]]) -> None:
         else:
             updated_lines.append(line)
 
+    if updated_lines == lines:
+        return False
+
     # Write back
     with open(filename, "w") as fd:
         fd.writelines(updated_lines)
+    return True
@@ -0,0 +1,97 @@
+"""Item x library availability matrix backed by integer bitsets."""
+import sys
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+
+from bibchecker.profiling import phase
+
+
+if sys.version_info >= (3, 10):
+
+    def popcount(mask: int) -> int:
+        """Number of set bits in a mask."""
+        return mask.bit_count()
+
+else:
+
+    def popcount(mask: int) -> int:
+        """Number of set bits in a mask."""
+        return bin(mask).count("1")
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the indices of all set bits, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AvailabilityMatrix:
+    """Compiled view of parsed entries for fast filtering, counting and ranking.
+
+    Bit ``i`` of a library's plane is set when item ``i`` has a holding there
+    (``holding``) or a holding that can be borrowed (``borrowable``).
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]]) -> None:
+        self.entries: List[Dict[str, Any]] = list(entries)
+        self.holding: Dict[str, int] = {}
+        self.borrowable: Dict[str, int] = {}
+        for idx, entry in enumerate(self.entries):
+            bit = 1 << idx
+            for status in entry.get("status", []):
+                bib = status.get("bib")
+                self.holding[bib] = self.holding.get(bib, 0) | bit
+                if status.get("can_be_borrowed"):
+                    self.borrowable[bib] = self.borrowable.get(bib, 0) | bit
+        self.libraries: List[str] = sorted(b for b in self.holding if b)
+        self.all_items = (1 << len(self.entries)) - 1
+
+    def plane(self, all_data: bool = False) -> Dict[str, int]:
+        """Return the holding plane when ``all_data`` is set, else the borrowable plane."""
+        return self.holding if all_data else self.borrowable
+
+    def mask(self, bibs: Optional[List[str]] = None, all_data: bool = False) -> int:
+        """Items with a (borrowable) holding at any of the given libraries (all if empty)."""
+        plane = self.plane(all_data)
+        result = 0
+        for bib in bibs or plane:
+            result |= plane.get(bib, 0)
+        return result
+
+    def filter(
+        self,
+        all_data: bool = False,
+        only_available: bool = False,
+        bibfilter: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Same result as :func:`bibchecker.filters.filter_ids`, without touching the originals.
+
+        Returned entries are shallow copies with their own ``status`` list.
+        """
+        wanted = set(bibfilter or [])
+        result: List[Dict[str, Any]] = []
+        with phase("filter"):
+            selected = self.mask(bibfilter, all_data) if only_available else self.all_items
+            for idx in iter_bits(selected):
+                entry = self.entries[idx]
+                copied = dict(entry)
+                copied["status"] = [
+                    av
+                    for av in entry["status"]
+                    if (av.get("can_be_borrowed") or all_data) and (not wanted or av.get("bib") in wanted)
+                ]
+                result.append(copied)
+        return result
+
+    def counts(self, all_data: bool = False, items: Optional[int] = None) -> Dict[str, int]:
+        """Number of (borrowable) items per library, optionally limited to an item mask."""
+        limit = self.all_items if items is None else items
+        return {bib: popcount(bits & limit) for bib, bits in self.plane(all_data).items() if bib}
+
+    def rank(self, items: Optional[int] = None, bibs: Optional[List[str]] = None) -> List[Tuple[str, int]]:
+        """Libraries ordered by how many of the wanted items are available there today."""
+        counts = self.counts(items=items)
+        if bibs:
+            counts = {bib: count for bib, count in counts.items() if bib in bibs}
+        return sorted(((bib, count) for bib, count in counts.items() if count), key=lambda item: (-item[1], item[0]))
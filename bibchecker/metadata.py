@@ -0,0 +1,48 @@
+"""Long-lived cache for bibliographic metadata, separate from volatile holdings."""
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+# Entry keys that are not bibliographic metadata
+ENTRY_KEYS = ("id", "library", "status", "catalog_id", "catalog_url", "fetched_at")
+
+
+class MetadataCache:
+    """JSON file mapping catalog IDs to their metadata fields and fetch time."""
+
+    def __init__(self, filename: str, max_age: timedelta = timedelta(days=30)) -> None:
+        self.filename = filename
+        self.max_age = max_age
+        self.data: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as fd:
+                self.data = json.load(fd)
+
+    def get(self, ident: str) -> Optional[Dict[str, Any]]:
+        """Return the cached metadata fields if they are recent enough."""
+        cached = self.data.get(ident)
+        if cached is None:
+            return None
+        if datetime.now() - datetime.fromisoformat(cached["fetched_at"]) > self.max_age:
+            return None
+        fields: Dict[str, Any] = cached["fields"]
+        return fields
+
+    def put(self, ident: str, entry: Dict[str, Any]) -> None:
+        """Remember the metadata of a freshly parsed entry (entries without title are skipped)."""
+        if not entry.get("Titel"):
+            return
+        self.data[ident] = {
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "fields": {key: value for key, value in entry.items() if key not in ENTRY_KEYS},
+        }
+
+    def save(self) -> None:
+        """Write the cache atomically."""
+        tmp = f"{self.filename}.tmp"
+        # a copy, because crawler downloads may add entries while this runs
+        snapshot = dict(self.data)
+        with open(tmp, "w", encoding="utf-8") as fd:
+            json.dump(snapshot, fd, ensure_ascii=False)
+        os.replace(tmp, self.filename)
@@ -1,9 +1,12 @@
 """Output formatters for bibchecker."""
+import sys
 from datetime import datetime
-from typing import Dict, Any, List, Iterable
+from typing import Dict, Any, List, Iterable, Optional, TextIO, Tuple
 
+from bibchecker.reports import group_by_bib, stream
 
-def plain_print(iddata: Iterable[Dict[str, Any]], all_ids: List[str], sort_by: str = "item") -> None:
+
+def plain_print(iddata: Iterable[Dict[str, Any]], all_ids: Optional[List[str]], sort_by: str = "item") -> None:
     """Print results in plain text format."""
     if sort_by == "item":
         _print_by_item(iddata)
@@ -25,133 +28,49 @@ def _print_by_item(iddata: Iterable[Dict[str, Any]]) -> None:
             print(f"  {av.get('bib')} ({av.get('standort') or 'No Data'}) - {av.get('available')}")
 
 
-def _print_by_library(iddata: Iterable[Dict[str, Any]], all_ids: List[str]) -> None:
+def _print_by_library(iddata: Iterable[Dict[str, Any]], all_ids: Optional[List[str]]) -> None:
     """Print results grouped by library."""
-    print(f"Gathering {len(all_ids)} entries first ... please wait")
-    bib_entries: Dict[str, List[Dict[str, Any]]] = {}
+    count = f"{len(all_ids)} " if all_ids is not None else ""
+    print(f"Gathering {count}entries first ... please wait")
+    bib_entries: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]] = {}
 
     for ident, entry in enumerate(iddata):
         print(ident, end=" ", flush=True)
         for status in entry["status"]:
-            status["entry"] = entry
             bib = status.get("bib", "Unknown")
             if bib not in bib_entries:
                 bib_entries[bib] = []
-            bib_entries[bib].append(status)
+            bib_entries[bib].append((entry, status))
 
     print("done")
     for k, vals in bib_entries.items():
         print()
         print(f"Library '{k}'")
-        for v in vals:
-            entry = v["entry"]
+        for entry, v in vals:
             print(f"  {entry['Titel']} - {v.get('standort')} - {v.get('available')}")
 
 
-def html_print(iddata: Iterable[Dict[str, Any]], all_ids: List[str], sort_by: str = "item") -> None:
-    """Print results in HTML format."""
-    html_parts: List[str] = [_html_header()]
-
-    if sort_by == "item":
-        html_parts.extend(_html_by_item(iddata))
-    elif sort_by == "bib":
-        html_parts.extend(_html_by_library(iddata))
-
-    html_parts.append(_html_footer())
-    print("".join(html_parts))
-
-
-def _html_header() -> str:
-    """Generate HTML header with CSS."""
-    return """<!DOCTYPE html>
-<html lang="de">
-<head>
-    <meta charset="UTF-8">
-    <title>Bibliothek Status</title>
-    <style>
-        body { font-family: system-ui, sans-serif; margin: 20px; background: #f5f5f5; }
-        h1 { color: #333; margin-bottom: 15px; }
-        table { border-collapse: collapse; width: 100%; background: white; }
-        th { background: #eee; text-align: left; padding: 8px; border-bottom: 2px solid #999; }
-        td { padding: 6px 8px; border-bottom: 1px solid #eee; vertical-align: top; }
-        .title { font-weight: 600; background: #fafafa; border-top: 2px solid #666; }
-        .first { border-top: 2px solid #666; }
-        .ok { color: #228b22; font-weight: 600; }
-        .no { color: #dc143c; }
-        .loc { color: #888; font-size: 0.9em; }
-        .ts { color: #999; font-size: 0.8em; margin-top: 20px; }
-    </style>
-</head>
-<body>
-<h1>Bibliothek Status</h1>
-<table>
-<tr><th>Titel</th><th>Bibliothek</th><th>Standort</th><th>Status</th></tr>
-"""
-
-
-def _html_footer() -> str:
-    """Generate HTML footer with timestamp."""
-    timestamp = datetime.now().strftime("%d.%m.%Y %H:%M")
-    return f'</table>\n<div class="ts">Stand: {timestamp}</div>\n</body></html>'
-
-
-def _html_by_item(iddata: Iterable[Dict[str, Any]]) -> List[str]:
-    """Generate HTML rows grouped by item."""
-    parts: List[str] = []
-    for entry in iddata:
-        title = entry.get("Titel", "Unbekannt")
-        statuses = entry.get("status", [])
-        if statuses:
-            for i, av in enumerate(statuses):
-                bib = av.get("bib", "?")
-                loc = av.get("standort") or "-"
-                avail = av.get("available", "?")
-                cls = "ok" if av.get("can_be_borrowed") else "no"
-                if i == 0:
-                    parts.append(
-                        f'<tr><td class="title" rowspan="{len(statuses)}">{title}</td>'
-                        f'<td class="first">{bib}</td><td class="first loc">{loc}</td>'
-                        f'<td class="first {cls}">{avail}</td></tr>\n'
-                    )
-                else:
-                    parts.append(
-                        f'<tr><td>{bib}</td><td class="loc">{loc}</td>'
-                        f'<td class="{cls}">{avail}</td></tr>\n'
-                    )
-        else:
-            parts.append(
-                f'<tr><td class="title">{title}</td>'
-                f'<td colspan="3" class="first no">Keine Daten</td></tr>\n'
-            )
-    return parts
-
-
-def _html_by_library(iddata: Iterable[Dict[str, Any]]) -> List[str]:
-    """Generate HTML rows grouped by library."""
-    parts: List[str] = []
-    bib_entries: Dict[str, List[Dict[str, Any]]] = {}
-
-    for entry in iddata:
-        for status in entry["status"]:
-            status["entry"] = entry
-            bib = status.get("bib", "Unbekannt")
-            if bib not in bib_entries:
-                bib_entries[bib] = []
-            bib_entries[bib].append(status)
-
-    for library, items in sorted(bib_entries.items()):
-        parts.append(
-            f'<tr><td colspan="4" style="background:#ddd;font-weight:600;padding:10px;">'
-            f'{library}</td></tr>\n'
-        )
-        for item in items:
-            entry = item.get("entry", {})
-            title = entry.get("Titel", "Unbekannt")
-            loc = item.get("standort") or "-"
-            avail = item.get("available", "?")
-            cls = "ok" if item.get("can_be_borrowed") else "no"
-            parts.append(
-                f'<tr><td class="title">{title}</td><td>-</td>'
-                f'<td class="loc">{loc}</td><td class="{cls}">{avail}</td></tr>\n'
-            )
-    return parts
+def html_print(
+    iddata: Iterable[Dict[str, Any]],
+    all_ids: Optional[List[str]],
+    sort_by: str = "item",
+    out: Optional[TextIO] = None,
+) -> None:
+    """Print results in HTML format using the same templates as the web reports.
+
+    The page is streamed chunk by chunk, so with ``sort_by="item"`` entries are
+    written as they arrive and never held in memory together.
+    """
+    context: Dict[str, Any] = {
+        "title": "Bibliothek Status",
+        "subtitle": f"{len(all_ids)} IDs" if all_ids is not None else None,
+        "timestamp": datetime.now(),
+        "info_line": None,
+    }
+    if sort_by == "bib":
+        chunks = stream("report_bib.html", grouped=group_by_bib(list(iddata)), **context)
+    else:
+        chunks = stream("report_item.html", entries=iddata, **context)
+    target = out or sys.stdout
+    for chunk in chunks:
+        target.write(chunk)
@@ -1,34 +1,194 @@
-"""Library parser modules."""
-from typing import Dict, Any, List, Type
+"""Library parser registry.
 
-from bibchecker.base import LibraryParser
-from bibchecker.parsers.stuttgart import StuttgartParser
-from bibchecker.parsers.remseck import RemseckParser
+Parsers are described by :class:`ParserSpec` objects, so IDs can be
+dispatched without importing any parser module. Besides the built-in
+libraries, packages can add parsers through the ``bibchecker.parsers``
+entry point group, pointing to a ``ParserSpec``::
 
-# Registry of all available parsers
-PARSERS: List[Type[LibraryParser]] = [
-    StuttgartParser,
-    RemseckParser,
-]
+    [project.entry-points."bibchecker.parsers"]
+    ludwigsburg = "bibchecker_ludwigsburg:SPEC"
 
+A parser module is imported when the first ID for it is dispatched.
+"""
+import importlib
+import re
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Pattern, Tuple, Type, TYPE_CHECKING
 
-def get_parser_for_id(ident: str) -> Type[LibraryParser]:
+if TYPE_CHECKING:
+    from bibchecker.archive import ArchiveWriter
+    from bibchecker.base import LibraryParser
+    from bibchecker.metadata import MetadataCache
+
+ENTRY_POINT_GROUP = "bibchecker.parsers"
+
+
+@dataclass(frozen=True)
+class ParserSpec:
+    """Name, ID pattern and import target ("module:Class") of a parser."""
+
+    name: str
+    # Regular expression matched at the start of the stripped, upper-cased ID
+    pattern: str
+    target: str
+
+    def load(self) -> Type["LibraryParser"]:
+        """Import the parser class (once)."""
+        return _load_target(self.target)
+
+
+@lru_cache(maxsize=None)
+def _load_target(target: str) -> Type["LibraryParser"]:
+    module, _, attr = target.partition(":")
+    parser: Type["LibraryParser"] = getattr(importlib.import_module(module), attr)
+    return parser
+
+
+STUTTGART = ParserSpec("stuttgart", r"S?AK", "bibchecker.parsers.stuttgart:StuttgartParser")
+REMSECK = ParserSpec("remseck", r"\d+\Z", "bibchecker.parsers.remseck:RemseckParser")
+
+# Built-in parsers, tried in this order before parsers from entry points;
+# they are registered only here, entry points are meant for plugins
+BUILTIN_SPECS: List[ParserSpec] = [STUTTGART, REMSECK]
+
+
+def _entry_point_specs() -> List[ParserSpec]:
+    from importlib.metadata import entry_points
+
+    if sys.version_info >= (3, 10):
+        found = list(entry_points(group=ENTRY_POINT_GROUP))
+    else:
+        found = list(entry_points().get(ENTRY_POINT_GROUP, []))
+    specs: List[ParserSpec] = []
+    for entry_point in sorted(found, key=lambda ep: ep.name):
+        try:
+            spec = entry_point.load()
+        except Exception as exc:
+            print(f"Cannot load parser plugin {entry_point.name}: {exc}", file=sys.stderr)
+            continue
+        if isinstance(spec, ParserSpec):
+            specs.append(spec)
+    return specs
+
+
+def _compile(spec: ParserSpec) -> Optional[Pattern[str]]:
+    try:
+        return re.compile(spec.pattern)
+    except re.error as exc:
+        print(f"Skipping parser plugin {spec.name}: invalid pattern: {exc}", file=sys.stderr)
+        return None
+
+
+def _combinable(pattern: Pattern[str]) -> bool:
+    """Whether the pattern can be one alternative of the dispatch regex.
+
+    Own groups would shift the group numbers (and backreferences) of the
+    combined regex, and global flags are only allowed at its start.
+    """
+    if pattern.groups:
+        return False
+    try:
+        re.compile(f"({pattern.pattern})")
+    except re.error:
+        return False
+    return True
+
+
+class _Dispatch:
+    """Find the first matching pattern with one regex for all combinable patterns.
+
+    The others are matched on their own, in their place in the order.
+    """
+
+    def __init__(self, patterns: List[Pattern[str]]) -> None:
+        combined = [idx for idx, pattern in enumerate(patterns) if _combinable(pattern)]
+        # group n of the regex is the pattern combined[n - 1]
+        self.slots = combined
+        self.regex = re.compile("|".join(f"({patterns[idx].pattern})" for idx in combined)) if combined else None
+        self.isolated = [(idx, pattern) for idx, pattern in enumerate(patterns) if idx not in combined]
+
+    def find(self, key: str) -> Optional[int]:
+        match = self.regex.match(key) if self.regex is not None else None
+        found = self.slots[match.lastindex - 1] if match is not None and match.lastindex else None
+        for idx, pattern in self.isolated:
+            if found is not None and idx > found:
+                break
+            if pattern.match(key):
+                return idx
+        return found
+
+
+@lru_cache(maxsize=None)
+def _registry() -> Tuple[Tuple[ParserSpec, ...], _Dispatch]:
+    """All specs with a valid pattern plus their dispatch table."""
+    specs: Dict[str, ParserSpec] = {spec.name: spec for spec in BUILTIN_SPECS}
+    for spec in _entry_point_specs():
+        specs.setdefault(spec.name, spec)
+    valid: List[ParserSpec] = []
+    patterns: List[Pattern[str]] = []
+    for spec in specs.values():
+        pattern = _compile(spec)
+        if pattern is not None:
+            valid.append(spec)
+            patterns.append(pattern)
+    return tuple(valid), _Dispatch(patterns)
+
+
+def find_spec(ident: str) -> Optional[ParserSpec]:
+    """Return the spec whose pattern matches the ID, without importing its parser."""
+    specs, dispatch = _registry()
+    idx = dispatch.find(ident.strip().upper())
+    return None if idx is None else specs[idx]
+
+
+def get_parser_for_id(ident: str) -> Type["LibraryParser"]:
     """Find the appropriate parser for the given ID."""
-    for parser in PARSERS:
-        if parser.matches(ident):
-            return parser
-    raise ValueError(f"No parser found for ID: {ident}")
+    spec = find_spec(ident)
+    if spec is None:
+        raise ValueError(f"No parser found for ID: {ident}")
+    return spec.load()
+
 
+def parse_id(
+    ident: str,
+    archive: Optional["ArchiveWriter"] = None,
+    metadata: Optional["MetadataCache"] = None,
+    full_page: bool = False,
+) -> Dict[str, Any]:
+    """Parse an ID using the appropriate library parser.
 
-def parse_id(ident: str) -> Dict[str, Any]:
-    """Parse an ID using the appropriate library parser."""
+    With an ``archive`` the raw page is stored as well, so it can be parsed
+    again later without network access. With a ``metadata`` cache only the
+    holdings are extracted while the cached metadata is still fresh.
+    ``full_page`` downloads the complete page instead of the needed sections.
+    """
     parser = get_parser_for_id(ident)
-    return parser.parse(ident)
+    cached = metadata.get(ident) if metadata is not None else None
+    # archived pages always contain the metadata sections
+    raw, html = parser.fetch_html(ident, with_metadata=cached is None or archive is not None, full_page=full_page)
+    if archive is not None:
+        archive.add(ident, raw)
+    entry = parser.parse_html(ident, html, with_metadata=cached is None)
+    if cached is not None:
+        entry.update(cached)
+    elif metadata is not None:
+        metadata.put(ident, entry)
+    return entry
 
 
+@lru_cache(maxsize=65536)
 def normalize_id(raw_id: str) -> str:
     """Normalize a raw ID using the appropriate parser."""
-    for parser in PARSERS:
-        if parser.matches(raw_id) or parser.matches(raw_id.upper()):
-            return parser.normalize_id(raw_id)
-    return raw_id
+    spec = find_spec(raw_id)
+    if spec is None:
+        return raw_id
+    return spec.load().normalize_id(raw_id)
+
+
+def __getattr__(name: str) -> Any:
+    # PARSERS imports every parser; kept for code that iterates over them
+    if name == "PARSERS":
+        return [spec.load() for spec in _registry()[0]]
+    raise AttributeError(f"module 'bibchecker.parsers' has no attribute '{name}'")
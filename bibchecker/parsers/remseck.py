@@ -1,7 +1,8 @@
 """Parser for Mediathek Remseck."""
 from typing import Dict, Any, List
 
-from bibchecker.base import LibraryParser
+from bibchecker.base import LibraryParser, Section
+from bibchecker.profiling import phase
 
 
 class RemseckParser(LibraryParser):
@@ -10,35 +11,42 @@ class RemseckParser(LibraryParser):
     name = "remseck"
     url_template = "https://mt-remseck.lmscloud.net/cgi-bin/koha/opac-detail.pl?biblionumber={id}"
 
+    # Title heading and holdings table; everything after them is not downloaded
+    required_sections: List[Section] = [
+        ("h1", "class", "title"),
+        ("table", "id", "holdingst"),
+    ]
+    holdings_sections: List[Section] = [
+        ("table", "id", "holdingst"),
+    ]
+
     # Keywords indicating item cannot be borrowed
     UNAVAILABLE_KEYWORDS = [
         "ausgeliehen",
         "checkedout",
     ]
 
-    @classmethod
-    def matches(cls, ident: str) -> bool:
-        """Check if this parser can handle the given ID (numeric only)."""
-        return ident.strip().isdigit()
-
     @classmethod
     def normalize_id(cls, raw_id: str) -> str:
         """Normalize a raw ID from input file to canonical form."""
         return raw_id.strip()
 
     @classmethod
-    def parse(cls, ident: str) -> Dict[str, Any]:
+    def parse_html(cls, ident: str, html: str, with_metadata: bool = True) -> Dict[str, Any]:
         """Parse Remseck library entry."""
         entry = cls.create_entry(ident)
         entry["catalog_id"] = ident.strip()
         entry["catalog_url"] = cls.url_template.format(id=ident.strip())
-        data = cls.fetch_page(ident)
+        data = cls.make_soup(html, ident)
 
         # Parse title
-        cls._parse_title(data, entry)
+        if with_metadata:
+            with phase("parse_metadata", ident):
+                cls._parse_title(data, entry)
 
         # Parse holdings
-        entry["status"] = cls._parse_holdings(data)
+        with phase("parse_holdings", ident):
+            entry["status"] = cls._parse_holdings(data)
 
         return entry
 
@@ -1,7 +1,8 @@
 """Parser for Stadtbibliothek Stuttgart."""
 from typing import Dict, Any, List
 
-from bibchecker.base import LibraryParser, determine_availability
+from bibchecker.base import LibraryParser, Section, determine_availability
+from bibchecker.profiling import phase
 
 
 class StuttgartParser(LibraryParser):
@@ -10,6 +11,15 @@ class StuttgartParser(LibraryParser):
     name = "stuttgart"
     url_template = "https://stadtbibliothek-stuttgart.de/aDISWeb/app?service=direct%2F0%2FHome%2F%24DirectLink&sp=SOPAC&sp={id}"
 
+    # Metadata table and holdings table; scripts and panels after them are not downloaded
+    required_sections: List[Section] = [
+        ("table", "class", "gi"),
+        ("table", "class", "rTable_table"),
+    ]
+    holdings_sections: List[Section] = [
+        ("table", "class", "rTable_table"),
+    ]
+
     # Keywords indicating item cannot be borrowed
     UNAVAILABLE_KEYWORDS = [
         "Ausgeliehen",
@@ -30,12 +40,6 @@ class StuttgartParser(LibraryParser):
         "Reservierung": "reservation",
     }
 
-    @classmethod
-    def matches(cls, ident: str) -> bool:
-        """Check if this parser can handle the given ID."""
-        upper = ident.upper()
-        return upper.startswith("SAK") or upper.startswith("AK")
-
     @classmethod
     def normalize_id(cls, raw_id: str) -> str:
         """Normalize a raw ID from input file to canonical form."""
@@ -47,18 +51,21 @@ class StuttgartParser(LibraryParser):
         return upper
 
     @classmethod
-    def parse(cls, ident: str) -> Dict[str, Any]:
+    def parse_html(cls, ident: str, html: str, with_metadata: bool = True) -> Dict[str, Any]:
         """Parse Stuttgart library entry."""
         entry = cls.create_entry(ident)
         entry["catalog_id"] = ident.strip()
         entry["catalog_url"] = cls.url_template.format(id=ident.strip())
-        data = cls.fetch_page(ident)
+        data = cls.make_soup(html, ident)
 
         # Parse metadata from info table
-        cls._parse_metadata(data, entry)
+        if with_metadata:
+            with phase("parse_metadata", ident):
+                cls._parse_metadata(data, entry)
 
         # Parse availability from holdings table
-        entry["status"] = cls._parse_holdings(data)
+        with phase("parse_holdings", ident):
+            entry["status"] = cls._parse_holdings(data)
 
         return entry
 
@@ -0,0 +1,141 @@
+"""Pipelined refresh: threads download pages, a process pool parses them."""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from bibchecker.archive import ArchiveWriter
+from bibchecker.metadata import MetadataCache
+from bibchecker.parsers import get_parser_for_id
+from bibchecker.profiling import Profiler, active
+
+# Parsed entry plus the phase timings recorded in the parser process
+Parsed = Tuple[Dict[str, Any], List[Dict[str, Any]]]
+
+
+def _parse_page(ident: str, html: str, with_metadata: bool, profile: bool) -> Parsed:
+    """Runs in a parser process and returns a plain entry dict and its timings."""
+    parser = get_parser_for_id(ident)
+    if not profile:
+        return parser.parse_html(ident, html, with_metadata=with_metadata), []
+    profiler = Profiler()
+    profiler.start()
+    try:
+        entry = parser.parse_html(ident, html, with_metadata=with_metadata)
+    finally:
+        profiler.stop()
+    return entry, profiler.records
+
+
+class ParserPool:
+    """Parser processes that are started once and reused by every refresh.
+
+    The processes start with the first page. A pool whose process died is
+    replaced on the next submit.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, ident: str, html: str, with_metadata: bool, profile: bool) -> "Future[Parsed]":
+        """Queue a page for parsing."""
+        with self._lock:
+            for _ in range(2):
+                if self._executor is None:
+                    # spawn: forking a process that already runs download threads can deadlock
+                    context = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                try:
+                    return self._executor.submit(_parse_page, ident, html, with_metadata, profile)
+                except BrokenProcessPool:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            raise BrokenProcessPool("parser processes keep failing")
+
+    def close(self) -> None:
+        """Stop the parser processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def _fetch_page(
+    pool: ParserPool,
+    ident: str,
+    with_metadata: bool,
+    archive: Optional[ArchiveWriter],
+    full_page: bool,
+    profile: bool,
+) -> "Future[Parsed]":
+    """Runs in a download thread and hands the page to the parser processes."""
+    parser = get_parser_for_id(ident)
+    # archived pages always contain the metadata sections
+    raw, html = parser.fetch_html(ident, with_metadata=with_metadata or archive is not None, full_page=full_page)
+    if archive is not None:
+        archive.add(ident, raw)
+    return pool.submit(ident, html, with_metadata, profile)
+
+
+def parse_pipelined(
+    ids: Iterable[str],
+    fetchers: int = 4,
+    workers: Optional[int] = None,
+    archive: Optional[ArchiveWriter] = None,
+    metadata: Optional[MetadataCache] = None,
+    window: Optional[int] = None,
+    full_page: bool = False,
+    parsers: Optional[ParserPool] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of all IDs in input order, like ``parse_id`` for each.
+
+    At most ``window`` IDs (default: four per download thread and parser
+    process) are downloaded or parsed ahead of the consumer, which bounds
+    the number of pages held in memory. Pages are parsed by ``parsers``, or
+    by ``workers`` processes started for this call. IDs whose download or
+    parsing fails are skipped (download errors are ``FetchError``, a ``ValueError``).
+    """
+    pool = parsers or ParserPool(workers)
+    window = window or 4 * (fetchers + pool.workers)
+    pending: Deque[Tuple[str, Optional[Dict[str, Any]], "Future[Future[Parsed]]"]] = deque()
+    remaining = iter(ids)
+    profiler = active()
+    try:
+        with ThreadPoolExecutor(max_workers=fetchers, thread_name_prefix="bibchecker-fetch") as io:
+
+            def fill() -> None:
+                while len(pending) < window:
+                    ident = next(remaining, None)
+                    if ident is None:
+                        return
+                    cached = metadata.get(ident) if metadata is not None else None
+                    fetched = io.submit(
+                        _fetch_page, pool, ident, cached is None, archive, full_page, profiler is not None
+                    )
+                    pending.append((ident, cached, fetched))
+
+            fill()
+            while pending:
+                ident, cached, fetched = pending.popleft()
+                try:
+                    entry, timings = fetched.result().result()
+                except (ValueError, BrokenProcessPool) as exc:
+                    print(f"Skipping {ident}: {exc}")
+                    fill()
+                    continue
+                if profiler is not None:
+                    profiler.records.extend(timings)
+                if cached is not None:
+                    entry.update(cached)
+                elif metadata is not None:
+                    metadata.put(ident, entry)
+                fill()
+                yield entry
+    finally:
+        if parsers is None:
+            pool.close()
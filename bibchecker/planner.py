@@ -0,0 +1,166 @@
+"""Pick the few libraries that cover the most available items."""
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set
+
+from bibchecker.matrix import AvailabilityMatrix, iter_bits, popcount
+
+# Work budget of the exact search: visited combinations times 64-bit words per
+# item mask. Searches that need more fall back to greedy.
+EXACT_LIMIT = 20_000_000
+
+
+@dataclass
+class PlanStop:
+    """One library of a trip with the items picked up there."""
+
+    bib: str
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class TripPlan:
+    """Libraries to visit and how many of the wanted items they cover."""
+
+    stops: List[PlanStop]
+    covered: int
+    available: int
+    exact: bool
+
+
+def plan_trip(
+    matrix: AvailabilityMatrix,
+    max_branches: int,
+    preferred: Optional[List[str]] = None,
+    candidates: Optional[List[str]] = None,
+) -> TripPlan:
+    """Choose up to ``max_branches`` libraries covering the most borrowable items.
+
+    Runs a branch-and-bound search over all combinations when that stays
+    within ``EXACT_LIMIT`` and a greedy set cover otherwise. Ties prefer fewer
+    stops, then more libraries from ``preferred``.
+    """
+    preferred_set = set(preferred or [])
+    wanted = set(candidates or [])
+    sets = {
+        bib: bits
+        for bib, bits in matrix.borrowable.items()
+        if bib and bits and (not wanted or bib in wanted)
+    }
+    available = 0
+    for bits in sets.values():
+        available |= bits
+    # Strongest libraries first so that ties keep the most useful order
+    libraries = sorted(sets, key=lambda bib: (-popcount(sets[bib]), bib not in preferred_set, bib))
+    size = max(0, min(max_branches, len(libraries)))
+
+    words = available.bit_length() // 64 + 1
+    try:
+        chosen = _exact(libraries, sets, size, preferred_set, EXACT_LIMIT // words)
+        exact = True
+    except _OutOfBudget:
+        chosen = _greedy(libraries, sets, size, preferred_set)
+        exact = False
+    return _build_plan(matrix, chosen, sets, available, exact)
+
+
+class _OutOfBudget(Exception):
+    """The exact search visited more combinations than allowed."""
+
+
+def _exact(libraries: List[str], sets: Dict[str, int], size: int, preferred: Set[str], budget: int) -> List[str]:
+    """Depth-first search over all combinations, skipping branches that cannot beat the best one.
+
+    ``libraries`` must be sorted by descending item count: then the first
+    libraries after a position give the upper bound for every branch from
+    there on. Raises :class:`_OutOfBudget` after ``budget`` combinations.
+    """
+    # prefix[i]: items of the i strongest libraries counted separately
+    prefix = [0]
+    for bib in libraries:
+        prefix.append(prefix[-1] + popcount(sets[bib]))
+    # suffix[i]: all items reachable from library i on
+    suffix = [0] * (len(libraries) + 1)
+    for idx in range(len(libraries) - 1, -1, -1):
+        suffix[idx] = suffix[idx + 1] | sets[libraries[idx]]
+
+    best: List[str] = []
+    best_score = (0, 0, 0)
+    chosen: List[str] = []
+    visited = 0
+
+    def search(start: int, covered: int, picked: int) -> None:
+        nonlocal best, best_score, visited
+        left = size - len(chosen)
+        for idx in range(start, len(libraries)):
+            # both bounds only shrink for later libraries, so the loop can stop
+            bound = min(
+                popcount(covered | suffix[idx]),
+                popcount(covered) + prefix[min(idx + left, len(libraries))] - prefix[idx],
+            )
+            if bound < best_score[0]:
+                return
+            stops = -best_score[1]
+            # an equal cover only wins with fewer stops, or with more preferred libraries
+            if bound == best_score[0] and (stops <= len(chosen) or (stops == len(chosen) + 1 and not preferred)):
+                return
+            visited += 1
+            if visited > budget:
+                raise _OutOfBudget()
+            bib = libraries[idx]
+            chosen.append(bib)
+            now = covered | sets[bib]
+            now_picked = picked + (bib in preferred)
+            score = (popcount(now), -len(chosen), now_picked)
+            if score > best_score:
+                best, best_score = list(chosen), score
+            if left > 1:
+                search(idx + 1, now, now_picked)
+            chosen.pop()
+
+    search(0, 0, 0)
+    return best
+
+
+def _greedy(libraries: List[str], sets: Dict[str, int], size: int, preferred: Set[str]) -> List[str]:
+    chosen: List[str] = []
+    covered = 0
+    for _ in range(size):
+        best: Optional[str] = None
+        best_key = (0, False)
+        for bib in libraries:
+            if bib in chosen:
+                continue
+            key = (popcount(sets[bib] & ~covered), bib in preferred)
+            # a library that adds nothing is never worth a stop, preferred or not
+            if key[0] > 0 and key > best_key:
+                best, best_key = bib, key
+        if best is None:
+            break
+        chosen.append(best)
+        covered |= sets[best]
+    return chosen
+
+
+def _build_plan(
+    matrix: AvailabilityMatrix,
+    chosen: List[str],
+    sets: Dict[str, int],
+    available: int,
+    exact: bool,
+) -> TripPlan:
+    """Assign every covered item to the first stop that has it, largest stop first."""
+    remaining = list(chosen)
+    covered = 0
+    stops: List[PlanStop] = []
+    while remaining:
+        bib = max(remaining, key=lambda b: popcount(sets[b] & ~covered))
+        remaining.remove(bib)
+        stop = PlanStop(bib=bib)
+        for idx in iter_bits(sets[bib] & ~covered):
+            entry = matrix.entries[idx]
+            copied = dict(entry)
+            copied["status"] = [av for av in entry["status"] if av.get("bib") == bib and av.get("can_be_borrowed")]
+            stop.entries.append(copied)
+        covered |= sets[bib]
+        stops.append(stop)
+    return TripPlan(stops=stops, covered=popcount(covered), available=popcount(available), exact=exact)
@@ -0,0 +1,187 @@
+"""Multiple input profiles sharing a single fetch."""
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional, Tuple, Union
+
+from bibchecker.archive import ArchiveWriter
+from bibchecker.database import save_database, load_database
+from bibchecker.generations import Generation
+from bibchecker.history import HistoryStore
+from bibchecker.input import load_ids
+from bibchecker.metadata import MetadataCache
+from bibchecker.parsers import parse_id
+from bibchecker.pipeline import ParserPool, parse_pipelined
+from bibchecker.reports import write_client_reports, write_reports
+
+
+@dataclass
+class Profile:
+    """One input file with its own preferred libraries and output directory."""
+
+    name: str
+    input_file: Path
+    output_dir: Path
+    cache_file: Path
+    my_bibs: List[str]
+    plan_size: int = 3
+    # "server" renders every page, "client" writes data.json plus a browser viewer
+    report_mode: str = "server"
+    compress: bool = False
+    # complete report generations kept, including the current one
+    keep_generations: int = 3
+
+
+@dataclass
+class ProfileRefresh:
+    """Outcome of refreshing a single profile."""
+
+    profile: Profile
+    ids: List[str]
+    entries: List[Dict[str, Any]]
+    rendered_files: List[Dict[str, str]]
+
+
+def split_bibs(raw: Union[str, List[str]]) -> List[str]:
+    """Split a comma-separated library list (lists are passed through)."""
+    parts = raw if isinstance(raw, list) else raw.split(",")
+    return [part.strip() for part in parts if part.strip()]
+
+
+def load_profiles(filename: str) -> List[Profile]:
+    """Load profiles from a JSON file.
+
+    The file contains a list of objects with ``name``, ``input_file``,
+    ``output_dir`` and optionally ``cache_file``, ``my_bibs``,
+    ``plan_size``, ``report_mode``, ``compress`` and ``keep_generations``. Relative
+    paths are resolved against the directory of the profile file.
+    """
+    base = Path(filename).resolve().parent
+    with open(filename, "r", encoding="utf-8") as fd:
+        data: List[Dict[str, Any]] = json.load(fd)
+
+    profiles: List[Profile] = []
+    for item in data:
+        output_dir = (base / item["output_dir"]).resolve()
+        profiles.append(
+            Profile(
+                name=item["name"],
+                input_file=(base / item["input_file"]).resolve(),
+                output_dir=output_dir,
+                cache_file=(base / item["cache_file"]).resolve() if item.get("cache_file") else output_dir / "cache.json",
+                my_bibs=split_bibs(item.get("my_bibs", [])),
+                plan_size=int(item.get("plan_size", 3)),
+                report_mode=item.get("report_mode", "server"),
+                compress=bool(item.get("compress", False)),
+                keep_generations=int(item.get("keep_generations", 3)),
+            )
+        )
+    return profiles
+
+
+def union_ids(id_lists: Iterable[List[str]]) -> List[str]:
+    """Merge ID lists, keeping the first-seen order and dropping duplicates."""
+    seen: Dict[str, None] = {}
+    for ids in id_lists:
+        for ident in ids:
+            seen.setdefault(ident, None)
+    return list(seen)
+
+
+def fetch_shared(
+    ids: Iterable[str],
+    archive: Optional[ArchiveWriter] = None,
+    metadata: Optional[MetadataCache] = None,
+    pipeline: Tuple[int, Optional[int]] = (0, None),
+    full_page: bool = False,
+    parsers: Optional[ParserPool] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch every ID exactly once and return the entries keyed by ID.
+
+    ``pipeline`` is (download threads, parser processes); with threads the
+    pages are parsed in parallel by :func:`parse_pipelined`, using the
+    long-lived ``parsers`` when given.
+    """
+    fetchers, workers = pipeline
+    if fetchers:
+        unique = list(dict.fromkeys(ids))
+        parsed = parse_pipelined(unique, fetchers, workers, archive, metadata, full_page=full_page, parsers=parsers)
+        return {entry["id"]: entry for entry in parsed}
+    shared: Dict[str, Dict[str, Any]] = {}
+    for ident in ids:
+        if ident in shared:
+            continue
+        try:
+            shared[ident] = parse_id(ident, archive, metadata, full_page)
+        except ValueError as exc:
+            # Skip invalid IDs but keep running to produce useful output
+            print(f"Skipping {ident}: {exc}")
+    return shared
+
+
+def load_previous(profiles: List[Profile]) -> Dict[str, Dict[str, Any]]:
+    """Load the entries of the last refresh from all profile caches, keyed by ID."""
+    previous: Dict[str, Dict[str, Any]] = {}
+    for profile in profiles:
+        if profile.cache_file.exists():
+            for entry in load_database(str(profile.cache_file)):
+                previous.setdefault(entry["id"], entry)
+    return previous
+
+
+def load_profile_ids(profiles: List[Profile]) -> Dict[str, List[str]]:
+    """Read the normalized IDs of every profile's input file."""
+    return {profile.name: list(load_ids(str(profile.input_file))) for profile in profiles}
+
+
+def refresh_profiles(
+    profiles: List[Profile],
+    timestamp: datetime,
+    history: Optional[HistoryStore] = None,
+    archive_file: Optional[Path] = None,
+    metadata: Optional[MetadataCache] = None,
+    pipeline: Tuple[int, Optional[int]] = (0, None),
+    full_page: bool = False,
+    parsers: Optional[ParserPool] = None,
+) -> List[ProfileRefresh]:
+    """Fetch the union of all profile IDs once, then save and render every profile."""
+    ids_by_profile = load_profile_ids(profiles)
+    previous = load_previous(profiles) if history else {}
+    ids = union_ids(ids_by_profile.values())
+    if archive_file:
+        with ArchiveWriter(str(archive_file)) as archive:
+            shared = fetch_shared(ids, archive, metadata, pipeline, full_page, parsers)
+    else:
+        shared = fetch_shared(ids, None, metadata, pipeline, full_page, parsers)
+    if metadata:
+        metadata.save()
+    if history:
+        history.record(previous.values(), shared.values(), timestamp)
+    return render_profiles(profiles, ids_by_profile, shared, timestamp)
+
+
+def render_profiles(
+    profiles: List[Profile],
+    ids_by_profile: Dict[str, List[str]],
+    shared: Dict[str, Dict[str, Any]],
+    timestamp: datetime,
+) -> List[ProfileRefresh]:
+    """Save and render every profile from the shared entries."""
+    results: List[ProfileRefresh] = []
+    for profile in profiles:
+        ids = ids_by_profile[profile.name]
+        entries = [shared[ident] for ident in ids if ident in shared]
+        profile.output_dir.mkdir(parents=True, exist_ok=True)
+        profile.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        save_database(str(profile.cache_file), entries)
+        # Readers keep seeing the previous generation until this one is complete
+        with Generation(profile.output_dir, profile.keep_generations) as generation:
+            if profile.report_mode == "client":
+                rendered = write_client_reports(
+                    entries, ids, profile.my_bibs, generation.path, timestamp, profile.compress
+                )
+            else:
+                rendered = write_reports(entries, ids, profile.my_bibs, generation.path, timestamp, profile.plan_size)
+        results.append(ProfileRefresh(profile=profile, ids=ids, entries=entries, rendered_files=rendered))
+    return results
@@ -0,0 +1,136 @@
+"""Optional timing of refresh phases per ID."""
+import cProfile
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_active: Optional["Profiler"] = None
+
+
+class Profiler:
+    """Collects wall and CPU time per phase and ID, optionally with a cProfile dump.
+
+    CPU time is that of the thread running the phase, so phases in download
+    threads do not count the work of the other threads. Time spent in a
+    nested phase only counts for the nested one.
+    """
+
+    def __init__(self, dump_file: Optional[str] = None) -> None:
+        self.records: List[Dict[str, Any]] = []
+        self.dump_file = dump_file
+        self._cprofile = cProfile.Profile() if dump_file else None
+        # per thread: [wall, cpu] spent in the nested phases of every open phase
+        self._local = threading.local()
+
+    def start(self) -> None:
+        """Make this the active profiler."""
+        global _active
+        _active = self
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        """Deactivate the profiler and write the pstats dump if requested."""
+        global _active
+        if _active is self:
+            _active = None
+        if self._cprofile and self.dump_file:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.dump_file)
+
+    @contextmanager
+    def phase(self, name: Optional[str], ident: Optional[str] = None) -> Iterator[None]:
+        """Time the enclosed block; without ``name`` its time is only taken from the enclosing phase."""
+        stack: List[List[float]] = self._local.__dict__.setdefault("stack", [])
+        nested = [0.0, 0.0]
+        stack.append(nested)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            stack.pop()
+            if stack:
+                stack[-1][0] += wall
+                stack[-1][1] += cpu
+            if name is not None:
+                self.records.append({"phase": name, "id": ident, "wall": wall - nested[0], "cpu": cpu - nested[1]})
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate the records by phase and by ID."""
+        phases: Dict[str, Dict[str, Any]] = {}
+        ids: Dict[str, Dict[str, Any]] = {}
+        for rec in self.records:
+            phase = phases.setdefault(rec["phase"], {"wall": 0.0, "cpu": 0.0, "count": 0})
+            phase["wall"] += rec["wall"]
+            phase["cpu"] += rec["cpu"]
+            phase["count"] += 1
+            if rec["id"] is None:
+                continue
+            item = ids.setdefault(rec["id"], {"wall": 0.0, "cpu": 0.0, "phases": {}})
+            item["wall"] += rec["wall"]
+            item["cpu"] += rec["cpu"]
+            item["phases"][rec["phase"]] = item["phases"].get(rec["phase"], 0.0) + rec["wall"]
+        return {"phases": phases, "ids": ids}
+
+    def append_log(self, log_file: Path, timestamp: datetime) -> Dict[str, Any]:
+        """Append the summary as one JSON line to ``log_file`` and return it."""
+        summary = self.summary()
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with log_file.open("a", encoding="utf-8") as fd:
+            fd.write(json.dumps({"refreshed_at": timestamp.isoformat(), **summary}, ensure_ascii=False) + "\n")
+        return summary
+
+    def report(self, top: int = 10) -> str:
+        """Return a table of the slowest phases and IDs."""
+        summary = self.summary()
+        lines = ["Slowest phases (wall / cpu / count):"]
+        for name, data in sorted(summary["phases"].items(), key=lambda item: -item[1]["wall"])[:top]:
+            lines.append(f"  {name:<16} {data['wall']:9.3f}s {data['cpu']:9.3f}s {data['count']:6d}")
+        lines.append(f"Slowest IDs (top {top}):")
+        for ident, data in sorted(summary["ids"].items(), key=lambda item: -item[1]["wall"])[:top]:
+            detail = " ".join(f"{name}={wall:.3f}" for name, wall in data["phases"].items())
+            lines.append(f"  {ident:<16} {data['wall']:9.3f}s {data['cpu']:9.3f}s  {detail}")
+        return "\n".join(lines)
+
+
+def active() -> Optional[Profiler]:
+    """Return the running profiler, if any."""
+    return _active
+
+
+@contextmanager
+def phase(name: str, ident: Optional[str] = None) -> Iterator[None]:
+    """Time the enclosed block with the active profiler; does nothing without one."""
+    if _active is None:
+        yield
+        return
+    with _active.phase(name, ident):
+        yield
+
+
+def excluded(items: Iterable[T]) -> Iterator[T]:
+    """Yield from ``items`` without counting the time spent producing them to the running phase."""
+    iterator = iter(items)
+    while True:
+        profiler = _active
+        if profiler is None:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        else:
+            with profiler.phase(None):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+        yield item
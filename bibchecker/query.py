@@ -0,0 +1,249 @@
+"""``--where`` expressions: parsed once into a predicate over entries and their holdings.
+
+Grammar::
+
+    expr       := term ("or" term)*
+    term       := factor ("and" factor)*
+    factor     := "not" factor | "(" expr ")" | comparison
+    comparison := FIELD [OP VALUE]
+    OP         := "=" | "!=" | "~" | "^=" | "<" | ">" | "<=" | ">="
+
+Text comparisons ignore case; ``~`` means "contains", ``^=`` "starts with"
+and both only apply to text fields. A field without operator tests its
+truth value, e.g. ``available``.
+"""
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Predicate = Callable[[Dict[str, Any], Dict[str, Any]], bool]
+Getter = Callable[[Dict[str, Any], Dict[str, Any]], Any]
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>!=|\^=|<=|>=|=|~|<|>)
+      | (?P<paren>[()])
+      | (?P<word>[^\s()=!~<>^"']+)
+    )""",
+    re.VERBOSE,
+)
+_DATE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})|(\d{4})-(\d{2})-(\d{2})")
+KEYWORDS = ("and", "or", "not")
+# Fields that hold text, the only ones ``~`` and ``^=`` accept
+TEXT_FIELDS = ("id", "library", "title", "bib", "standort", "sig", "status")
+
+
+class QueryError(ValueError):
+    """Raised for syntax errors and unknown fields in an expression."""
+
+
+def due_date(holding: Dict[str, Any]) -> Optional[date]:
+    """Due date mentioned in a holding's availability text, if any."""
+    match = _DATE.search(holding.get("available") or "")
+    if not match:
+        return None
+    try:
+        if match.group(1):
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        return date(int(match.group(4)), int(match.group(5)), int(match.group(6)))
+    except ValueError:
+        return None
+
+
+def _fields(today: date) -> Dict[str, Getter]:
+    def due(entry: Dict[str, Any], holding: Dict[str, Any]) -> Optional[int]:
+        when = due_date(holding)
+        return (when - today).days if when else None
+
+    return {
+        "id": lambda e, h: e.get("id"),
+        "library": lambda e, h: e.get("library"),
+        "title": lambda e, h: e.get("Titel"),
+        "bib": lambda e, h: h.get("bib"),
+        "standort": lambda e, h: h.get("standort"),
+        "sig": lambda e, h: h.get("sig"),
+        "status": lambda e, h: h.get("available"),
+        "available": lambda e, h: bool(h.get("can_be_borrowed")),
+        "due": due,
+    }
+
+
+def tokenize(text: str) -> List[Tuple[str, str, int]]:
+    """Split an expression into (kind, value, position) tokens."""
+    tokens: List[Tuple[str, str, int]] = []
+    pos = 0
+    while pos < len(text):
+        if text[pos:].strip() == "":
+            break
+        match = _TOKEN.match(text, pos)
+        if not match or match.lastgroup is None:
+            raise QueryError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        start = match.start(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "word" and value.lower() in KEYWORDS:
+            kind = value.lower()
+        tokens.append((kind, value, start))
+        pos = match.end()
+    return tokens
+
+
+def _fold(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _compare(getter: Getter, op: str, raw: str) -> Predicate:
+    """Build the closure for ``FIELD OP VALUE``; the value is converted once here."""
+    if raw.lower() in ("true", "false"):
+        flag = raw.lower() == "true"
+        if op == "=":
+            return lambda e, h: bool(getter(e, h)) is flag
+        if op == "!=":
+            return lambda e, h: bool(getter(e, h)) is not flag
+    number = _number(raw)
+    text = raw.casefold()
+    if op in ("<", ">", "<=", ">="):
+        if number is None:
+            raise QueryError(f"{op} needs a number, got {raw!r}")
+        limit = number
+        compare: Callable[[float], bool] = {
+            "<": lambda v: v < limit,
+            ">": lambda v: v > limit,
+            "<=": lambda v: v <= limit,
+            ">=": lambda v: v >= limit,
+        }[op]
+
+        def ordered(e: Dict[str, Any], h: Dict[str, Any]) -> bool:
+            value = getter(e, h)
+            return isinstance(value, (int, float)) and compare(value)
+
+        return ordered
+    if op == "~":
+        return lambda e, h: text in str(_fold(getter(e, h)) or "")
+    if op == "^=":
+        return lambda e, h: str(_fold(getter(e, h)) or "").startswith(text)
+
+    def equal(e: Dict[str, Any], h: Dict[str, Any]) -> bool:
+        value = getter(e, h)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value == number
+        return _fold(value) == text
+
+    if op == "!=":
+        return lambda e, h: not equal(e, h)
+    return equal
+
+
+class _Parser:
+    """Recursive-descent parser producing closures."""
+
+    def __init__(self, text: str, fields: Dict[str, Getter]) -> None:
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.fields = fields
+
+    def peek(self) -> Optional[Tuple[str, str, int]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def at(self, kind: str) -> bool:
+        token = self.peek()
+        return token is not None and token[0] == kind
+
+    def take(self, kind: str) -> Tuple[str, str, int]:
+        token = self.peek()
+        if token is None or token[0] != kind:
+            where = f"at {token[2]}" if token else "at end"
+            raise QueryError(f"Expected {kind} {where}")
+        self.pos += 1
+        return token
+
+    def parse(self) -> Predicate:
+        predicate = self.expr()
+        token = self.peek()
+        if token is not None:
+            raise QueryError(f"Unexpected {token[1]!r} at {token[2]}")
+        return predicate
+
+    def expr(self) -> Predicate:
+        parts = [self.term()]
+        while self.at("or"):
+            self.pos += 1
+            parts.append(self.term())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda e, h: any(part(e, h) for part in parts)
+
+    def term(self) -> Predicate:
+        parts = [self.factor()]
+        while self.at("and"):
+            self.pos += 1
+            parts.append(self.factor())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda e, h: all(part(e, h) for part in parts)
+
+    def factor(self) -> Predicate:
+        token = self.peek()
+        if token is None:
+            raise QueryError("Unexpected end of expression")
+        if token[0] == "not":
+            self.pos += 1
+            inner = self.factor()
+            return lambda e, h: not inner(e, h)
+        if token[0] == "paren" and token[1] == "(":
+            self.pos += 1
+            inner = self.expr()
+            closing = self.peek()
+            if closing is None or closing[1] != ")":
+                raise QueryError(f"Expected ) {f'at {closing[2]}' if closing else 'at end'}")
+            self.pos += 1
+            return inner
+        return self.comparison()
+
+    def comparison(self) -> Predicate:
+        name = self.take("word")
+        getter = self.fields.get(name[1].lower())
+        if getter is None:
+            raise QueryError(f"Unknown field {name[1]!r} at {name[2]}, expected one of: {', '.join(self.fields)}")
+        token = self.peek()
+        if token is None or token[0] != "op":
+            field = getter
+            return lambda e, h: bool(field(e, h))
+        if token[1] in ("~", "^=") and name[1].lower() not in TEXT_FIELDS:
+            raise QueryError(f"{token[1]} needs a text field, {name[1]!r} at {name[2]} is not one")
+        self.pos += 1
+        value = self.peek()
+        if value is None or value[0] not in ("word", "string"):
+            raise QueryError(f"Expected a value after {token[1]!r} at {token[2]}")
+        self.pos += 1
+        return _compare(getter, token[1], value[1])
+
+
+def compile_query(text: str, today: Optional[date] = None) -> Predicate:
+    """Compile an expression into a ``predicate(entry, holding)``."""
+    return _Parser(text, _fields(today or datetime.now().date())).parse()
+
+
+def select(entries: Iterable[Dict[str, Any]], predicate: Predicate) -> Iterator[Dict[str, Any]]:
+    """Yield the entries with at least one matching holding, reduced to those holdings.
+
+    Entries without holdings are tested once with an empty holding.
+    """
+    for entry in entries:
+        if not entry["status"]:
+            if predicate(entry, {}):
+                yield entry
+            continue
+        holdings = [holding for holding in entry["status"] if predicate(entry, holding)]
+        if holdings:
+            yield {**entry, "status": holdings}
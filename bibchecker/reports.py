@@ -0,0 +1,275 @@
+"""HTML report generation shared by the web app and the CLI."""
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from bibchecker.matrix import AvailabilityMatrix
+from bibchecker.planner import plan_trip
+from bibchecker.profiling import phase
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    autoescape=select_autoescape(["html"]),
+)
+
+
+def render(template: str, **context: Any) -> str:
+    """Render one of the bundled templates."""
+    with phase("render"):
+        return _env.get_template(template).render(**context)
+
+
+def stream(template: str, **context: Any) -> Iterator[str]:
+    """Render one of the bundled templates chunk by chunk."""
+    return _env.get_template(template).generate(**context)
+
+
+def build_payload(
+    entries: Iterable[Dict[str, Any]],
+    ids_count: int,
+    my_bibs: List[str],
+    timestamp: datetime,
+) -> Dict[str, Any]:
+    """Compact, dictionary-encoded form of the entries for the client-side viewer.
+
+    Items are ``[id, title, catalog_url, holdings]`` and holdings are
+    ``[bib index, standort index, sig, available, borrowable]``.
+    """
+    bibs: Dict[str, int] = {}
+    locs: Dict[str, int] = {}
+    items: List[List[Any]] = []
+    for entry in entries:
+        holdings = [
+            [
+                bibs.setdefault(status.get("bib", "Unbekannt"), len(bibs)),
+                locs.setdefault(status.get("standort") or "", len(locs)),
+                status.get("sig", ""),
+                status.get("available", "?"),
+                1 if status.get("can_be_borrowed") else 0,
+            ]
+            for status in entry.get("status", [])
+        ]
+        items.append([entry["id"], entry.get("Titel"), entry.get("catalog_url"), holdings])
+    return {
+        "v": 1,
+        "ts": timestamp.strftime("%d.%m.%Y %H:%M"),
+        "ids": ids_count,
+        "bibs": list(bibs),
+        "locs": list(locs),
+        "my": [bibs[bib] for bib in my_bibs if bib in bibs],
+        "items": items,
+    }
+
+
+def write_payload(payload: Dict[str, Any], output_dir: Path, compress: bool = False) -> List[Path]:
+    """Write the payload as ``data.json`` and optionally ``data.json.gz``."""
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    target = output_dir / "data.json"
+    target.write_bytes(raw)
+    written = [target]
+    if compress:
+        gz_target = output_dir / "data.json.gz"
+        gz_target.write_bytes(gzip.compress(raw, mtime=0))
+        written.append(gz_target)
+    return written
+
+
+def write_client_reports(
+    entries: List[Dict[str, Any]],
+    ids: List[str],
+    my_bibs: List[str],
+    output_dir: Path,
+    timestamp: datetime,
+    compress: bool = False,
+) -> List[Dict[str, str]]:
+    """Write the data file and the static viewer that renders all views in the browser."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_payload(build_payload(entries, len(ids), my_bibs, timestamp), output_dir, compress)
+    viewer = render("report_viewer.html", title="Bibliothek Übersicht", timestamp=timestamp, info_line=None)
+    (output_dir / "index.html").write_text(viewer, encoding="utf-8")
+    return [
+        {
+            "name": "index.html",
+            "description": "Alle Ansichten (im Browser)",
+            "scope": "Alle Exemplare",
+            "priority": "multi",
+        },
+        {
+            "name": "data.json",
+            "description": "Daten",
+            "scope": "Alle Exemplare",
+            "priority": "multi",
+        },
+    ]
+
+
+def write_reports(
+    entries: List[Dict[str, Any]],
+    ids: List[str],
+    my_bibs: List[str],
+    output_dir: Path,
+    timestamp: datetime,
+    plan_size: int = 3,
+) -> List[Dict[str, str]]:
+    """Write all report pages for the given entries and return the generated file list."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rendered_files: List[Dict[str, str]] = []
+    matrix = AvailabilityMatrix(entries)
+    all_bibs = matrix.libraries
+    available_counts = matrix.counts()
+    my_bibs_set = set(my_bibs)
+
+    # Order: all-items pages first, then mybibs, then per-bib (my_bibs first), then rest
+    per_bib_ordered = [b for b in all_bibs if b in my_bibs_set] + [b for b in all_bibs if b not in my_bibs_set]
+
+    # Per-library pages (only available items)
+    for bib in per_bib_ordered:
+        filtered = matrix.filter(only_available=True, bibfilter=[bib])
+        html = render(
+            "report_item.html",
+            title=f"{bib} (nur verfügbar)",
+            subtitle="Gefiltert nach Bibliothek",
+            entries=filtered,
+            timestamp=timestamp,
+            info_line="Nur verfügbare Exemplare",
+        )
+        target = output_dir / f"{bib}.html"
+        target.write_text(html, encoding="utf-8")
+        rendered_files.append(
+            {
+                "name": target.name,
+                "description": f"{bib}",
+                "scope": "Nur verfügbare Exemplare",
+                "priority": "bib-mine" if bib in my_bibs_set else "bib-other",
+            }
+        )
+
+    # My bibs summary (only available)
+    my_filtered = matrix.filter(only_available=True, bibfilter=my_bibs)
+    my_grouped = group_by_bib(my_filtered)
+    my_html = render(
+        "report_bib.html",
+        title="Meine Bibliotheken",
+        subtitle=", ".join(my_bibs) if my_bibs else "Keine Bibliotheken definiert",
+        grouped=my_grouped,
+        timestamp=timestamp,
+        info_line="Nur verfügbare Exemplare",
+    )
+    my_target = output_dir / "mybibs.html"
+    my_target.write_text(my_html, encoding="utf-8")
+    rendered_files.append(
+        {
+            "name": my_target.name,
+            "description": "Meine Bibliotheken",
+            "scope": "Nur verfügbare Exemplare",
+            "priority": "mybibs",
+        }
+    )
+
+    # All items by title
+    all_items = matrix.filter(all_data=True, only_available=False)
+    all_items = sorted(all_items, key=lambda e: e.get("Titel", ""))
+    all_items_html = render(
+        "report_item.html",
+        title="Alle Medien (nach Titel)",
+        subtitle=f"{len(ids)} IDs",  # count of IDs even if parsing failed
+        entries=all_items,
+        timestamp=timestamp,
+        info_line="Alle Exemplare",
+    )
+    all_items_target = output_dir / "all_items.html"
+    all_items_target.write_text(all_items_html, encoding="utf-8")
+    rendered_files.append(
+        {
+            "name": all_items_target.name,
+            "description": "Alle Medien nach Titel",
+            "scope": "Alle Exemplare",
+            "priority": "multi",
+        }
+    )
+
+    # All items grouped by library
+    all_grouped = group_by_bib(matrix.filter(all_data=True, only_available=False))
+    all_bib_html = render(
+        "report_bib.html",
+        title="Alle Medien (nach Bibliothek)",
+        subtitle=f"{len(ids)} IDs",
+        grouped=all_grouped,
+        timestamp=timestamp,
+        info_line="Alle Exemplare",
+    )
+    all_bib_target = output_dir / "all_bib.html"
+    all_bib_target.write_text(all_bib_html, encoding="utf-8")
+    rendered_files.append(
+        {
+            "name": all_bib_target.name,
+            "description": "Alle Medien nach Bibliothek",
+            "scope": "Alle Exemplare",
+            "priority": "multi",
+        }
+    )
+
+    # Trip plan: fewest libraries covering most available items
+    if plan_size > 0:
+        with phase("plan"):
+            plan = plan_trip(matrix, plan_size, preferred=my_bibs)
+        plan_html = render(
+            "report_plan.html",
+            title=f"Ausflugsplan (bis zu {plan_size} Bibliotheken)",
+            subtitle=", ".join(stop.bib for stop in plan.stops),
+            plan=plan,
+            timestamp=timestamp,
+            info_line="Nur verfügbare Exemplare",
+        )
+        plan_target = output_dir / "plan.html"
+        plan_target.write_text(plan_html, encoding="utf-8")
+        rendered_files.append(
+            {
+                "name": plan_target.name,
+                "description": "Ausflugsplan",
+                "scope": "Nur verfügbare Exemplare",
+                "priority": "mybibs",
+            }
+        )
+
+    # Sort according to priorities
+    def _priority_key(item: Dict[str, str]) -> Tuple[int, str]:
+        order = {
+            "multi": 0,
+            "mybibs": 1,
+            "bib-mine": 2,
+            "bib-other": 3,
+        }
+        return (order.get(item.get("priority", "bib-other"), 9), item.get("name", ""))
+
+    rendered_files.sort(key=_priority_key)
+
+    # Index page
+    index_html = render(
+        "report_index.html",
+        title="Bibliothek Übersicht",
+        timestamp=timestamp,
+        generated=rendered_files,
+        per_bib=per_bib_ordered,
+        counts=available_counts,
+        ranking=matrix.rank(bibs=my_bibs),
+    )
+    (output_dir / "index.html").write_text(index_html, encoding="utf-8")
+
+    return rendered_files
+
+
+def group_by_bib(entries: Iterable[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Group holdings by library name."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        for status in entry.get("status", []):
+            bib = status.get("bib", "Unbekannt")
+            grouped.setdefault(bib, []).append({"entry": entry, "status": status})
+    return sorted(grouped.items(), key=lambda item: item[0])
@@ -0,0 +1,107 @@
+"""In-memory full-text index over entry titles, metadata and signatures."""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Tuple
+
+from bibchecker.metadata import ENTRY_KEYS
+
+# Score of a token per occurrence in a field; other metadata fields count 1.0
+FIELD_WEIGHTS = {"id": 5.0, "Titel": 4.0, "TitelExtra": 2.0, "sig": 2.0}
+_WORD = re.compile(r"\w+")
+# German umlaut transcriptions, folded like the umlauts themselves
+_TRANSCRIBED = re.compile(r"([aou])e")
+
+
+def fold(text: str) -> str:
+    """Case- and diacritic-fold text, e.g. "Größe" -> "grosse", "Müller" and "Mueller" -> "muller"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return _TRANSCRIBED.sub(r"\1", folded)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split folded text into word tokens."""
+    return _WORD.findall(fold(text))
+
+
+def _fields(entry: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    yield "id", entry["id"]
+    for key, value in entry.items():
+        if key not in ENTRY_KEYS and isinstance(value, str):
+            yield key, value
+    for status in entry["status"]:
+        if status.get("sig"):
+            yield "sig", status["sig"]
+
+
+class SearchIndex:
+    """Inverted index mapping folded tokens to weighted entry IDs."""
+
+    def __init__(self, entries: Iterable[Dict[str, Any]]) -> None:
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for entry in entries:
+            self.entries[entry["id"]] = entry
+            for field, value in _fields(entry):
+                weight = FIELD_WEIGHTS.get(field, 1.0)
+                for token in tokenize(value):
+                    scores = postings[token]
+                    scores[entry["id"]] = scores.get(entry["id"], 0.0) + weight
+        self.postings = dict(postings)
+        self.tokens = sorted(self.postings)
+
+    def _matches(self, token: str, prefix: bool) -> Dict[str, float]:
+        if not prefix:
+            return self.postings.get(token, {})
+        matches: Dict[str, float] = {}
+        idx = bisect_left(self.tokens, token)
+        while idx < len(self.tokens) and self.tokens[idx].startswith(token):
+            # Completions of a prefix score less than the word itself
+            factor = 1.0 if self.tokens[idx] == token else 0.5
+            for ident, score in self.postings[self.tokens[idx]].items():
+                matches[ident] = max(matches.get(ident, 0.0), score * factor)
+            idx += 1
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return the entries containing all query words, best first.
+
+        The last word also matches as a prefix, so results appear while typing.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores: Dict[str, float] = {}
+        for pos, token in enumerate(tokens):
+            matches = self._matches(token, prefix=pos == len(tokens) - 1)
+            if pos == 0:
+                scores = dict(matches)
+            else:
+                scores = {ident: score + matches[ident] for ident, score in scores.items() if ident in matches}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, self.entries[ident]) for ident, score in ranked]
+
+
+def search_result(score: float, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-friendly result with the current availability per branch."""
+    return {
+        "id": entry["id"],
+        "title": entry.get("Titel"),
+        "title_extra": entry.get("TitelExtra"),
+        "catalog_url": entry.get("catalog_url"),
+        "score": round(score, 2),
+        "holdings": [
+            {
+                "bib": status.get("bib"),
+                "standort": status.get("standort"),
+                "sig": status.get("sig"),
+                "available": status.get("available"),
+                "can_be_borrowed": status.get("can_be_borrowed", False),
+            }
+            for status in entry["status"]
+        ],
+    }
@@ -0,0 +1,289 @@
+"""Sharded refresh: a coordinator hands ID shards to worker processes or machines.
+
+Coordinator and workers talk through :mod:`multiprocessing.connection`
+(a Unix socket path or ``host:port``) with tuples:
+
+* worker -> coordinator: ``("ready",)``, ``("heartbeat", shard)``, ``("result", shard, entries)``,
+  ``("failed", shard, message)``
+* coordinator -> worker: ``("shard", shard, ids, options, heartbeat)`` or ``("done",)``
+
+While a worker fetches a shard it sends a heartbeat every ``heartbeat``
+seconds; only shards whose worker stays silent for the lease timeout are
+handed out again.
+
+Messages are pickled, so both sides authenticate with a shared key first.
+"""
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple, Union
+
+from bibchecker.base import FetchError
+from bibchecker.parsers import parse_id
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(value: str) -> Address:
+    """``host:port`` becomes a TCP address, anything else a Unix socket path."""
+    host, sep, port = value.rpartition(":")
+    if sep and host and port.isdigit():
+        return (host, int(port))
+    return value
+
+
+def authkey() -> bytes:
+    """Shared secret of coordinator and remote workers ($BIBCHECKER_AUTHKEY).
+
+    There is no default: anyone who knows the key can make the other side
+    unpickle arbitrary data.
+    """
+    key = os.environ.get("BIBCHECKER_AUTHKEY", "")
+    if not key:
+        raise ValueError("BIBCHECKER_AUTHKEY must be set for --listen and --worker")
+    return key.encode("utf-8")
+
+
+def partition(ids: List[str], shards: int) -> List[List[str]]:
+    """Split IDs into contiguous shards of nearly equal size."""
+    shards = max(1, min(shards, len(ids)))
+    size, rest = divmod(len(ids), shards)
+    result: List[List[str]] = []
+    start = 0
+    for idx in range(shards):
+        end = start + size + (1 if idx < rest else 0)
+        result.append(ids[start:end])
+        start = end
+    return result
+
+
+class Coordinator:
+    """Distribute shards, re-queue failed or silent ones and merge the results in ID order.
+
+    Without an ``address`` the coordinator listens on a private socket with a
+    random key, which only its local workers get. A shard whose worker sent
+    nothing for ``lease_timeout`` seconds is handed out again. Shards that
+    failed ``max_attempts`` times are given up and listed in ``abandoned``
+    until a late result for them arrives.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        shards: int,
+        address: Optional[Address] = None,
+        lease_timeout: float = 600,
+        max_attempts: int = 3,
+        full_page: bool = False,
+    ) -> None:
+        self.shards = partition(ids, shards) if ids else []
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.options = {"full_page": full_page}
+        self._tmpdir: Optional[str] = None
+        if address is None:
+            self.authkey = os.urandom(32)
+            self._tmpdir = tempfile.mkdtemp(prefix="bibchecker-")
+            address = os.path.join(self._tmpdir, "coordinator.sock")
+        else:
+            self.authkey = authkey()
+        self.address = address
+        self.pending: "queue.Queue[int]" = queue.Queue()
+        for idx in range(len(self.shards)):
+            self.pending.put(idx)
+        self.results: Dict[int, List[Dict[str, Any]]] = {}
+        # shard -> last time its worker was heard of
+        self.leases: Dict[int, float] = {}
+        self.attempts: Dict[int, int] = {}
+        self.abandoned: List[int] = []
+        # shards with a result or given up; only results of given up shards are still taken
+        self.done: Set[int] = set()
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    def abandoned_ids(self) -> List[str]:
+        """IDs of the shards that were given up."""
+        return [ident for shard in sorted(self.abandoned) for ident in self.shards[shard]]
+
+    def _finish_check(self) -> None:
+        if len(self.done) == len(self.shards):
+            self._finished.set()
+
+    def _complete(self, shard: int, entries: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            if shard in self.abandoned:
+                self.abandoned.remove(shard)
+            elif shard in self.done:
+                return
+            self.results[shard] = entries
+            self.leases.pop(shard, None)
+            self.done.add(shard)
+            self._finish_check()
+
+    def _requeue(self, shard: int, reason: str) -> None:
+        with self._lock:
+            if shard in self.done or shard not in self.leases:
+                return
+            del self.leases[shard]
+            self.attempts[shard] = self.attempts.get(shard, 0) + 1
+            if self.attempts[shard] >= self.max_attempts:
+                print(f"Giving up shard {shard}: {reason}", file=sys.stderr)
+                self.abandoned.append(shard)
+                self.done.add(shard)
+                self._finish_check()
+                return
+        print(f"Re-queueing shard {shard}: {reason}", file=sys.stderr)
+        self.pending.put(shard)
+
+    def _renew(self, shard: int) -> None:
+        with self._lock:
+            if shard in self.leases:
+                self.leases[shard] = time.monotonic()
+
+    def _next_shard(self) -> Optional[int]:
+        while not self._finished.is_set():
+            try:
+                shard = self.pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if shard in self.done:
+                    continue
+                self.leases[shard] = time.monotonic()
+            return shard
+        return None
+
+    def _serve(self, conn: Connection) -> None:
+        shard: Optional[int] = None
+        try:
+            while True:
+                msg = conn.recv()
+                if msg[0] == "heartbeat":
+                    self._renew(msg[1])
+                    continue
+                if msg[0] == "result":
+                    self._complete(msg[1], msg[2])
+                    shard = None
+                elif msg[0] == "failed":
+                    self._requeue(msg[1], msg[2])
+                    shard = None
+                shard = self._next_shard()
+                if shard is None:
+                    conn.send(("done",))
+                    return
+                conn.send(("shard", shard, self.shards[shard], self.options, self.lease_timeout / 3))
+        except (EOFError, OSError):
+            if shard is not None:
+                self._requeue(shard, "worker disconnected")
+        finally:
+            conn.close()
+
+    def _accept(self, listener: Listener) -> None:
+        while not self._finished.is_set():
+            try:
+                conn = listener.accept()
+            except (OSError, multiprocessing.AuthenticationError):
+                if self._finished.is_set():
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def run(self, local_workers: int = 0) -> List[Dict[str, Any]]:
+        """Serve shards until all are done and return the merged entries.
+
+        Entries of abandoned shards are missing; see :meth:`abandoned_ids`.
+        """
+        if not self.shards:
+            return []
+        listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+            for _ in range(local_workers)
+        ]
+        for proc in workers:
+            proc.start()
+        try:
+            while not self._finished.wait(1.0):
+                now = time.monotonic()
+                with self._lock:
+                    expired = [s for s, started in self.leases.items() if now - started > self.lease_timeout]
+                for shard in expired:
+                    self._requeue(shard, "worker silent for too long")
+        finally:
+            listener.close()
+            for proc in workers:
+                proc.join(timeout=5)
+            if self._tmpdir:
+                if isinstance(self.address, str) and os.path.exists(self.address):
+                    os.unlink(self.address)
+                os.rmdir(self._tmpdir)
+        return [entry for idx in range(len(self.shards)) for entry in self.results.get(idx, [])]
+
+
+def _parse_shard(ids: List[str], full_page: bool = False) -> List[Dict[str, Any]]:
+    entries: List[Dict[str, Any]] = []
+    for ident in ids:
+        try:
+            entries.append(parse_id(ident, full_page=full_page))
+        except FetchError:
+            # network trouble: let the coordinator hand the shard out again
+            raise
+        except ValueError as exc:
+            print(f"Skipping {ident}: {exc}", file=sys.stderr)
+    return entries
+
+
+@contextmanager
+def _heartbeat(conn: Connection, shard: int, interval: float) -> Iterator[None]:
+    """Tell the coordinator every ``interval`` seconds that ``shard`` is still being worked on.
+
+    The thread is joined before the caller sends on ``conn`` again.
+    """
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(interval):
+            try:
+                conn.send(("heartbeat", shard))
+            except OSError:
+                return
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_worker(address: Address, key: Optional[bytes] = None) -> None:
+    """Fetch shards from a coordinator until it has no more work.
+
+    ``key`` defaults to $BIBCHECKER_AUTHKEY.
+    """
+    conn = Client(address, authkey=key or authkey())
+    try:
+        conn.send(("ready",))
+        while True:
+            msg = conn.recv()
+            if msg[0] != "shard":
+                return
+            reply: Tuple[Any, ...]
+            try:
+                with _heartbeat(conn, msg[1], msg[4]):
+                    reply = ("result", msg[1], _parse_shard(msg[2], **msg[3]))
+            except Exception as exc:
+                reply = ("failed", msg[1], str(exc))
+            conn.send(reply)
+    except EOFError:
+        return
+    finally:
+        conn.close()
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
-import copy
 import os
+import threading
+import time
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from flask import (
     Flask,
+    abort,
     flash,
     jsonify,
     redirect,
@@ -21,10 +24,15 @@ from flask import (
 )
 from flask.typing import ResponseReturnValue
 
-from bibchecker.database import save_database
-from bibchecker.filters import filter_ids
-from bibchecker.input import load_ids
-from bibchecker.parsers import parse_id
+from bibchecker.crawler import ContinuousCrawler
+from bibchecker.export import check_export, export_parquet
+from bibchecker.generations import current_dir
+from bibchecker.history import HistoryStore
+from bibchecker.metadata import MetadataCache
+from bibchecker.pipeline import ParserPool
+from bibchecker.profiling import Profiler
+from bibchecker.profiles import Profile, ProfileRefresh, load_previous, load_profiles, refresh_profiles, split_bibs
+from bibchecker.search import SearchIndex, search_result
 
 
 @dataclass
@@ -35,6 +43,7 @@ class RefreshResult:
     entries: int
     output_dir: Path
     rendered_files: List[Dict[str, str]]
+    profile: Optional[Dict[str, Any]] = None
 
 
 DEFAULT_MY_BIBS = "Bad Cannstatt,Feuerbach,Freiberg,Neugereut,Ost,Stadtbibliothek am Mailänder Platz,Zuffenhausen,Mediathek im KUBUS"
@@ -53,13 +62,68 @@ def create_app() -> Flask:
         CACHE_FILE=Path(os.environ.get("BIB_CACHE_FILE", "out/cache.json")).resolve(),
         MY_BIBS=os.environ.get("BIBCHECKER_MYBIBS", DEFAULT_MY_BIBS),
         REFRESH_TIME=os.environ.get("BIBCHECKER_REFRESH_TIME", "04:00"),
-        STATE={"last_refresh": None},
+        REFRESH_MODE=os.environ.get("BIBCHECKER_REFRESH_MODE", "daily"),
+        HOST_BUDGET=int(os.environ["BIBCHECKER_HOST_BUDGET"]) if os.environ.get("BIBCHECKER_HOST_BUDGET") else None,
+        CRAWL_TICK=float(os.environ.get("BIBCHECKER_CRAWL_TICK", "30")),
+        RENDER_INTERVAL=float(os.environ.get("BIBCHECKER_RENDER_INTERVAL", "300")),
+        REPORT_MODE=os.environ.get("BIBCHECKER_REPORT_MODE", "server"),
+        REPORT_GZIP=os.environ.get("BIBCHECKER_REPORT_GZIP", "0") == "1",
+        KEEP_GENERATIONS=int(os.environ.get("BIBCHECKER_KEEP_GENERATIONS", "3")),
+        PLAN_SIZE=int(os.environ.get("BIBCHECKER_PLAN_SIZE", "3")),
+        PROFILES_FILE=os.environ.get("BIB_PROFILES_FILE"),
+        PROFILE=os.environ.get("BIBCHECKER_PROFILE", "0") == "1",
+        PROFILE_DUMP=os.environ.get("BIBCHECKER_PROFILE_DUMP"),
+        PROFILE_LOG=Path(os.environ.get("BIB_PROFILE_LOG", "out/profile.jsonl")).resolve(),
+        FETCHERS=int(os.environ.get("BIBCHECKER_FETCHERS", "0")),
+        PARSE_WORKERS=int(os.environ["BIBCHECKER_PARSE_WORKERS"]) if os.environ.get("BIBCHECKER_PARSE_WORKERS") else None,
+        ARCHIVE_FILE=Path(os.environ["BIB_ARCHIVE_FILE"]).resolve() if os.environ.get("BIB_ARCHIVE_FILE") else None,
+        METADATA_FILE=Path(os.environ.get("BIB_METADATA_FILE", "out/metadata.json")).resolve(),
+        METADATA_MAX_AGE=float(os.environ.get("BIBCHECKER_METADATA_MAX_AGE", "30")),
+        EXPORT_DIR=Path(os.environ["BIB_EXPORT_DIR"]).resolve() if os.environ.get("BIB_EXPORT_DIR") else None,
+        HISTORY_FILE=Path(os.environ.get("BIB_HISTORY_FILE", "out/history.jsonl")).resolve(),
+        STATE={"last_refresh": {}},
     )
 
-    app.config["OUTPUT_DIR"].mkdir(parents=True, exist_ok=True)
+    if app.config["PROFILES_FILE"]:
+        app.config["PROFILES"] = load_profiles(app.config["PROFILES_FILE"])
+    else:
+        app.config["PROFILES"] = [
+            Profile(
+                name="default",
+                input_file=app.config["INPUT_FILE"],
+                output_dir=app.config["OUTPUT_DIR"],
+                cache_file=app.config["CACHE_FILE"],
+                my_bibs=split_bibs(app.config["MY_BIBS"]),
+                plan_size=app.config["PLAN_SIZE"],
+                report_mode=app.config["REPORT_MODE"],
+                compress=app.config["REPORT_GZIP"],
+                keep_generations=app.config["KEEP_GENERATIONS"],
+            )
+        ]
+
+    if app.config["EXPORT_DIR"]:
+        # fail at startup rather than after the first refresh
+        check_export()
+
+    for profile in app.config["PROFILES"]:
+        profile.output_dir.mkdir(parents=True, exist_ok=True)
+    app.config["HISTORY_FILE"].parent.mkdir(parents=True, exist_ok=True)
+    app.config["METADATA_FILE"].parent.mkdir(parents=True, exist_ok=True)
+    app.config["HISTORY"] = HistoryStore(str(app.config["HISTORY_FILE"]))
+    # one metadata cache for every refresh; REFRESH_LOCK serializes all of them
+    app.config["METADATA"] = MetadataCache(
+        str(app.config["METADATA_FILE"]), timedelta(days=app.config["METADATA_MAX_AGE"])
+    )
+    app.config["REFRESH_LOCK"] = threading.RLock()
+    # parser processes live as long as the app instead of one refresh
+    app.config["PARSER_POOL"] = ParserPool(app.config["PARSE_WORKERS"]) if app.config["FETCHERS"] else None
+    app.config["SEARCH_INDEX"] = SearchIndex(load_previous(app.config["PROFILES"]).values())
 
     scheduler = BackgroundScheduler(daemon=True)
-    _schedule_daily_refresh(app, scheduler)
+    if app.config["REFRESH_MODE"] == "continuous":
+        _schedule_continuous_crawl(app, scheduler)
+    else:
+        _schedule_daily_refresh(app, scheduler)
     scheduler.start()
     app.config["SCHEDULER"] = scheduler
 
@@ -70,50 +134,102 @@ def create_app() -> Flask:
 def _register_routes(app: Flask) -> None:
     @app.route("/", methods=["GET"])
     def dashboard() -> ResponseReturnValue:
-        input_text = _load_input_text(app.config["INPUT_FILE"])
-        last_refresh: Optional[RefreshResult] = app.config["STATE"].get("last_refresh")
+        profile = _select_profile(app, request.args.get("profile"))
+        input_text = _load_input_text(profile.input_file)
+        last_refresh: Optional[RefreshResult] = app.config["STATE"]["last_refresh"].get(profile.name)
         if last_refresh and last_refresh.rendered_files:
             generated = _sort_rendered_files(last_refresh.rendered_files)
         else:
-            generated = _list_generated_files(app.config["OUTPUT_DIR"])
+            generated = _list_generated_files(current_dir(profile.output_dir))
         return render_template(
             "dashboard.html",
+            profile=profile,
+            profiles=app.config["PROFILES"],
+            file_url=lambda name: _file_url(app, profile, name),
             input_text=input_text,
-            input_file=app.config["INPUT_FILE"],
-            output_dir=app.config["OUTPUT_DIR"],
-            cache_file=app.config["CACHE_FILE"],
-            my_bibs=_split_bibs(app.config["MY_BIBS"]),
+            input_file=profile.input_file,
+            output_dir=profile.output_dir,
+            cache_file=profile.cache_file,
+            my_bibs=profile.my_bibs,
             refresh_time=app.config["REFRESH_TIME"],
+            refresh_mode=app.config["REFRESH_MODE"],
             generated=generated,
             last_refresh=last_refresh,
         )
 
     @app.post("/save")
     def save_input() -> ResponseReturnValue:
+        profile = _select_profile(app, request.form.get("profile"))
         content = request.form.get("content", "")
-        _save_input_text(app.config["INPUT_FILE"], content)
+        _save_input_text(profile.input_file, content)
         flash("Input file saved.")
-        return redirect(url_for("dashboard"))
+        return redirect(url_for("dashboard", profile=profile.name))
 
     @app.post("/refresh")
     def refresh() -> ResponseReturnValue:
-        result = _refresh_reports(app)
-        flash(f"Reports refreshed at {result.refreshed_at:%Y-%m-%d %H:%M}.")
-        return redirect(url_for("dashboard"))
+        results = _refresh_reports(app)
+        refreshed_at = next(iter(results.values())).refreshed_at if results else datetime.now()
+        flash(f"Reports refreshed at {refreshed_at:%Y-%m-%d %H:%M}.")
+        return redirect(url_for("dashboard", profile=request.form.get("profile")))
 
     @app.get("/files/<path:filename>")
     def serve_file(filename: str) -> ResponseReturnValue:
-        return send_from_directory(str(app.config["OUTPUT_DIR"]), filename, as_attachment=False)
+        profile = app.config["PROFILES"][0]
+        return send_from_directory(str(current_dir(profile.output_dir)), filename, as_attachment=False)
+
+    @app.get("/profiles/<profile>/files/<path:filename>")
+    def serve_profile_file(profile: str, filename: str) -> ResponseReturnValue:
+        selected = _select_profile(app, profile)
+        return send_from_directory(str(current_dir(selected.output_dir)), filename, as_attachment=False)
 
     @app.get("/health")
     def health() -> ResponseReturnValue:
-        last: Optional[RefreshResult] = app.config["STATE"].get("last_refresh")
+        results: Dict[str, RefreshResult] = app.config["STATE"]["last_refresh"]
+        last = next(iter(results.values()), None)
         payload = {
             "last_refresh": last.refreshed_at.isoformat() if last else None,
             "entries": last.entries if last else None,
+            "profiles": {name: result.entries for name, result in results.items()},
         }
         return jsonify(payload)
 
+    @app.get("/search")
+    def search() -> ResponseReturnValue:
+        query = request.args.get("q", "")
+        limit = request.args.get("limit", 20, type=int)
+        started = time.perf_counter()
+        index: SearchIndex = app.config["SEARCH_INDEX"]
+        results = [search_result(score, entry) for score, entry in index.search(query, limit)]
+        return jsonify({
+            "query": query,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": results,
+        })
+
+    @app.get("/api/changes")
+    def changes() -> ResponseReturnValue:
+        since = request.args.get("since", 0, type=int)
+        limit = request.args.get("limit", None, type=int)
+        history: HistoryStore = app.config["HISTORY"]
+        records = history.changes_since(since, limit)
+        return jsonify({"cursor": records[-1]["seq"] if records else since, "changes": records})
+
+
+def _select_profile(app: Flask, name: Optional[str]) -> Profile:
+    profiles: List[Profile] = app.config["PROFILES"]
+    if not name:
+        return profiles[0]
+    for profile in profiles:
+        if profile.name == name:
+            return profile
+    abort(404)
+
+
+def _file_url(app: Flask, profile: Profile, filename: str) -> str:
+    if profile is app.config["PROFILES"][0]:
+        return url_for("serve_file", filename=filename)
+    return url_for("serve_profile_file", profile=profile.name, filename=filename)
+
 
 def _schedule_daily_refresh(app: Flask, scheduler: BackgroundScheduler) -> None:
     hour, minute = _parse_refresh_time(app.config["REFRESH_TIME"])
@@ -130,213 +246,109 @@ def _schedule_daily_refresh(app: Flask, scheduler: BackgroundScheduler) -> None:
     )
 
 
-def _refresh_reports(app: Flask) -> RefreshResult:
-    """Recreate all report files based on the current input file."""
-
-    input_file: Path = app.config["INPUT_FILE"]
-    output_dir: Path = app.config["OUTPUT_DIR"]
-    cache_file: Path = app.config["CACHE_FILE"]
+def _schedule_continuous_crawl(app: Flask, scheduler: BackgroundScheduler) -> None:
+    crawler = ContinuousCrawler(
+        app.config["PROFILES"],
+        tick_seconds=app.config["CRAWL_TICK"],
+        budget=app.config["HOST_BUDGET"],
+        render_interval=app.config["RENDER_INTERVAL"],
+        history=app.config["HISTORY"],
+        metadata=app.config["METADATA"],
+    )
+    app.config["CRAWLER"] = crawler
+    # manual refreshes go through the crawler and share its lock
+    app.config["REFRESH_LOCK"] = crawler.lock
 
-    output_dir.mkdir(parents=True, exist_ok=True)
+    def _job() -> None:
+        with app.app_context(), crawler.lock:
+            refreshed = crawler.tick()
+            if refreshed:
+                _store_results(app, refreshed, datetime.now())
 
-    ids = list(load_ids(str(input_file)))
-    entries = _parse_entries(ids)
+    scheduler.add_job(
+        _job,
+        trigger=IntervalTrigger(seconds=app.config["CRAWL_TICK"]),
+        name="bibchecker-continuous-crawl",
+        replace_existing=True,
+    )
 
-    save_database(str(cache_file), entries)
+    if app.config["EXPORT_DIR"]:
+        hour, minute = _parse_refresh_time(app.config["REFRESH_TIME"])
 
-    timestamp = datetime.now()
-    my_bibs = _split_bibs(app.config["MY_BIBS"])
-    all_bibs = _collect_bibs(entries)
+        def _export_job() -> None:
+            with crawler.lock:
+                entries = list(crawler.entries.values())
+            export_parquet(entries, app.config["EXPORT_DIR"])
 
-    rendered_files = _write_reports(app, entries, ids, all_bibs, my_bibs, output_dir, timestamp)
+        # reports are rendered every few minutes; the export stays daily
+        scheduler.add_job(
+            _export_job,
+            trigger=CronTrigger(hour=hour, minute=minute),
+            name="bibchecker-daily-export",
+            replace_existing=True,
+        )
 
-    result = RefreshResult(
-        refreshed_at=timestamp,
-        entries=len(entries),
-        output_dir=output_dir,
-        rendered_files=rendered_files,
-    )
-    app.config["STATE"]["last_refresh"] = result
-    return result
 
+def _refresh_reports(app: Flask) -> Dict[str, RefreshResult]:
+    """Recreate all report files for every profile from one shared fetch."""
 
-def _parse_entries(ids: Iterable[str]) -> List[Dict[str, Any]]:
-    parsed: List[Dict[str, Any]] = []
-    for ident in ids:
+    with app.config["REFRESH_LOCK"]:
+        timestamp = datetime.now()
+        profiler = Profiler(app.config["PROFILE_DUMP"]) if app.config["PROFILE"] or app.config["PROFILE_DUMP"] else None
+        if profiler:
+            profiler.start()
+        pipeline = (app.config["FETCHERS"], app.config["PARSE_WORKERS"])
+        crawler: Optional[ContinuousCrawler] = app.config.get("CRAWLER")
         try:
-            parsed.append(parse_id(ident))
-        except ValueError as exc:
-            # Skip invalid IDs but keep running to produce useful output
-            print(f"Skipping {ident}: {exc}")
-    return parsed
-
-
-def _write_reports(
+            if crawler:
+                refreshed_profiles = crawler.refresh(app.config["ARCHIVE_FILE"], pipeline, app.config["PARSER_POOL"])
+            else:
+                refreshed_profiles = refresh_profiles(
+                    app.config["PROFILES"],
+                    timestamp,
+                    app.config["HISTORY"],
+                    app.config["ARCHIVE_FILE"],
+                    app.config["METADATA"],
+                    pipeline,
+                    parsers=app.config["PARSER_POOL"],
+                )
+        finally:
+            if profiler:
+                profiler.stop()
+
+        summary = _store_profile(app, profiler, timestamp) if profiler else None
+        results = _store_results(app, refreshed_profiles, timestamp, summary)
+        if app.config["EXPORT_DIR"]:
+            shared = {entry["id"]: entry for refreshed in refreshed_profiles for entry in refreshed.entries}
+            export_parquet(shared.values(), app.config["EXPORT_DIR"], timestamp)
+        return results
+
+
+def _store_results(
     app: Flask,
-    entries: List[Dict[str, Any]],
-    ids: List[str],
-    all_bibs: List[str],
-    my_bibs: List[str],
-    output_dir: Path,
+    refreshed_profiles: List[ProfileRefresh],
     timestamp: datetime,
-) -> List[Dict[str, str]]:
-    rendered_files: List[Dict[str, str]] = []
-    my_bibs_set = set(my_bibs)
-
-    # Order: all-items pages first, then mybibs, then per-bib (my_bibs first), then rest
-    per_bib_ordered = [b for b in all_bibs if b in my_bibs_set] + [b for b in all_bibs if b not in my_bibs_set]
-
-    # Per-library pages (only available items)
-    for bib in per_bib_ordered:
-        filtered = _filtered_entries(entries, only_available=True, bibfilter=[bib])
-        html = render_template(
-            "report_item.html",
-            title=f"{bib} (nur verfügbar)",
-            subtitle="Gefiltert nach Bibliothek",
-            entries=filtered,
-            timestamp=timestamp,
-            info_line="Nur verfügbare Exemplare",
-        )
-        target = output_dir / f"{bib}.html"
-        target.write_text(html, encoding="utf-8")
-        rendered_files.append(
-            {
-                "name": target.name,
-                "description": f"{bib}",
-                "scope": "Nur verfügbare Exemplare",
-                "priority": "bib-mine" if bib in my_bibs_set else "bib-other",
-            }
+    summary: Optional[Dict[str, Any]] = None,
+) -> Dict[str, RefreshResult]:
+    results: Dict[str, RefreshResult] = {}
+    for refreshed in refreshed_profiles:
+        results[refreshed.profile.name] = RefreshResult(
+            refreshed_at=timestamp,
+            entries=len(refreshed.entries),
+            output_dir=refreshed.profile.output_dir,
+            rendered_files=refreshed.rendered_files,
+            profile=summary,
         )
-
-    # My bibs summary (only available)
-    my_filtered = _filtered_entries(entries, only_available=True, bibfilter=my_bibs)
-    my_grouped = _group_by_bib(my_filtered)
-    my_html = render_template(
-        "report_bib.html",
-        title="Meine Bibliotheken",
-        subtitle=", ".join(my_bibs) if my_bibs else "Keine Bibliotheken definiert",
-        grouped=my_grouped,
-        timestamp=timestamp,
-        info_line="Nur verfügbare Exemplare",
-    )
-    my_target = output_dir / "mybibs.html"
-    my_target.write_text(my_html, encoding="utf-8")
-    rendered_files.append(
-        {
-            "name": my_target.name,
-            "description": "Meine Bibliotheken",
-            "scope": "Nur verfügbare Exemplare",
-            "priority": "mybibs",
-        }
-    )
-
-    # All items by title
-    all_items = _filtered_entries(entries, all_data=True, only_available=False)
-    all_items = sorted(all_items, key=lambda e: e.get("Titel", ""))
-    all_items_html = render_template(
-        "report_item.html",
-        title="Alle Medien (nach Titel)",
-        subtitle=f"{len(ids)} IDs",  # count of IDs even if parsing failed
-        entries=all_items,
-        timestamp=timestamp,
-        info_line="Alle Exemplare",
-    )
-    all_items_target = output_dir / "all_items.html"
-    all_items_target.write_text(all_items_html, encoding="utf-8")
-    rendered_files.append(
-        {
-            "name": all_items_target.name,
-            "description": "Alle Medien nach Titel",
-            "scope": "Alle Exemplare",
-            "priority": "multi",
-        }
-    )
-
-    # All items grouped by library
-    all_grouped = _group_by_bib(_filtered_entries(entries, all_data=True, only_available=False))
-    all_bib_html = render_template(
-        "report_bib.html",
-        title="Alle Medien (nach Bibliothek)",
-        subtitle=f"{len(ids)} IDs",
-        grouped=all_grouped,
-        timestamp=timestamp,
-        info_line="Alle Exemplare",
-    )
-    all_bib_target = output_dir / "all_bib.html"
-    all_bib_target.write_text(all_bib_html, encoding="utf-8")
-    rendered_files.append(
-        {
-            "name": all_bib_target.name,
-            "description": "Alle Medien nach Bibliothek",
-            "scope": "Alle Exemplare",
-            "priority": "multi",
-        }
-    )
-
-    # Sort according to priorities
-    def _priority_key(item: Dict[str, str]) -> Tuple[int, str]:
-        order = {
-            "multi": 0,
-            "mybibs": 1,
-            "bib-mine": 2,
-            "bib-other": 3,
-        }
-        return (order.get(item.get("priority", "bib-other"), 9), item.get("name", ""))
-
-    rendered_files.sort(key=_priority_key)
-
-    # Index page
-    index_html = render_template(
-        "report_index.html",
-        title="Bibliothek Übersicht",
-        timestamp=timestamp,
-        generated=rendered_files,
-        per_bib=per_bib_ordered,
-    )
-    (output_dir / "index.html").write_text(index_html, encoding="utf-8")
-
-    return rendered_files
-
-
-def _filtered_entries(
-    entries: List[Dict[str, Any]],
-    *,
-    all_data: bool = False,
-    only_available: bool = False,
-    bibfilter: Optional[List[str]] = None,
-) -> List[Dict[str, Any]]:
-    working_copy = copy.deepcopy(entries)
-    return list(
-        filter_ids(
-            working_copy,
-            all_data=all_data,
-            only_available=only_available,
-            bibfilter=bibfilter,
-        )
-    )
-
-
-def _group_by_bib(entries: List[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
-    grouped: Dict[str, List[Dict[str, Any]]] = {}
-    for entry in entries:
-        for status in entry.get("status", []):
-            bib = status.get("bib", "Unbekannt")
-            grouped.setdefault(bib, []).append({"entry": entry, "status": status})
-    return sorted(grouped.items(), key=lambda item: item[0])
-
-
-def _collect_bibs(entries: List[Dict[str, Any]]) -> List[str]:
-    seen = {
-        status.get("bib")
-        for entry in entries
-        for status in entry.get("status", [])
-        if status.get("bib")
-    }
-    return sorted(seen)
+    app.config["STATE"]["last_refresh"] = results
+    shared = {entry["id"]: entry for refreshed in refreshed_profiles for entry in refreshed.entries}
+    app.config["SEARCH_INDEX"] = SearchIndex(shared.values())
+    return results
 
 
-def _split_bibs(raw: str) -> List[str]:
-    return [part.strip() for part in raw.split(",") if part.strip()]
+def _store_profile(app: Flask, profiler: Profiler, timestamp: datetime) -> Dict[str, Any]:
+    """Print the slowest phases and append the summary to the profile log for later comparison."""
+    print(profiler.report())
+    return profiler.append_log(app.config["PROFILE_LOG"], timestamp)
 
 
 def _parse_refresh_time(value: str) -> Tuple[int, int]:
@@ -3,28 +3,43 @@ set -euf
 mybibs="Bad Cannstatt,Feuerbach,Freiberg,Neugereut,Ost,Stadtbibliothek am Mailänder Platz,Zuffenhausen,Mediathek im KUBUS"
 infile=${1:-STUFF}
 outdir=${2:-out}
+keep=${BIBCHECKER_KEEP_GENERATIONS:-3}
 cachefile=$outdir/cache.json
 
-mkdir -p "$outdir"
-trap 'rm -f "$cachefile"' INT TERM EXIT
+socket=$outdir/.bibchecker.sock
+
+# Render into a new generation; "$outdir/current" keeps pointing to the
+# previous complete one until this run has finished
+gen=$outdir/generations/.building-$$
+mkdir -p "$gen"
+trap 'rm -rf "$gen"' INT TERM EXIT
 
 
 echo "Creating cachefile at $cachefile"
 bibchecker -f "$infile"  --all --save-db "$cachefile" >/dev/null
 
-# Generate per-library HTML files
-jq -r '.[] | .status[] | .bib' "$cachefile" | sort | uniq | while read bib;do
-    echo "$bib"
-    bibchecker --format html --load-db "$cachefile" --bib="$bib" --only-available > "$outdir/${bib}.html"
+# Keep one warm process for all reports instead of starting bibchecker per report
+rm -f "$socket"
+bibchecker --daemon "$socket" >/dev/null &
+daemon=$!
+trap 'kill "$daemon" 2>/dev/null; rm -f "$socket"; rm -rf "$gen"' INT TERM EXIT
+tries=0
+while [ ! -S "$socket" ]; do
+    tries=$((tries + 1))
+    [ "$tries" -gt 100 ] && { echo "bibchecker daemon did not start" >&2; exit 1; }
+    sleep 0.1
 done
 
-bibchecker --format html --load-db "$cachefile" --bib="$mybibs" --sort-by=bib --only-available > "$outdir/mybibs.html"
-bibchecker --format html --load-db "$cachefile" --all > "$outdir/all_items.html"
-bibchecker --format html --load-db "$cachefile" --sort-by=bib --all > "$outdir/all_bib.html"
+# Generate per-library HTML files in one pass over the cache; it lists "file<TAB>library"
+bibchecker-client --socket="$socket" --format html --load-db "$cachefile" --only-available --split-by=bib --output-dir="$gen" > "$gen/.libraries"
+
+bibchecker-client --socket="$socket" --format html --load-db "$cachefile" --bib="$mybibs" --sort-by=bib --only-available > "$gen/mybibs.html"
+bibchecker-client --socket="$socket" --format html --load-db "$cachefile" --all > "$gen/all_items.html"
+bibchecker-client --socket="$socket" --format html --load-db "$cachefile" --sort-by=bib --all > "$gen/all_bib.html"
 
 # Generate index.html
 timestamp=$(date "+%d.%m.%Y %H:%M")
-cat > "$outdir/index.html" << 'HEADER'
+cat > "$gen/index.html" << 'HEADER'
 <!DOCTYPE html>
 <html lang="de">
 <head>
@@ -59,16 +74,37 @@ cat > "$outdir/index.html" << 'HEADER'
 <tr><th>Bibliothek</th></tr>
 HEADER
 
-# Add library links
-jq -r '.[] | .status[] | .bib' "$cachefile" | sort | uniq | while read bib;do
-    echo "<tr><td><a href=\"${bib}.html\">$bib</a></td></tr>" >> "$outdir/index.html"
-done
+# Add links to the reports --split-by wrote
+tab=$(printf '\t')
+while IFS="$tab" read -r file bib; do
+    echo "<tr><td><a href=\"${file}\">$bib</a></td></tr>" >> "$gen/index.html"
+done < "$gen/.libraries"
+rm -f "$gen/.libraries"
 
-cat >> "$outdir/index.html" << FOOTER
+cat >> "$gen/index.html" << FOOTER
 </table>
 <div class="ts">Stand: $timestamp</div>
 </body>
 </html>
 FOOTER
 
-echo "Generated index.html in $outdir"
+# Hardlink pages that did not change since the previous generation
+if [ -d "$outdir/current" ]; then
+    find "$gen" -type f | while read -r file; do
+        old=$outdir/current/${file#"$gen"/}
+        if [ -f "$old" ] && cmp -s "$old" "$file"; then
+            ln -f "$old" "$file"
+        fi
+    done
+fi
+
+# Publish: rename the generation, then switch the symlink atomically
+final=generations/$(date "+%Y%m%dT%H%M%S")-$$
+mv "$gen" "$outdir/$final"
+ln -sfn "$final" "$outdir/.current-$$"
+mv -T "$outdir/.current-$$" "$outdir/current"
+
+# Keep the newest $keep generations
+find "$outdir/generations" -mindepth 1 -maxdepth 1 -name '[0-9]*' | sort | head -n -"$keep" | xargs -r rm -rf
+
+echo "Generated index.html in $outdir/$final"
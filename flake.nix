@@ -23,6 +23,7 @@
             requests
             docopt
             flask
+            jinja2
             apscheduler
           ];
           nativeBuildInputs = with python.pkgs; [
@@ -0,0 +1,93 @@
+"""Shared fixtures: small catalog pages and entries, no network access."""
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+from flask import Flask
+
+from bibchecker.webapp import create_app
+
+STUTTGART_PAGE = """<html><head><title>Katalog</title><script>var x = "<table>";</script></head><body>
+<div class="nav"><table class="layout"><tr><td>Menü</td></tr></table></div>
+<table class="gi"><tr><th>Titel</th><td class="spalterechts">Der Hobbit / J.R.R. Tolkien</td></tr>
+<tr><th>Verfasser</th><td class="spalterechts">Tolkien, J.R.R.</td></tr></table>
+<table class="rTable_table"><thead><tr><th>Bibliothek</th><th>Standort</th><th>Signatur</th><th>Verfügbarkeit</th></tr></thead>
+<tbody><tr><td>Ost</td><td>Kinder</td><td>KJ Tol</td><td>Verfügbar</td></tr>
+<tr><td>Feuerbach</td><td>Erw</td><td>Tol</td><td>Ausgeliehen - Fällig am: 03.11.2026</td></tr></tbody></table>
+<script>var y = 1;</script>""" + "<div>padding</div>" * 500 + "</body></html>"
+
+REMSECK_PAGE = """<html><body><h1 class="title">Zeitstrudel / Spiel</h1>
+<table id="holdingst"><tbody><tr>
+<td class="location"><a class="library_info">ⓘ Mediathek im KUBUS</a><span class="shelvingloc">Spiele</span></td>
+<td class="call_no">SP Zei (Spiel)</td><td class="status"><span class="item-status">Ausgeliehen</span></td>
+<td class="date_due">01.11.2026</td></tr></tbody></table>
+<footer>Impressum</footer></body></html>"""
+
+
+EntryFactory = Callable[..., Dict[str, Any]]
+
+
+@pytest.fixture
+def stuttgart_page() -> str:
+    return STUTTGART_PAGE
+
+
+@pytest.fixture
+def remseck_page() -> str:
+    return REMSECK_PAGE
+
+
+@pytest.fixture
+def make_holding() -> EntryFactory:
+    """Factory for holding dicts in the shape the parsers produce."""
+
+    def make(bib: str, available: bool = True, **fields: Any) -> Dict[str, Any]:
+        return {
+            "bib": bib,
+            "standort": fields.pop("standort", "Erw"),
+            "sig": fields.pop("sig", "A 1"),
+            "available": fields.pop("text", "Verfügbar" if available else "Ausgeliehen - Fällig am: 01.11.2026"),
+            "can_be_borrowed": available,
+            **fields,
+        }
+
+    return make
+
+
+@pytest.fixture
+def make_entry() -> EntryFactory:
+    """Factory for entry dicts in the shape the parsers produce."""
+
+    def make(ident: str, *holdings: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+        return {"id": ident, "library": "stuttgart", "status": list(holdings), "Titel": f"Titel {ident}", **fields}
+
+    return make
+
+
+@pytest.fixture
+def entries(make_entry: EntryFactory, make_holding: EntryFactory) -> List[Dict[str, Any]]:
+    holding = make_holding
+    return [
+        make_entry("SAK1", holding("Ost"), holding("Feuerbach", False, standort="Kinder")),
+        make_entry("SAK2", holding("Feuerbach"), holding("Vaihingen")),
+        make_entry("SAK3", holding("Ost", False)),
+        make_entry("SAK4"),
+        make_entry("163581", holding("Mediathek im KUBUS", standort="Spiele"), library="remseck"),
+    ]
+
+
+@pytest.fixture
+def app(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Flask]:
+    """Web app with all files below tmp_path; its scheduler never runs a job."""
+    (tmp_path / "STUFF").write_text("SAK1\n", encoding="utf-8")
+    monkeypatch.setenv("BIB_INPUT_FILE", str(tmp_path / "STUFF"))
+    monkeypatch.setenv("BIB_OUTPUT_DIR", str(tmp_path / "out"))
+    monkeypatch.setenv("BIB_CACHE_FILE", str(tmp_path / "out" / "cache.json"))
+    monkeypatch.setenv("BIB_HISTORY_FILE", str(tmp_path / "out" / "history.jsonl"))
+    monkeypatch.setenv("BIB_METADATA_FILE", str(tmp_path / "out" / "metadata.json"))
+    monkeypatch.setenv("BIB_PROFILE_LOG", str(tmp_path / "out" / "profile.jsonl"))
+    for name in ("BIB_PROFILES_FILE", "BIB_ARCHIVE_FILE", "BIB_EXPORT_DIR", "BIBCHECKER_REFRESH_MODE"):
+        monkeypatch.delenv(name, raising=False)
+    app = create_app()
+    yield app
+    app.config["SCHEDULER"].shutdown(wait=False)
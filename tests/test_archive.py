@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from bibchecker.archive import ArchiveReader, ArchiveWriter, reparse_archive
+from bibchecker.parsers.remseck import RemseckParser
+from bibchecker.parsers.stuttgart import StuttgartParser
+
+needs_fork = pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patch")
+
+
+def test_round_trip(tmp_path: Path, stuttgart_page: str, remseck_page: str) -> None:
+    target = tmp_path / "pages.arc"
+    with ArchiveWriter(str(target)) as archive:
+        archive.add("SAK1", stuttgart_page)
+        archive.add("163581", remseck_page)
+        archive.add("SAK1", stuttgart_page + "<!-- newer -->")
+    assert os.listdir(tmp_path) == ["pages.arc"]
+    with ArchiveReader(str(target)) as reader:
+        assert reader.ids() == ["SAK1", "163581"]
+        assert reader.get("163581") == remseck_page
+        assert reader.get("SAK1").endswith("<!-- newer -->")
+
+
+def test_reparse_runs_current_parsers(tmp_path: Path, stuttgart_page: str, remseck_page: str) -> None:
+    target = tmp_path / "pages.arc"
+    with ArchiveWriter(str(target)) as archive:
+        archive.add("SAK1", stuttgart_page)
+        archive.add("163581", remseck_page)
+    entries = reparse_archive(str(target), workers=1)
+    assert [entry["id"] for entry in entries] == ["SAK1", "163581"]
+    assert entries[0]["Titel"] == StuttgartParser.parse_html("SAK1", stuttgart_page)["Titel"]
+    assert entries[1]["status"] == RemseckParser.parse_html("163581", remseck_page)["status"]
+
+
+def test_failure_keeps_previous_archive(tmp_path: Path, stuttgart_page: str, remseck_page: str) -> None:
+    target = tmp_path / "pages.arc"
+    with ArchiveWriter(str(target)) as archive:
+        archive.add("SAK1", stuttgart_page)
+    with pytest.raises(RuntimeError):
+        with ArchiveWriter(str(target)) as archive:
+            archive.add("163581", remseck_page)
+            raise RuntimeError("refresh failed")
+    assert os.listdir(tmp_path) == ["pages.arc"]
+    with ArchiveReader(str(target)) as reader:
+        assert reader.ids() == ["SAK1"]
+
+
+def test_rejects_foreign_file(tmp_path: Path) -> None:
+    target = tmp_path / "other.bin"
+    target.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        ArchiveReader(str(target))
+
+
+@needs_fork
+def test_reparse_keeps_fetch_time_and_skips_broken_pages(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                                          stuttgart_page: str) -> None:
+    target = tmp_path / "pages.arc"
+    with ArchiveWriter(str(target)) as archive:
+        archive.add("SAK1", stuttgart_page, fetched_at="2026-10-01T04:00:00")
+        archive.add("SAK2", "<html>")
+    monkeypatch.setattr(StuttgartParser, "parse_html", classmethod(broken_parse_html))
+    entries = reparse_archive(str(target), workers=1)
+    assert [entry["id"] for entry in entries] == ["SAK1"]
+    assert entries[0]["fetched_at"] == "2026-10-01T04:00:00"
+
+
+@needs_fork
+def test_reparse_parses_sections_unless_full_page(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                                  stuttgart_page: str) -> None:
+    target = tmp_path / "pages.arc"
+    with ArchiveWriter(str(target)) as archive:
+        archive.add("SAK1", stuttgart_page)
+    monkeypatch.setattr(StuttgartParser, "parse_html", classmethod(page_length))
+    [cut] = reparse_archive(str(target), workers=1)
+    [full] = reparse_archive(str(target), workers=1, full_page=True)
+    assert cut["length"] < full["length"] == len(stuttgart_page)
+
+
+def broken_parse_html(cls: Any, ident: str, html: str, with_metadata: bool = True) -> Dict[str, Any]:
+    if ident == "SAK2":
+        raise AttributeError("'NoneType' object has no attribute 'find_all'")
+    return cls.create_entry(ident)
+
+
+def page_length(cls: Any, ident: str, html: str, with_metadata: bool = True) -> Dict[str, Any]:
+    return {**cls.create_entry(ident), "length": len(html)}
@@ -0,0 +1,77 @@
+from types import TracebackType
+from typing import Any, Iterator, List, Optional, Type
+
+import pytest
+import requests  # type: ignore[import-untyped]
+
+from bibchecker.base import SectionScanner
+from bibchecker.parsers.remseck import RemseckParser
+from bibchecker.parsers.stuttgart import StuttgartParser
+
+
+def scan(page: str, sections: List, size: int) -> SectionScanner:
+    scanner = SectionScanner(sections)
+    for start in range(0, len(page), size):
+        scanner.feed(page[start:start + size])
+        if scanner.complete:
+            break
+    return scanner
+
+
+@pytest.mark.parametrize("size", [7, 64, 100000])
+def test_scanner_cuts_out_sections(size: int, stuttgart_page: str) -> None:
+    scanner = scan(stuttgart_page, StuttgartParser.required_sections, size)
+    assert scanner.complete
+    fragments = scanner.fragments(stuttgart_page)
+    assert fragments.startswith('<table class="gi">')
+    assert fragments.endswith("</table>")
+    assert "layout" not in fragments and "padding" not in fragments
+
+
+def test_scanner_incomplete_without_section() -> None:
+    scanner = scan("<html><table class='gi'><tr><td>x</td></tr></table></html>", StuttgartParser.required_sections, 10)
+    assert not scanner.complete
+    assert scanner.pending == [("table", "class", "rTable_table")]
+
+
+@pytest.mark.parametrize("parser, page_fixture", [(StuttgartParser, "stuttgart_page"), (RemseckParser, "remseck_page")])
+def test_parsing_sections_matches_full_page(parser: type, page_fixture: str, request: pytest.FixtureRequest) -> None:
+    page = request.getfixturevalue(page_fixture)
+    scanner = scan(page, parser.required_sections, 50)
+    full = parser.parse_html("1", page)
+    cut = parser.parse_html("1", scanner.fragments(page))
+    full.pop("fetched_at")
+    cut.pop("fetched_at")
+    assert cut == full
+    assert full["Titel"] and full["status"]
+
+
+class StreamedResponse:
+    encoding = "utf-8"
+
+    def __init__(self, page: str) -> None:
+        self.page = page.encode("utf-8")
+        self.sent = 0
+
+    def __enter__(self) -> "StreamedResponse":
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        pass
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        for start in range(0, len(self.page), chunk_size):
+            self.sent = start + chunk_size
+            yield self.page[start:start + chunk_size]
+
+
+def test_fetch_returns_received_text_and_sections(monkeypatch: pytest.MonkeyPatch, stuttgart_page: str) -> None:
+    response = StreamedResponse(stuttgart_page)
+    monkeypatch.setattr(requests, "get", lambda url, **kwargs: response)
+    monkeypatch.setattr(StuttgartParser, "chunk_size", 256)
+    raw, html = StuttgartParser.fetch_html("SAK1")
+    assert response.sent < len(response.page)
+    assert stuttgart_page.startswith(raw) and len(raw.encode("utf-8")) == response.sent
+    assert html == StuttgartParser.cut_sections(stuttgart_page)
+    assert html.startswith('<table class="gi">') and "Menü" not in html
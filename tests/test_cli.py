@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker.cli import execute
+from bibchecker.database import save_database
+
+
+@pytest.fixture
+def database(tmp_path: Path, entries: List[Dict[str, Any]], make_holding: Callable[..., Dict[str, Any]],
+             make_entry: Callable[..., Dict[str, Any]]) -> Path:
+    entries.append(make_entry("SAK9", make_holding("A/B"), make_holding("A_B")))
+    target = tmp_path / "cache.jsonl"
+    save_database(str(target), entries)
+    return target
+
+
+def test_split_lists_written_files(database: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    out = tmp_path / "out"
+    execute(["--load-db", str(database), "--only-available", "--format", "html",
+             "--split-by", "bib", "--output-dir", str(out)])
+    listed = [line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    assert listed == [
+        ["A_B.html", "A/B"],
+        ["A_B-2.html", "A_B"],
+        ["Feuerbach.html", "Feuerbach"],
+        ["Mediathek im KUBUS.html", "Mediathek im KUBUS"],
+        ["Ost.html", "Ost"],
+        ["Vaihingen.html", "Vaihingen"],
+    ]
+    assert sorted(path.name for path in out.iterdir()) == sorted(name for name, _ in listed)
+
+
+def test_split_json_counts_ids(database: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    out = tmp_path / "out"
+    execute(["--load-db", str(database), "--format", "json", "--split-by", "library",
+             "--where", "available", "--output-dir", str(out)])
+    capsys.readouterr()
+    payload = json.loads((out / "stuttgart.json").read_text(encoding="utf-8"))
+    assert payload["ids"] == 6
+    assert json.loads((out / "remseck.json").read_text(encoding="utf-8"))["ids"] == 6
+
+
+def test_json_counts_ids_behind_where(database: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    execute(["--load-db", str(database), "--format", "json", "--where", "bib = Ost"])
+    assert json.loads(capsys.readouterr().out)["ids"] == 6
+
+
+def test_invalid_where(database: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    execute(["--load-db", str(database), "--where", "due ~ 3"])
+    assert "needs a text field" in capsys.readouterr().out
+
+
+def test_changes_since_needs_integer(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    execute(["--history", str(tmp_path / "history.jsonl"), "--changes-since", "last"])
+    assert "must be a non-negative integer" in capsys.readouterr().out
+
+
+def test_history_without_previous_database_warns(database: Path, tmp_path: Path,
+                                                 capsys: pytest.CaptureFixture[str]) -> None:
+    execute(["--load-db", str(database), "--history", str(tmp_path / "history.jsonl"), "--save-db",
+             str(tmp_path / "new.jsonl"), "--format", "json"])
+    assert "nothing recorded" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("options, message", [
+    (["--workers", "0"], "--workers=0 needs --listen"),
+    (["--lease-timeout", "soon"], "--lease-timeout must be a positive number"),
+])
+def test_shard_options_are_checked(options: List[str], message: str, capsys: pytest.CaptureFixture[str]) -> None:
+    execute(["--shards", "2", *options, "SAK1", "SAK2"])
+    assert message in capsys.readouterr().out
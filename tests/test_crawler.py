@@ -0,0 +1,83 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+import requests  # type: ignore[import-untyped]
+
+from bibchecker import crawler as crawler_module
+from bibchecker.crawler import ContinuousCrawler
+from bibchecker.database import load_database, save_database
+from bibchecker.history import HistoryStore
+from bibchecker.profiles import Profile
+
+
+@pytest.fixture
+def profile(tmp_path: Path, make_holding: Callable[..., Dict[str, Any]],
+            make_entry: Callable[..., Dict[str, Any]]) -> Profile:
+    input_file = tmp_path / "ids.txt"
+    input_file.write_text("SAK1\nSAK2\n", encoding="utf-8")
+    cache_file = tmp_path / "out" / "cache.json"
+    cache_file.parent.mkdir()
+    save_database(str(cache_file), [make_entry("SAK1", make_holding("Ost")), make_entry("SAK2", make_holding("Ost"))])
+    return Profile(name="default", input_file=input_file, output_dir=tmp_path / "out", cache_file=cache_file, my_bibs=["Ost"])
+
+
+def test_changes_count_transitions(profile: Profile, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                   make_holding: Callable[..., Dict[str, Any]],
+                                   make_entry: Callable[..., Dict[str, Any]]) -> None:
+    history = HistoryStore(str(tmp_path / "history.jsonl"))
+    history.record([make_entry("SAK1", make_holding("Ost"), make_holding("Ost", sig="B"))],
+                   [make_entry("SAK1", make_holding("Ost", False), make_holding("Ost", False, sig="B"))])
+    crawler = ContinuousCrawler([profile], tick_seconds=30, history=history)
+    assert crawler.changes == {"SAK1": 2}
+
+    monkeypatch.setattr(crawler_module, "parse_id", lambda ident, metadata=None: make_entry(
+        ident, make_holding("Ost", False), make_holding("Feuerbach", False)))
+    entry = crawler._fetch("SAK2")
+    assert entry is not None
+    crawler._update("SAK2", entry, 100.0)
+    assert crawler.changes["SAK2"] == len(history.changes_since(2)) == 2
+    assert ContinuousCrawler([profile], tick_seconds=30, history=history).changes == crawler.changes
+
+
+def test_refresh_feeds_crawler_state(profile: Profile, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                     make_holding: Callable[..., Dict[str, Any]],
+                                     make_entry: Callable[..., Dict[str, Any]]) -> None:
+    history = HistoryStore(str(tmp_path / "history.jsonl"))
+    crawler = ContinuousCrawler([profile], tick_seconds=30, history=history)
+
+    def fetch_shared(ids: List[str], archive: Any, metadata: Any,
+                     pipeline: Any, **kwargs: Any) -> Dict[str, Dict[str, Any]]:
+        assert crawler.lock._is_owned()  # type: ignore[attr-defined]
+        return {ident: make_entry(ident, make_holding("Ost", False)) for ident in ids}
+
+    monkeypatch.setattr(crawler_module, "fetch_shared", fetch_shared)
+    refreshed = crawler.refresh()
+    assert [entry["id"] for entry in refreshed[0].entries] == ["SAK1", "SAK2"]
+    assert all(not entry["status"][0]["can_be_borrowed"] for entry in crawler.entries.values())
+    assert crawler.changes == {"SAK1": 1, "SAK2": 1}
+    assert not crawler.dirty
+    assert load_database(str(profile.cache_file))[0]["status"][0]["can_be_borrowed"] is False
+
+
+def test_tick_fetches_without_lock_and_survives_errors(profile: Profile, monkeypatch: pytest.MonkeyPatch,
+                                                      capsys: pytest.CaptureFixture[str],
+                                                      make_holding: Callable[..., Dict[str, Any]],
+                                                      make_entry: Callable[..., Dict[str, Any]]) -> None:
+    crawler = ContinuousCrawler([profile], tick_seconds=30, budget=crawler_module.DAY * 10, render_interval=0)
+    fetched: List[str] = []
+
+    def parse_id(ident: str, metadata: Any = None) -> Dict[str, Any]:
+        assert not crawler.lock._is_owned()  # type: ignore[attr-defined]
+        fetched.append(ident)
+        if ident == "SAK1":
+            raise requests.ConnectionError("connection reset")
+        return make_entry(ident, make_holding("Feuerbach"))
+
+    monkeypatch.setattr(crawler_module, "parse_id", parse_id)
+    crawler.tokens = {host: 2.0 for host in crawler.ids_by_host}
+    refreshed = crawler.tick()
+    assert sorted(fetched) == ["SAK1", "SAK2"]
+    assert "Skipping SAK1: connection reset" in capsys.readouterr().out
+    assert refreshed is not None
+    assert [entry["status"][0]["bib"] for entry in refreshed[0].entries] == ["Ost", "Feuerbach"]
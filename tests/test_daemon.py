@@ -0,0 +1,89 @@
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import pytest
+
+from bibchecker.client import request
+from bibchecker.daemon import FRAME, DaemonServer, daemon_running, serve
+from bibchecker.database import save_database
+
+
+@pytest.fixture
+def daemon(tmp_path: Path) -> Iterator[str]:
+    path = str(tmp_path / "d.sock")
+    server = DaemonServer(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def test_output_and_status(daemon: str, tmp_path: Path, capsysbinary: pytest.CaptureFixture[bytes],
+                           monkeypatch: pytest.MonkeyPatch, make_holding: Callable[..., Dict[str, Any]],
+                           make_entry: Callable[..., Dict[str, Any]]) -> None:
+    save_database(str(tmp_path / "cache.json"), [make_entry("SAK1", make_holding("Ost"))])
+    monkeypatch.chdir(tmp_path)
+    assert request(daemon, ["--load-db", "cache.json", "--format", "json"]) == 0
+    out, err = capsysbinary.readouterr()
+    assert b'"SAK1"' in out and err == b""
+
+
+def test_failures_reach_client(daemon: str, tmp_path: Path, capsysbinary: pytest.CaptureFixture[bytes]) -> None:
+    assert request(daemon, ["--load-db", str(tmp_path / "missing.json")]) == 1
+    out, err = capsysbinary.readouterr()
+    assert out == b"" and err.startswith(b"Error:")
+
+    assert request(daemon, ["--no-such-option"]) == 1
+    assert b"Usage:" in capsysbinary.readouterr().err
+
+
+def test_serve_refuses_live_socket(daemon: str) -> None:
+    assert daemon_running(daemon)
+    with pytest.raises(SystemExit):
+        serve(daemon)
+    assert daemon_running(daemon)
+
+
+def test_stale_socket_is_not_running(tmp_path: Path) -> None:
+    path = str(tmp_path / "stale.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+    assert Path(path).exists()
+    assert not daemon_running(path)
+
+
+def raw_request(path: str, line: bytes) -> List[Tuple[bytes, bytes]]:
+    frames = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(line)
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as response:
+            while True:
+                header = response.read(FRAME.size)
+                if not header:
+                    return frames
+                channel, length = FRAME.unpack(header)
+                frames.append((channel, response.read(length)))
+
+
+def test_probe_gets_no_reply(daemon: str, capsys: pytest.CaptureFixture[str]) -> None:
+    assert raw_request(daemon, b"") == []
+    assert raw_request(daemon, b"\n") == []
+    assert "Traceback" not in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("line", [b"{not json\n", b'{"argv": "--all"}\n', b"[1, 2]\n"])
+def test_malformed_request_gets_error(daemon: str, line: bytes) -> None:
+    frames = raw_request(daemon, line)
+    assert frames[0][0] == b"e" and frames[0][1].startswith(b"Error: malformed request")
+    assert frames[-1] == (b"x", b"1")
+
+
+@pytest.mark.parametrize("argv", [["--daemon", "other.sock"], ["--worker", "host:7045"]])
+def test_client_cannot_start_roles(daemon: str, argv: List[str], capsysbinary: pytest.CaptureFixture[bytes]) -> None:
+    assert request(daemon, argv) == 1
+    assert b"cannot run on behalf of a client" in capsysbinary.readouterr().err
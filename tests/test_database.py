@@ -0,0 +1,93 @@
+import copy
+import json
+import os
+import stat
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker import database
+from bibchecker.database import DatabaseReader, load_database, save_database
+from bibchecker.filters import filter_ids
+
+
+@pytest.mark.parametrize("name", ["cache.json", "cache.jsonl"])
+def test_save_and_load(tmp_path: Path, name: str, entries: List[Dict[str, Any]]) -> None:
+    target = tmp_path / name
+    save_database(str(target), entries)
+    assert load_database(str(target)) == entries
+    assert os.listdir(tmp_path) == [name]
+    assert stat.S_IMODE(target.stat().st_mode) == 0o644
+
+
+def test_save_keeps_mode_and_cleans_up(tmp_path: Path, entries: List[Dict[str, Any]],
+                                       monkeypatch: pytest.MonkeyPatch) -> None:
+    target = tmp_path / "cache.json"
+    save_database(str(target), entries[:1])
+    target.chmod(0o640)
+    save_database(str(target), entries)
+    assert stat.S_IMODE(target.stat().st_mode) == 0o640
+
+    def broken(*args: Any, **kwargs: Any) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(database.json, "dump", broken)
+    with pytest.raises(OSError):
+        save_database(str(target), entries)
+    assert os.listdir(tmp_path) == ["cache.json"]
+    assert load_database(str(target)) == entries
+
+
+@pytest.fixture
+def odd_entries(make_holding: Callable[..., Dict[str, Any]],
+                make_entry: Callable[..., Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        make_entry("SAK5", make_holding('Mailänder "Platz'), make_holding("Ost", False)),
+        make_entry("SAK6", make_holding("A/B")),
+        make_entry("SAK7", make_holding('Mailänder "Platz', False)),
+    ]
+
+
+def write_lines(target: Path, entries: List[Dict[str, Any]], ensure_ascii: bool) -> None:
+    with target.open("w", encoding="utf-8") as fd:
+        for entry in entries:
+            line = json.dumps(entry, ensure_ascii=ensure_ascii, separators=(",", " : "))
+            fd.write(line.replace("/", "\\/") + "\n")
+
+
+FILTERS = [
+    (True, False, []),
+    (False, False, []),
+    (False, True, []),
+    (False, True, ["Ost"]),
+    (True, True, ["Feuerbach", "Vaihingen"]),
+    (False, True, ['Mailänder "Platz']),
+    (False, True, ["A/B", "Mediathek im KUBUS"]),
+    (False, False, ["Ost"]),
+]
+
+
+@pytest.mark.parametrize("all_data, only_available, bibfilter", FILTERS)
+@pytest.mark.parametrize("layout", ["json", "jsonl", "jsonl-ascii"])
+def test_reader_matches_filter_ids(tmp_path: Path, entries: List[Dict[str, Any]], odd_entries: List[Dict[str, Any]],
+                                   layout: str, all_data: bool, only_available: bool, bibfilter: List[str]) -> None:
+    data = entries + odd_entries
+    if layout == "jsonl-ascii":
+        target = tmp_path / "cache.jsonl"
+        write_lines(target, data, ensure_ascii=True)
+    else:
+        target = tmp_path / f"cache.{layout}"
+        save_database(str(target), data)
+    expected = list(filter_ids(copy.deepcopy(data), all_data, only_available, bibfilter))
+    reader = DatabaseReader(str(target), all_data, only_available, bibfilter, chunk_size=64)
+    assert list(reader) == expected
+    assert reader.scanned == len(data)
+
+
+def test_truncated_array(tmp_path: Path, entries: List[Dict[str, Any]]) -> None:
+    target = tmp_path / "cache.json"
+    save_database(str(target), entries)
+    target.write_text(target.read_text(encoding="utf-8")[:-40], encoding="utf-8")
+    with pytest.raises(ValueError, match="Truncated"):
+        list(DatabaseReader(str(target)))
@@ -0,0 +1,50 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker.export import check_export, export_parquet, flatten, last_fetched
+
+
+REFRESHED = datetime(2026, 10, 19, 4, 0, 0)
+
+
+def test_flatten_one_row_per_holding(entries: List[Dict[str, Any]]) -> None:
+    columns = flatten(entries, REFRESHED)
+    assert columns["id"] == ["SAK1", "SAK1", "SAK2", "SAK2", "SAK3", "SAK4", "163581"]
+    assert columns["bib"][5] is None
+    assert columns["fetched_at"][0] == REFRESHED
+
+
+def test_exports_never_overwrite(tmp_path: Path, make_holding: Callable[..., Dict[str, Any]],
+                                 make_entry: Callable[..., Dict[str, Any]]) -> None:
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    first = export_parquet([make_entry("SAK1", make_holding("Ost"))], tmp_path, REFRESHED)
+    second = export_parquet([make_entry("SAK2", make_holding("Ost"))], tmp_path, REFRESHED)
+    assert first != second
+    assert first.parent == tmp_path / "refresh_date=2026-10-19"
+    assert sorted(path.name for path in first.parent.iterdir()) == sorted([first.name, second.name])
+    assert pq.read_table(str(second)).column("id").to_pylist() == ["SAK2"]
+
+
+def test_partition_follows_fetch_time(tmp_path: Path, make_holding: Callable[..., Dict[str, Any]],
+                                      make_entry: Callable[..., Dict[str, Any]]) -> None:
+    pytest.importorskip("pyarrow")
+    old = [
+        make_entry("SAK1", make_holding("Ost"), fetched_at="2025-03-01T22:10:00"),
+        make_entry("SAK2", make_holding("Ost"), fetched_at="2025-03-02T01:30:00"),
+    ]
+    assert last_fetched(old) == datetime(2025, 3, 2, 1, 30)
+    target = export_parquet(iter(old), tmp_path)
+    assert target.parent == tmp_path / "refresh_date=2025-03-02"
+    assert target.name.startswith("part-013000-")
+    assert last_fetched([make_entry("SAK3")]) is None
+
+def test_check_export_without_pyarrow(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="bibchecker\\[export\\]"):
+        check_export()
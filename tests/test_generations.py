@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from bibchecker.generations import CURRENT, Generation, current_dir
+
+
+def render(output_dir: Path, pages: dict, keep: int = 3) -> Generation:
+    with Generation(output_dir, keep) as generation:
+        for name, text in pages.items():
+            (generation.path / name).write_text(text, encoding="utf-8")
+    return generation
+
+
+def generations(output_dir: Path) -> List[str]:
+    return sorted(p.name for p in (output_dir / "generations").iterdir())
+
+
+def test_publish_switches_current(tmp_path: Path) -> None:
+    assert current_dir(tmp_path) == tmp_path
+    first = render(tmp_path, {"a.html": "one"})
+    assert (tmp_path / CURRENT).resolve() == first.path.resolve()
+    assert (current_dir(tmp_path) / "a.html").read_text(encoding="utf-8") == "one"
+    second = render(tmp_path, {"a.html": "two"})
+    assert (current_dir(tmp_path) / "a.html").read_text(encoding="utf-8") == "two"
+    assert (first.path / "a.html").read_text(encoding="utf-8") == "one"
+    assert second.linked == 0
+
+
+def test_unchanged_pages_are_hardlinked(tmp_path: Path) -> None:
+    first = render(tmp_path, {"a.html": "same", "b.html": "old"})
+    second = render(tmp_path, {"a.html": "same", "b.html": "new"})
+    assert second.linked == 1
+    assert os.path.samefile(first.path / "a.html", second.path / "a.html")
+    assert not os.path.samefile(first.path / "b.html", second.path / "b.html")
+
+
+def test_failed_render_keeps_current(tmp_path: Path) -> None:
+    first = render(tmp_path, {"a.html": "one"})
+    with pytest.raises(RuntimeError):
+        with Generation(tmp_path) as generation:
+            (generation.path / "a.html").write_text("half", encoding="utf-8")
+            raise RuntimeError("template error")
+    assert (tmp_path / CURRENT).resolve() == first.path.resolve()
+    assert generations(tmp_path) == [first.path.name]
+
+
+def test_prune_keeps_newest(tmp_path: Path) -> None:
+    published = [render(tmp_path, {"a.html": str(idx)}, keep=2).path.name for idx in range(4)]
+    assert generations(tmp_path) == published[-2:]
+    assert (current_dir(tmp_path) / "a.html").read_text(encoding="utf-8") == "3"
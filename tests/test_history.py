@@ -0,0 +1,68 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from flask import Flask
+
+from bibchecker.history import HistoryStore, diff_entries
+
+WHEN = datetime(2026, 10, 19, 4, 0)
+
+
+def flip(make_entry: Callable[..., Dict[str, Any]], make_holding: Callable[..., Dict[str, Any]],
+         ident: str, store: HistoryStore) -> None:
+    store.record([make_entry(ident, make_holding("Ost"))], [make_entry(ident, make_holding("Ost", False))], WHEN)
+
+
+def test_diff_keys_copies_by_occurrence(make_entry: Callable[..., Dict[str, Any]],
+                                        make_holding: Callable[..., Dict[str, Any]]) -> None:
+    old = make_entry("SAK1", make_holding("Ost"), make_holding("Ost"))
+    new = make_entry("SAK1", make_holding("Ost"), make_holding("Ost", False))
+    changes = diff_entries([old], [new, make_entry("SAK2", make_holding("Ost"))], WHEN)
+    assert [(change["id"], change["old"], change["new"]) for change in changes] == [
+        ("SAK1", "Verfügbar", "Ausgeliehen - Fällig am: 01.11.2026")
+    ]
+    assert changes[0]["time"] == "2026-10-19T04:00:00"
+
+
+def test_cursor_continues_after_reopen(tmp_path: Path, make_entry: Callable[..., Dict[str, Any]],
+                                       make_holding: Callable[..., Dict[str, Any]]) -> None:
+    store = HistoryStore(str(tmp_path / "history.jsonl"))
+    assert store.last_cursor() == 0 and store.changes_since(0) == []
+    flip(make_entry, make_holding, "SAK1", store)
+    flip(make_entry, make_holding, "SAK2", store)
+    assert store.last_cursor() == 2
+
+    reopened = HistoryStore(store.filename)
+    flip(make_entry, make_holding, "SAK3", reopened)
+    assert [change["seq"] for change in reopened.changes_since(0)] == [1, 2, 3]
+    assert [change["id"] for change in reopened.changes_since(1, limit=1)] == ["SAK2"]
+    # appends by another store are noticed before the next record
+    flip(make_entry, make_holding, "SAK4", store)
+    assert store.last_cursor() == 4
+
+
+def test_torn_lines_are_skipped(tmp_path: Path, make_entry: Callable[..., Dict[str, Any]],
+                                make_holding: Callable[..., Dict[str, Any]]) -> None:
+    target = tmp_path / "history.jsonl"
+    store = HistoryStore(str(target))
+    flip(make_entry, make_holding, "SAK1", store)
+    with target.open("a", encoding="utf-8") as fd:
+        fd.write("garbage\n{\"id\": \"SAK2\", \"se")
+    reopened = HistoryStore(str(target))
+    assert reopened.last_cursor() == 1
+    flip(make_entry, make_holding, "SAK3", reopened)
+    assert [(change["seq"], change["id"]) for change in reopened.changes_since(0)] == [(1, "SAK1"), (2, "SAK3")]
+    assert reopened.changes_since(1)[0]["id"] == "SAK3"
+
+
+def test_changes_route_pages_by_cursor(app: Flask, make_entry: Callable[..., Dict[str, Any]],
+                                       make_holding: Callable[..., Dict[str, Any]]) -> None:
+    for ident in ("SAK1", "SAK2", "SAK3"):
+        flip(make_entry, make_holding, ident, app.config["HISTORY"])
+    client = app.test_client()
+    first = client.get("/api/changes?limit=2").get_json()
+    assert [change["id"] for change in first["changes"]] == ["SAK1", "SAK2"]
+    rest = client.get(f"/api/changes?since={first['cursor']}").get_json()
+    assert rest["cursor"] == 3 and [change["id"] for change in rest["changes"]] == ["SAK3"]
+    assert client.get("/api/changes?since=3").get_json() == {"cursor": 3, "changes": []}
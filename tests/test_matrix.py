@@ -0,0 +1,49 @@
+import copy
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker.filters import filter_ids
+from bibchecker.matrix import AvailabilityMatrix, iter_bits, popcount
+
+
+def test_bit_helpers() -> None:
+    assert popcount(0) == 0 and popcount(0b101101) == 4
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 200)) == [200]
+
+
+@pytest.mark.parametrize("all_data, only_available, bibfilter", [
+    (False, False, None),
+    (True, False, None),
+    (False, True, None),
+    (False, True, ["Ost"]),
+    (True, True, ["Feuerbach", "Mediathek im KUBUS"]),
+    (False, False, ["Vaihingen"]),
+])
+def test_filter_matches_filter_ids(entries: List[Dict[str, Any]], all_data: bool, only_available: bool,
+                                   bibfilter: List[str]) -> None:
+    original = copy.deepcopy(entries)
+    matrix = AvailabilityMatrix(entries)
+    expected = list(filter_ids(copy.deepcopy(entries), all_data, only_available, bibfilter))
+    assert matrix.filter(all_data, only_available, bibfilter) == expected
+    assert entries == original
+
+
+def test_counts_and_mask(entries: List[Dict[str, Any]]) -> None:
+    matrix = AvailabilityMatrix(entries)
+    assert matrix.libraries == ["Feuerbach", "Mediathek im KUBUS", "Ost", "Vaihingen"]
+    assert matrix.counts() == {"Ost": 1, "Feuerbach": 1, "Vaihingen": 1, "Mediathek im KUBUS": 1}
+    assert matrix.counts(all_data=True) == {"Ost": 2, "Feuerbach": 2, "Vaihingen": 1, "Mediathek im KUBUS": 1}
+    assert matrix.mask(["Ost", "Vaihingen"]) == 0b00011
+    assert matrix.mask(["Ost"], all_data=True) == 0b00101
+    assert matrix.mask() == 0b10011
+
+
+def test_rank_orders_by_count_then_name(entries: List[Dict[str, Any]], make_entry: Callable[..., Dict[str, Any]],
+                                        make_holding: Callable[..., Dict[str, Any]]) -> None:
+    matrix = AvailabilityMatrix(entries + [make_entry("SAK5", make_holding("Vaihingen"))])
+    assert matrix.rank() == [("Vaihingen", 2), ("Feuerbach", 1), ("Mediathek im KUBUS", 1), ("Ost", 1)]
+    # limited to SAK2 and SAK3: Ost has nothing borrowable there and is left out
+    assert matrix.rank(items=0b00110) == [("Feuerbach", 1), ("Vaihingen", 1)]
+    assert matrix.rank(bibs=["Ost", "Vaihingen"]) == [("Vaihingen", 2), ("Ost", 1)]
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+from bibchecker.metadata import MetadataCache
+from bibchecker.parsers import parse_id
+from bibchecker.parsers.stuttgart import StuttgartParser
+
+
+def test_fields_expire(tmp_path: Path, make_entry: Callable[..., Dict[str, Any]],
+                       make_holding: Callable[..., Dict[str, Any]]) -> None:
+    cache = MetadataCache(str(tmp_path / "metadata.json"), timedelta(days=30))
+    cache.put("SAK1", make_entry("SAK1", make_holding("Ost"), Verfasser="Tolkien", fetched_at="2026-10-19T04:00:00"))
+    cache.put("SAK2", make_entry("SAK2", Titel=None))
+    assert cache.get("SAK1") == {"Titel": "Titel SAK1", "Verfasser": "Tolkien"}
+    assert cache.get("SAK2") is None
+
+    cache.data["SAK1"]["fetched_at"] = (datetime.now() - timedelta(days=31)).isoformat(timespec="seconds")
+    assert cache.get("SAK1") is None
+    cache.save()
+    reloaded = MetadataCache(cache.filename, timedelta(days=60))
+    assert reloaded.get("SAK1") == {"Titel": "Titel SAK1", "Verfasser": "Tolkien"}
+
+
+def test_fresh_metadata_skips_metadata_sections(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                                stuttgart_page: str) -> None:
+    requested: List[bool] = []
+
+    def fetch(cls: Any, ident: str, with_metadata: bool = True, full_page: bool = False) -> Tuple[str, str]:
+        requested.append(with_metadata)
+        return stuttgart_page, cls.cut_sections(stuttgart_page, with_metadata)
+
+    monkeypatch.setattr(StuttgartParser, "fetch_html", classmethod(fetch))
+    cache = MetadataCache(str(tmp_path / "metadata.json"))
+    first = parse_id("SAK1", metadata=cache)
+    second = parse_id("SAK1", metadata=cache)
+    assert requested == [True, False]
+    assert second["Titel"] == first["Titel"] == "Der Hobbit"
+    assert second["status"] == first["status"]
+
+    cache.max_age = timedelta(0)
+    cache.data["SAK1"]["fetched_at"] = "2026-01-01T00:00:00"
+    parse_id("SAK1", metadata=cache)
+    assert requested[-1] is True
@@ -0,0 +1,32 @@
+import io
+from typing import Any, Callable, Dict, Iterator
+
+from bibchecker.output import html_print
+
+
+def test_html_streams_entries_as_they_arrive(make_entry: Callable[..., Dict[str, Any]],
+                                             make_holding: Callable[..., Dict[str, Any]]) -> None:
+    out = io.StringIO()
+
+    def arriving() -> Iterator[Dict[str, Any]]:
+        for idx in range(3):
+            if idx:
+                # the previous entry is written before the next one is fetched
+                assert f"Titel SAK{idx - 1}" in out.getvalue()
+            yield make_entry(f"SAK{idx}", make_holding("Ost"))
+        yield make_entry("SAK9", make_holding("Ost"), Titel="<script>alert(1)</script>")
+
+    html_print(arriving(), ["SAK0", "SAK1", "SAK2", "SAK9"], out=out)
+    page = out.getvalue()
+    assert "4 IDs" in page
+    assert "<script>alert" not in page and "&lt;script&gt;alert(1)&lt;/script&gt;" in page
+    assert page.rstrip().endswith("</html>")
+
+
+def test_html_by_bib_groups_holdings(entries: Any) -> None:
+    out = io.StringIO()
+    html_print(entries, None, sort_by="bib", out=out)
+    sections = {part.split("</h2>")[0]: part for part in out.getvalue().split("<h2>")[1:]}
+    assert set(sections) == {"Ost", "Feuerbach", "Vaihingen", "Mediathek im KUBUS"}
+    assert "Titel SAK2" in sections["Vaihingen"] and "Titel SAK1" not in sections["Vaihingen"]
+    assert "Titel SAK3" in sections["Ost"]
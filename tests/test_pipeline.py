@@ -0,0 +1,83 @@
+import time
+from pathlib import Path
+from typing import Any, Iterator, Tuple
+
+import pytest
+
+from bibchecker.archive import ArchiveReader, ArchiveWriter
+from bibchecker.base import FetchError
+from bibchecker.parsers.remseck import RemseckParser
+from bibchecker.parsers.stuttgart import StuttgartParser
+from bibchecker.pipeline import ParserPool, parse_pipelined
+from bibchecker.profiling import Profiler
+
+
+IDS = ["SAK1", "163581", "SAK2", "SAK3"]
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch: pytest.MonkeyPatch, stuttgart_page: str, remseck_page: str) -> None:
+    def fetch(cls: Any, ident: str, with_metadata: bool = True, full_page: bool = False) -> Tuple[str, str]:
+        if ident == "SAK2":
+            raise FetchError("connection reset")
+        page = stuttgart_page if ident.startswith("SAK") else remseck_page
+        return page, cls.cut_sections(page, with_metadata)
+
+    monkeypatch.setattr(StuttgartParser, "fetch_html", classmethod(fetch))
+    monkeypatch.setattr(RemseckParser, "fetch_html", classmethod(fetch))
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[ParserPool]:
+    parsers = ParserPool(2)
+    yield parsers
+    parsers.close()
+
+
+def test_keeps_order_and_skips_failed_ids(pool: ParserPool, capsys: pytest.CaptureFixture[str]) -> None:
+    entries = list(parse_pipelined(IDS, fetchers=2, parsers=pool, window=2))
+    assert [entry["id"] for entry in entries] == ["SAK1", "163581", "SAK3"]
+    assert entries[1]["status"][0]["bib"] == "Mediathek im KUBUS"
+    assert "Skipping SAK2: connection reset" in capsys.readouterr().out
+
+
+def test_archive_gets_received_pages(pool: ParserPool, tmp_path: Path, stuttgart_page: str) -> None:
+    with ArchiveWriter(str(tmp_path / "pages.arc")) as archive:
+        entries = list(parse_pipelined(["SAK1"], fetchers=1, parsers=pool, archive=archive))
+    with ArchiveReader(str(tmp_path / "pages.arc")) as reader:
+        assert reader.get("SAK1") == stuttgart_page
+        assert reader.fetched_at("SAK1")
+    assert entries[0]["Titel"]
+
+
+def test_pool_outlives_refreshes(pool: ParserPool) -> None:
+    list(parse_pipelined(IDS[:1], fetchers=1, parsers=pool))
+    executor = pool._executor
+    assert executor is not None
+    list(parse_pipelined(IDS[:1], fetchers=1, parsers=pool))
+    assert pool._executor is executor
+
+
+def test_broken_pool_is_replaced(pool: ParserPool) -> None:
+    list(parse_pipelined(IDS[:1], fetchers=1, parsers=pool))
+    executor = pool._executor
+    assert executor is not None
+    for process in list(executor._processes.values()):  # type: ignore[attr-defined]
+        process.kill()
+    deadline = time.monotonic() + 10
+    while not executor._broken and time.monotonic() < deadline:  # type: ignore[attr-defined]
+        time.sleep(0.05)
+    entries = list(parse_pipelined(["SAK1", "SAK3"], fetchers=1, parsers=pool))
+    assert [entry["id"] for entry in entries] == ["SAK1", "SAK3"]
+    assert pool._executor is not executor
+
+
+def test_parser_timings_reach_profiler(pool: ParserPool) -> None:
+    profiler = Profiler()
+    profiler.start()
+    try:
+        list(parse_pipelined(["SAK1"], fetchers=1, parsers=pool))
+    finally:
+        profiler.stop()
+    phases = {(record["phase"], record["id"]) for record in profiler.records}
+    assert {("soup", "SAK1"), ("parse_holdings", "SAK1")} <= phases
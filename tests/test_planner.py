@@ -0,0 +1,94 @@
+import random
+from itertools import combinations
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker import planner
+from bibchecker.matrix import AvailabilityMatrix, popcount
+from bibchecker.planner import plan_trip
+
+
+@pytest.fixture
+def spread(make_holding: Callable[..., Dict[str, Any]], make_entry: Callable[..., Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # A covers 0-3, B covers 3-5, C covers 6, D duplicates part of A
+    layout = {"A": [0, 1, 2, 3], "B": [3, 4, 5], "C": [6], "D": [0, 1]}
+    items = []
+    for idx in range(7):
+        bibs = [bib for bib, covered in layout.items() if idx in covered]
+        items.append(make_entry(f"SAK{idx}", *(make_holding(bib) for bib in bibs)))
+    return items
+
+
+@pytest.fixture(params=["exact", "greedy"])
+def search(request: Any, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "greedy":
+        monkeypatch.setattr(planner, "EXACT_LIMIT", 0)
+    return str(request.param)
+
+
+def test_plan_covers_most_items(search: str, spread: List[Dict[str, Any]]) -> None:
+    plan = plan_trip(AvailabilityMatrix(spread), 2)
+    assert plan.exact == (search == "exact")
+    assert [stop.bib for stop in plan.stops] == ["A", "B"]
+    assert plan.covered == 6 and plan.available == 7
+    assert [entry["id"] for entry in plan.stops[1].entries] == ["SAK4", "SAK5"]
+
+
+def test_plan_never_adds_useless_stops(search: str, spread: List[Dict[str, Any]]) -> None:
+    plan = plan_trip(AvailabilityMatrix(spread), 5, preferred=["D"])
+    assert [stop.bib for stop in plan.stops] == ["A", "B", "C"]
+    assert plan.covered == plan.available == 7
+
+
+def test_greedy_skips_preferred_library_without_gain(monkeypatch: pytest.MonkeyPatch,
+                                                     make_holding: Callable[..., Dict[str, Any]],
+                                                     make_entry: Callable[..., Dict[str, Any]]) -> None:
+    monkeypatch.setattr(planner, "EXACT_LIMIT", 0)
+    items = [make_entry("SAK1", make_holding("A"), make_holding("P"))]
+    plan = plan_trip(AvailabilityMatrix(items), 2, preferred=["P"])
+    assert len(plan.stops) == 1
+    assert plan.covered == 1
+
+
+def test_plan_prefers_preferred_on_ties(search: str, make_holding: Callable[..., Dict[str, Any]],
+                                        make_entry: Callable[..., Dict[str, Any]]) -> None:
+    items = [make_entry("SAK1", make_holding("A"), make_holding("B"))]
+    plan = plan_trip(AvailabilityMatrix(items), 1, preferred=["B"])
+    assert [stop.bib for stop in plan.stops] == ["B"]
+
+
+def test_plan_limited_to_candidates(search: str, spread: List[Dict[str, Any]]) -> None:
+    plan = plan_trip(AvailabilityMatrix(spread), 2, candidates=["C", "D"])
+    assert sorted(stop.bib for stop in plan.stops) == ["C", "D"]
+    assert plan.available == 3
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pruned_search_matches_all_combinations(seed: int, make_holding: Callable[..., Dict[str, Any]],
+                                                make_entry: Callable[..., Dict[str, Any]]) -> None:
+    rng = random.Random(seed)
+    bibs = [f"B{idx}" for idx in range(rng.randint(1, 9))]
+    items = [make_entry(f"SAK{idx}", *(make_holding(bib) for bib in bibs if rng.random() < 0.3)) for idx in range(30)]
+    preferred = rng.sample(bibs, rng.randint(0, len(bibs)))
+    matrix = AvailabilityMatrix(items)
+    size = rng.randint(1, 4)
+
+    def score(combo: Any) -> Any:
+        covered = 0
+        for bib in combo:
+            covered |= matrix.borrowable.get(bib, 0)
+        return popcount(covered), -len(combo), sum(1 for bib in combo if bib in preferred)
+
+    candidates = [combo for k in range(1, size + 1) for combo in combinations(bibs, k)]
+    best = max([score(combo) for combo in candidates], default=(0, 0, 0))
+    plan = plan_trip(matrix, size, preferred=preferred)
+    assert plan.exact
+    assert score([stop.bib for stop in plan.stops]) == max(best, (0, 0, 0))
+
+
+def test_search_over_budget_falls_back_to_greedy(monkeypatch: pytest.MonkeyPatch, spread: List[Dict[str, Any]]) -> None:
+    monkeypatch.setattr(planner, "EXACT_LIMIT", 1)
+    plan = plan_trip(AvailabilityMatrix(spread), 2)
+    assert not plan.exact
+    assert [stop.bib for stop in plan.stops] == ["A", "B"]
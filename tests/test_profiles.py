@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker import profiles as profiles_module
+from bibchecker.database import load_database
+from bibchecker.generations import current_dir
+from bibchecker.profiles import fetch_shared, load_profiles, refresh_profiles, union_ids
+
+
+@pytest.fixture
+def fetched(monkeypatch: pytest.MonkeyPatch, make_holding: Callable[..., Dict[str, Any]],
+            make_entry: Callable[..., Dict[str, Any]]) -> List[str]:
+    calls: List[str] = []
+
+    def parse_id(ident: str, *args: Any) -> Dict[str, Any]:
+        calls.append(ident)
+        if ident == "SAK9":
+            raise ValueError("no such item")
+        return make_entry(ident, make_holding("Ost"))
+
+    monkeypatch.setattr(profiles_module, "parse_id", parse_id)
+    return calls
+
+
+def test_union_keeps_first_seen_order() -> None:
+    assert union_ids([["SAK2", "SAK1"], ["SAK1", "SAK3", "SAK2"]]) == ["SAK2", "SAK1", "SAK3"]
+
+
+def test_fetch_shared_fetches_each_id_once(fetched: List[str]) -> None:
+    shared = fetch_shared(["SAK1", "SAK9", "SAK1", "SAK2"])
+    assert fetched == ["SAK1", "SAK9", "SAK2"]
+    assert list(shared) == ["SAK1", "SAK2"]
+
+
+def test_refresh_renders_every_profile_from_one_fetch(tmp_path: Path, fetched: List[str]) -> None:
+    (tmp_path / "a.txt").write_text("SAK1\nSAK2\n", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("SAK2\nSAK3\nSAK9\n", encoding="utf-8")
+    config = [
+        {"name": "a", "input_file": "a.txt", "output_dir": "out/a", "my_bibs": "Ost, Feuerbach"},
+        {"name": "b", "input_file": "b.txt", "output_dir": "out/b", "cache_file": "b.jsonl"},
+    ]
+    (tmp_path / "profiles.json").write_text(json.dumps(config), encoding="utf-8")
+    loaded = load_profiles(str(tmp_path / "profiles.json"))
+    assert loaded[0].my_bibs == ["Ost", "Feuerbach"]
+    assert loaded[1].cache_file == tmp_path / "b.jsonl"
+
+    results = refresh_profiles(loaded, datetime(2026, 10, 19, 4, 0))
+    assert fetched == ["SAK1", "SAK2", "SAK3", "SAK9"]
+    assert [[entry["id"] for entry in result.entries] for result in results] == [["SAK1", "SAK2"], ["SAK2", "SAK3"]]
+    assert [entry["id"] for entry in load_database(str(tmp_path / "b.jsonl"))] == ["SAK2", "SAK3"]
+    assert (current_dir(tmp_path / "out" / "a") / "index.html").exists()
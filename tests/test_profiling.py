@@ -0,0 +1,58 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from bibchecker import cli
+from bibchecker.cli import execute
+from bibchecker.profiling import Profiler, phase
+
+
+def test_cpu_time_is_per_thread() -> None:
+    profiler = Profiler()
+
+    def wait() -> None:
+        with profiler.phase("fetch", "SAK1"):
+            time.sleep(0.2)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        pass
+    waiter.join()
+    [record] = profiler.records
+    assert record["wall"] >= 0.2
+    assert record["cpu"] < 0.1
+
+
+def test_cli_appends_summary_to_log(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    log_file = tmp_path / "logs" / "profile.jsonl"
+    for _ in range(2):
+        execute(["--profile-log", str(log_file), "--format", "json"])
+    assert "Slowest phases" in capsys.readouterr().err
+    lines = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 2
+    assert "render" in lines[0]["phases"] and lines[0]["refreshed_at"]
+
+
+def test_render_excludes_fetching(tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+                                  capsys: pytest.CaptureFixture[str]) -> None:
+    def parse_id(ident: str, *args: Any) -> Dict[str, Any]:
+        with phase("fetch", ident):
+            time.sleep(0.1)
+        # like waiting for a download thread, outside of any phase
+        time.sleep(0.1)
+        return {"id": ident, "library": "stuttgart", "Titel": ident, "status": []}
+
+    monkeypatch.setattr(cli, "parse_id", parse_id)
+    log_file = tmp_path / "profile.jsonl"
+    execute(["--profile-log", str(log_file), "--format", "html", "SAK1", "SAK2"])
+    assert "SAK2" in capsys.readouterr().out
+    phases = json.loads(log_file.read_text(encoding="utf-8"))["phases"]
+    assert phases["fetch"]["wall"] >= 0.2
+    assert phases["render"]["wall"] < 0.1
+    assert phases["filter"]["count"] == 2
@@ -0,0 +1,72 @@
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from bibchecker.query import QueryError, compile_query, due_date, select, tokenize
+
+
+TODAY = date(2026, 10, 19)
+
+
+def matching(text: str, entries: List[Dict[str, Any]]) -> List[str]:
+    return [entry["id"] for entry in select(entries, compile_query(text, TODAY))]
+
+
+def test_tokenize() -> None:
+    assert tokenize('sig ^= "K J" AND not available') == [
+        ("word", "sig", 0), ("op", "^=", 4), ("string", "K J", 7), ("and", "AND", 13),
+        ("not", "not", 17), ("word", "available", 21),
+    ]
+
+
+def test_due_date() -> None:
+    assert due_date({"available": "Ausgeliehen - Fällig am: 03.11.2026"}) == date(2026, 11, 3)
+    assert due_date({"available": "due 2026-11-01"}) == date(2026, 11, 1)
+    assert due_date({"available": "Verfügbar"}) is None
+
+
+@pytest.mark.parametrize("text, ids", [
+    ("bib = ost", ["SAK1", "SAK3"]),
+    ("bib != ost", ["SAK1", "SAK2", "SAK4", "163581"]),
+    ("standort ~ KIND", ["SAK1"]),
+    ("bib ^= 'mediathek'", ["163581"]),
+    ("available and bib = Ost", ["SAK1"]),
+    ("not available", ["SAK1", "SAK3", "SAK4"]),
+    ("due <= 13", ["SAK1", "SAK3"]),
+    ("due > 13", []),
+    ("library = remseck or (bib = Vaihingen and available = true)", ["SAK2", "163581"]),
+    ("title ~ sak4", ["SAK4"]),
+])
+def test_select(text: str, ids: List[str], entries: List[Dict[str, Any]]) -> None:
+    assert matching(text, entries) == ids
+
+
+def test_select_keeps_matching_holdings(entries: List[Dict[str, Any]]) -> None:
+    [entry] = select(entries[:1], compile_query("bib = Feuerbach", TODAY))
+    assert [h["bib"] for h in entry["status"]] == ["Feuerbach"]
+    assert [h["bib"] for h in entries[0]["status"]] == ["Ost", "Feuerbach"]
+
+
+@pytest.mark.parametrize("text", [
+    "due ~ 3",
+    "available ~ t",
+    "due ^= 1",
+    "colour = red",
+    "bib =",
+    "(bib = Ost",
+    "bib = Ost and",
+    "due < soon",
+    "bib = Ost )",
+    "bib = Ost ; sig = A",
+])
+def test_invalid_queries(text: str) -> None:
+    with pytest.raises(QueryError):
+        compile_query(text, TODAY)
+
+
+def test_contains_ignores_non_text_values(make_holding: Callable[..., Dict[str, Any]],
+                                          make_entry: Callable[..., Dict[str, Any]]) -> None:
+    entry = make_entry("SAK9", make_holding("Ost", sig=None))
+    entry["Titel"] = None
+    assert matching("sig ~ a or title ~ a", [entry]) == []
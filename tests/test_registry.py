@@ -0,0 +1,63 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from bibchecker import parsers
+from bibchecker.parsers import BUILTIN_SPECS, ParserSpec, find_spec, get_parser_for_id, normalize_id
+
+
+@pytest.fixture
+def plugins(monkeypatch: pytest.MonkeyPatch) -> Iterator[List[ParserSpec]]:
+    specs: List[ParserSpec] = []
+    monkeypatch.setattr(parsers, "_entry_point_specs", lambda: specs)
+    parsers._registry.cache_clear()
+    yield specs
+    parsers._registry.cache_clear()
+
+
+def test_dispatch_without_import() -> None:
+    assert find_spec(" sak123 ") is parsers.STUTTGART
+    assert find_spec("163581") is parsers.REMSECK
+    assert find_spec("163581X") is None
+    assert get_parser_for_id("SAK1").name == "stuttgart"
+
+
+def test_builtins_registered_once() -> None:
+    specs, _ = parsers._registry()
+    names = [spec.name for spec in specs]
+    assert len(names) == len(set(names))
+    assert list(specs[: len(BUILTIN_SPECS)]) == BUILTIN_SPECS
+
+
+def test_normalize_unknown_id_unchanged() -> None:
+    assert normalize_id("xyz") == "xyz"
+
+
+def test_cli_import_is_light() -> None:
+    code = "import sys, bibchecker.cli; print(sorted({'requests', 'bs4'} & set(sys.modules)))"
+    root = Path(__file__).resolve().parents[1]
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_plugin_patterns_are_isolated(plugins: List[ParserSpec], capsys: pytest.CaptureFixture[str]) -> None:
+    plugins.extend([
+        ParserSpec("broken", r"(BR", "broken:Parser"),
+        ParserSpec("named", r"(?P<p0>LB)\d+", "named:Parser"),
+        ParserSpec("twice", r"(\d)\1X", "twice:Parser"),
+        ParserSpec("flagged", r"(?i)kw\d+", "flagged:Parser"),
+        ParserSpec("plain", r"KW1", "plain:Parser"),
+    ])
+    specs, _ = parsers._registry()
+    assert [spec.name for spec in specs] == ["stuttgart", "remseck", "named", "twice", "flagged", "plain"]
+    assert "Skipping parser plugin broken" in capsys.readouterr().err
+    assert find_spec("sak1") is parsers.STUTTGART
+    assert find_spec("163581") is parsers.REMSECK
+    assert find_spec("lb12") is specs[2]
+    assert find_spec("33x") is specs[3]
+    # the earlier plugin wins, whether or not it is part of the combined regex
+    assert find_spec("kw1") is specs[4]
+    assert find_spec("BR1") is None
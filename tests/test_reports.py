@@ -0,0 +1,35 @@
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from bibchecker.reports import build_payload, write_client_reports
+
+TIMESTAMP = datetime(2026, 10, 19, 4, 0)
+
+
+def test_payload_is_dictionary_encoded(entries: List[Dict[str, Any]]) -> None:
+    payload = build_payload(entries, 7, ["Vaihingen", "Unknown", "Ost"], TIMESTAMP)
+    assert payload["ts"] == "19.10.2026 04:00" and payload["ids"] == 7
+    assert payload["bibs"] == ["Ost", "Feuerbach", "Vaihingen", "Mediathek im KUBUS"]
+    assert payload["locs"] == ["Erw", "Kinder", "Spiele"]
+    assert payload["my"] == [2, 0]
+    assert payload["items"][0] == [
+        "SAK1", "Titel SAK1", None,
+        [[0, 0, "A 1", "Verfügbar", 1], [1, 1, "A 1", "Ausgeliehen - Fällig am: 01.11.2026", 0]],
+    ]
+    assert payload["items"][3] == ["SAK4", "Titel SAK4", None, []]
+
+
+def test_client_reports_write_data_and_viewer(tmp_path: Path, entries: List[Dict[str, Any]]) -> None:
+    rendered = write_client_reports(entries, ["SAK1"], ["Ost"], tmp_path, TIMESTAMP, compress=True)
+    assert [item["name"] for item in rendered] == ["index.html", "data.json"]
+    raw = (tmp_path / "data.json").read_bytes()
+    assert gzip.decompress((tmp_path / "data.json.gz").read_bytes()) == raw
+    payload = build_payload(entries, 1, ["Ost"], TIMESTAMP)
+    assert raw == json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert "data.json" in (tmp_path / "index.html").read_text(encoding="utf-8")
+
+    write_client_reports(entries, ["SAK1"], ["Ost"], tmp_path / "again", TIMESTAMP, compress=True)
+    assert (tmp_path / "again" / "data.json.gz").read_bytes() == (tmp_path / "data.json.gz").read_bytes()
@@ -0,0 +1,64 @@
+from typing import Any, Callable, Dict, List
+
+import pytest
+from flask import Flask
+
+from bibchecker.search import SearchIndex, fold, tokenize
+
+
+@pytest.fixture
+def index(make_holding: Callable[..., Dict[str, Any]], make_entry: Callable[..., Dict[str, Any]]) -> SearchIndex:
+    return SearchIndex([
+        make_entry("SAK1", make_holding("Ost", sig="Rei 5 München"), Titel="Reiseführer München"),
+        make_entry("SAK2", make_holding("Ost"), Titel="Der Hobbit", Verfasser="Tolkien, J. R. R."),
+        make_entry("SAK3", make_holding("Ost"), Titel="Hobbits und Zwerge"),
+        make_entry("SAK4", make_holding("Ost"), Titel="Große Straße", TitelExtra="Ein Hobbit erzählt"),
+    ])
+
+
+def ids(results: List[Any]) -> List[str]:
+    return [entry["id"] for _, entry in results]
+
+
+@pytest.mark.parametrize("spelled, transcribed", [
+    ("München", "Muenchen"), ("Größe", "Groesse"), ("Straße", "STRASSE"), ("Äpfel", "Aepfel"),
+])
+def test_umlauts_fold_like_their_transcription(spelled: str, transcribed: str) -> None:
+    assert fold(spelled) == fold(transcribed)
+
+
+def test_tokenize_splits_folded_words() -> None:
+    assert tokenize("Der Hobbit: Hin- und Rückweg") == ["der", "hobbit", "hin", "und", "ruckweg"]
+
+
+def test_umlaut_spellings_find_each_other(index: SearchIndex) -> None:
+    assert ids(index.search("muenchen")) == ["SAK1"]
+    assert ids(index.search("reisefuhrer MÜNCHEN")) == ["SAK1"]
+    assert ids(index.search("grosse strasse")) == ["SAK4"]
+
+
+def test_title_outranks_other_fields(index: SearchIndex) -> None:
+    # title 4.0, subtitle 2.0, completion "hobbits" in a title 4.0 * 0.5; ties go by ID
+    ranked = [(score, entry["id"]) for score, entry in index.search("hobbit")]
+    assert ranked == [(4.0, "SAK2"), (2.0, "SAK3"), (2.0, "SAK4")]
+    assert index.search("sak1")[0][0] == 5.0
+    # only the best token of a prefix counts: "Rei" in the signature, not the completion in the title
+    assert index.search("rei")[0][0] == 2.0
+
+
+def test_only_last_word_matches_as_prefix(index: SearchIndex) -> None:
+    # exact words score more than completions of the prefix
+    assert ids(index.search("hob")) == ["SAK2", "SAK3", "SAK4"]
+    assert ids(index.search("tolk")) == ["SAK2"]
+    assert index.search("tolk hobbit") == []
+    assert ids(index.search("hobbit tolk")) == ["SAK2"]
+    assert index.search("") == []
+    assert ids(index.search("hob", limit=1)) == ["SAK2"]
+
+
+def test_search_route(app: Flask, index: SearchIndex) -> None:
+    app.config["SEARCH_INDEX"] = index
+    payload = app.test_client().get("/search?q=Muenchen").get_json()
+    assert payload["query"] == "Muenchen"
+    assert [result["id"] for result in payload["results"]] == ["SAK1"]
+    assert payload["results"][0]["holdings"][0]["sig"] == "Rei 5 München"
@@ -0,0 +1,108 @@
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+
+from bibchecker import shard
+from bibchecker.shard import Coordinator, parse_address, partition
+
+
+def test_partition_keeps_order() -> None:
+    ids = [f"SAK{idx}" for idx in range(10)]
+    parts = partition(ids, 3)
+    assert [len(part) for part in parts] == [4, 3, 3]
+    assert sum(parts, []) == ids
+    assert partition(ids[:2], 5) == [["SAK0"], ["SAK1"]]
+
+
+def test_parse_address() -> None:
+    assert parse_address("0.0.0.0:7045") == ("0.0.0.0", 7045)
+    assert parse_address("/tmp/coordinator.sock") == "/tmp/coordinator.sock"
+
+
+def lease(coordinator: Coordinator) -> int:
+    shard_idx = coordinator._next_shard()
+    assert shard_idx is not None
+    return shard_idx
+
+
+def test_late_result_of_abandoned_shard_is_kept(make_entry: Callable[..., Dict[str, Any]]) -> None:
+    coordinator = Coordinator(["SAK1", "SAK2"], 2, max_attempts=1)
+    first = lease(coordinator)
+    coordinator._requeue(first, "worker silent for too long")
+    assert coordinator.abandoned == [first]
+    # the slow worker still delivers the given up shard
+    coordinator._complete(first, [make_entry("SAK1")])
+    assert coordinator.abandoned_ids() == []
+    assert not coordinator._finished.is_set()
+
+    second = lease(coordinator)
+    coordinator._complete(second, [make_entry("SAK2")])
+    assert coordinator._finished.is_set()
+    assert coordinator.done == {0, 1}
+    assert [entry["id"] for entries in coordinator.results.values() for entry in entries] == ["SAK1", "SAK2"]
+
+
+def test_heartbeat_renews_only_held_leases() -> None:
+    coordinator = Coordinator(["SAK1", "SAK2"], 2)
+    first = lease(coordinator)
+    coordinator.leases[first] -= 1000
+    coordinator._renew(first)
+    assert time.monotonic() - coordinator.leases[first] < 10
+    coordinator._renew(1)
+    assert 1 not in coordinator.leases
+
+
+def test_duplicate_results_keep_the_first(make_entry: Callable[..., Dict[str, Any]]) -> None:
+    coordinator = Coordinator(["SAK1", "SAK2"], 2, max_attempts=3)
+    first = lease(coordinator)
+    coordinator._requeue(first, "worker disconnected")
+    assert lease(coordinator) == 1
+    assert lease(coordinator) == first
+    coordinator._complete(first, [make_entry("SAK1", first=True)])
+    coordinator._complete(first, [make_entry("SAK1")])
+    assert coordinator.results[first][0]["first"] is True
+    assert not coordinator._finished.is_set()
+
+
+def test_remote_roles_need_authkey(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("BIBCHECKER_AUTHKEY", raising=False)
+    with pytest.raises(ValueError):
+        Coordinator(["SAK1"], 1, address=("127.0.0.1", 7045))
+    with pytest.raises(ValueError):
+        shard.run_worker(str(tmp_path / "none.sock"))
+    # the private socket gets a random key
+    assert len(Coordinator(["SAK1"], 1).authkey) == 32
+    monkeypatch.setenv("BIBCHECKER_AUTHKEY", "secret")
+    assert Coordinator(["SAK1"], 1, address=("127.0.0.1", 7045)).authkey == b"secret"
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patch")
+def test_local_workers_merge_in_order(monkeypatch: pytest.MonkeyPatch,
+                                      make_entry: Callable[..., Dict[str, Any]]) -> None:
+    def parse_id(ident: str, full_page: bool = False) -> Dict[str, Any]:
+        if ident == "SAK3":
+            raise ValueError("no such item")
+        return make_entry(ident, full_page=full_page)
+
+    monkeypatch.setattr(shard, "parse_id", parse_id)
+    ids = [f"SAK{idx}" for idx in range(7)]
+    entries = Coordinator(ids, 3, full_page=True).run(local_workers=2)
+    assert [entry["id"] for entry in entries] == [ident for ident in ids if ident != "SAK3"]
+    assert all(entry["full_page"] for entry in entries)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patch")
+def test_busy_workers_keep_their_shards(monkeypatch: pytest.MonkeyPatch,
+                                        make_entry: Callable[..., Dict[str, Any]]) -> None:
+    def parse_id(ident: str, full_page: bool = False) -> Dict[str, Any]:
+        time.sleep(1.5)
+        return make_entry(ident)
+
+    monkeypatch.setattr(shard, "parse_id", parse_id)
+    coordinator = Coordinator(["SAK1", "SAK2"], 2, lease_timeout=0.6)
+    entries = coordinator.run(local_workers=2)
+    assert [entry["id"] for entry in entries] == ["SAK1", "SAK2"]
+    assert coordinator.attempts == {}